@@ -0,0 +1,101 @@
+import inspect
+
+from asgiref.sync import sync_to_async
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework import exceptions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .conditional import make_etag, representation_variant
+
+
+class AsyncAPIView(APIView):
+    """
+    Base para endpoints de leitura assíncronos, servidos pelo app/asgi.py.
+
+    O `dispatch` é o do APIView do DRF com o handler assíncrono: o `initial`
+    (negociação de conteúdo, autenticação, permissões e throttling) roda em
+    thread (sync_to_async) e as consultas usam o ORM assíncrono. Renderers,
+    serializers e paginação são os mesmos das views síncronas, então a
+    resposta tem o mesmo formato.
+    """
+    http_method_names = ['get', 'head', 'options']
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Acessar request.user dispara a autenticação (pode ir ao banco)
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            handler = getattr(self, request.method.lower(), None)
+            if request.method.lower() not in self.http_method_names or handler is None:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            # O `options` do DRF é síncrono
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def get_serializer_context(self):
+        return {'request': self.request, 'view': self}
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('context', self.get_serializer_context())
+        return self.serializer_class(*args, **kwargs)
+
+
+class AsyncListAPIView(AsyncAPIView):
+    """Lista paginada; subclasses definem get_queryset e serializer_class"""
+    serializer_class = None
+    pagination_class = None
+
+    async def get(self, request, *args, **kwargs):
+        paginator = self.pagination_class()
+        queryset = self.get_list_queryset(self.get_queryset(), paginator)
+        page = await paginator.apaginate_queryset(queryset, request, view=self)
+        # As linhas já estão em memória; serializar não consulta o banco
+        data = self.serialize_list(page)
+        return Response(paginator.get_paginated_data(data))
+
+    def get_list_queryset(self, queryset, paginator):
+        return queryset
+
+    def serialize_list(self, rows):
+        return self.get_serializer(rows, many=True).data
+
+
+class AsyncRetrieveAPIView(AsyncAPIView):
+    """Detalhe por `pk`, com o mesmo ETag das views síncronas"""
+    queryset = None
+    serializer_class = None
+
+    async def get(self, request, pk, *args, **kwargs):
+        # Cada query assíncrona é uma troca de thread; aqui o ETag sai da
+        # própria linha, em uma query só, e o 304 ainda evita serializar
+        try:
+            instance = await self.get_queryset().aget(pk=pk)
+        except self.queryset.model.DoesNotExist:
+            raise exceptions.NotFound()
+
+        etag = quote_etag(make_etag(
+            instance.pk, instance.updated_at, representation_variant(request.GET)
+        ))
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+
+        response.headers.setdefault('ETag', etag)
+        return response
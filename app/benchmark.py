@@ -0,0 +1,116 @@
+import json
+import platform
+import statistics
+import time
+from importlib import import_module
+
+import django
+from django.apps import apps
+from django.db import connection
+
+
+class Benchmark:
+    """
+    Mede funções com repetição calibrada (como o timeit): cada rodada dura
+    pelo menos `min_time`. O resultado é a melhor de `repeat` rodadas, que é
+    a menos sensível a ruído da máquina; a mediana fica registrada também.
+
+    Os módulos `benchmarks.py` de cada app definem funções `bench_*(bench)`
+    que preparam os dados e chamam `bench.measure`.
+    """
+
+    def __init__(self, sizes=(1000,), repeat=5, min_time=0.2, pattern=None, stdout=None):
+        self.sizes = sorted(sizes)
+        self.repeat = repeat
+        self.min_time = min_time
+        self.pattern = pattern
+        self.stdout = stdout
+        self.results = {}
+
+    def wants(self, name):
+        return not self.pattern or self.pattern in name
+
+    def measure(self, name, func, ops=1):
+        """`ops` é quantas operações cada chamada representa (ex.: itens serializados)"""
+        if not self.wants(name):
+            return
+
+        loops = 1
+        while True:
+            elapsed = self._time(func, loops)
+            if elapsed >= self.min_time:
+                break
+            loops = max(loops * 2, int(loops * self.min_time / max(elapsed, 1e-9)) + 1)
+
+        timings = [elapsed] + [self._time(func, loops) for _ in range(self.repeat - 1)]
+        seconds = min(timings) / loops
+        self.results[name] = {
+            'seconds': seconds,
+            'median_seconds': statistics.median(timings) / loops,
+            'ops_per_sec': ops / seconds,
+            'loops': loops,
+            'repeat': self.repeat,
+        }
+        if self.stdout:
+            self.stdout.write(f'{name}: {seconds * 1000:.3f} ms ({ops / seconds:,.0f} ops/s)')
+
+    def _time(self, func, loops):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        return time.perf_counter() - started
+
+    def report(self):
+        return {
+            'meta': {
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'sizes': self.sizes,
+            },
+            'results': self.results,
+        }
+
+
+def run_benchmarks(bench, app_labels=None):
+    """Executa os `bench_*` dos módulos `benchmarks.py` dos apps instalados"""
+    for app_config in apps.get_app_configs():
+        if app_labels and app_config.label not in app_labels:
+            continue
+        try:
+            module = import_module(f'{app_config.name}.benchmarks')
+        except ModuleNotFoundError as e:
+            if e.name != f'{app_config.name}.benchmarks':
+                raise
+            continue
+
+        for name in sorted(vars(module)):
+            if name.startswith('bench_'):
+                getattr(module, name)(bench)
+    return bench.report()
+
+
+def compare(current, baseline, threshold):
+    """
+    Compara dois relatórios. Devolve (linhas, regressões); regressão é um
+    benchmark que ficou mais de `threshold` (ex.: 0.2 = 20%) mais lento.
+    """
+    rows = []
+    regressions = []
+    for name, result in sorted(current['results'].items()):
+        previous = baseline['results'].get(name)
+        if previous is None:
+            rows.append((name, None, result['seconds'], None))
+            continue
+
+        change = result['seconds'] / previous['seconds'] - 1
+        rows.append((name, previous['seconds'], result['seconds'], change))
+        if change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as source:
+        return json.load(source)
@@ -0,0 +1,264 @@
+import re
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Só os tipos da API (JSON, exportação em NDJSON/CSV). HTML fica de fora: as
+# páginas do admin e da API navegável trazem o token CSRF, e comprimir
+# segredo junto com texto do usuário abre espaço para o BREACH
+COMPRESSIBLE_TYPES = re.compile(r'^(application/(json|x-ndjson)|text/csv)\s*(;|$)', re.IGNORECASE)
+ACCEPT_ENCODING = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*')
+
+# Em streaming, entrada acumulada no compressor antes de enviar um bloco
+STREAM_FLUSH_SIZE = 64 * 1024
+
+
+class GzipStream:
+    """gzip sem nome nem data no cabeçalho: mesma entrada, mesmos bytes"""
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliStream:
+
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ZstdStream:
+
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+def gzip_compress(data, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def brotli_compress(data, level):
+    return brotli.compress(data, quality=level)
+
+
+def zstd_compress(data, level):
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+ENCODINGS = {
+    'zstd': (zstandard, zstd_compress, ZstdStream),
+    'br': (brotli, brotli_compress, BrotliStream),
+    'gzip': (zlib, gzip_compress, GzipStream),
+}
+
+
+# ETag de corpo comprimido: o ETag da view com a codificação no fim
+# ("<tag>-gzip"). Continua forte e diferente para cada codificação
+CODED_ETAG = re.compile(r'^(W/)?"(.*)-(%s)"$' % '|'.join(ENCODINGS))
+
+
+def available_encodings():
+    return [name for name, (module, _, _) in ENCODINGS.items() if module is not None]
+
+
+def parse_accept_encoding(header):
+    """`Accept-Encoding` -> {codificação: q}; entradas malformadas são ignoradas"""
+    accepted = {}
+    for part in header.split(','):
+        match = ACCEPT_ENCODING.fullmatch(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) is not None else 1.0
+        except ValueError:
+            continue
+        accepted[match.group(1).lower()] = quality
+    return accepted
+
+
+def choose_encoding(header, encodings):
+    """
+    Codificação de maior `q` entre as disponíveis; no empate, a primeira de
+    `encodings`. `*` vale para as não citadas e `q=0` recusa.
+    """
+    accepted = parse_accept_encoding(header)
+    best, best_quality = None, 0
+    for name in encodings:
+        quality = accepted.get(name, accepted.get('*', 0))
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Comprime as respostas com zstd, brotli ou gzip, conforme o
+    `Accept-Encoding` do cliente e o que estiver instalado (gzip sempre).
+
+    Respostas comuns menores que COMPRESSION_MIN_SIZE ficam como estão.
+    Respostas em streaming são comprimidas bloco a bloco, sem juntar o
+    conteúdo em memória. COMPRESSION_ENCODINGS define as codificações e a
+    preferência do servidor no empate; COMPRESSION_LEVELS, o nível de cada uma.
+
+    Um ETag forte de resposta comprimida ganha a codificação no fim
+    ("<tag>-gzip"); o sufixo sai dos validadores antes da view e volta no 304.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        available = available_encodings()
+        self.encodings = [name for name in settings.COMPRESSION_ENCODINGS if name in available]
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        validators = self.strip_etag_codings(request)
+        return self.process_response(request, self.get_response(request), validators)
+
+    async def __acall__(self, request):
+        validators = self.strip_etag_codings(request)
+        return self.process_response(request, await self.get_response(request), validators)
+
+    @staticmethod
+    def strip_etag_codings(request):
+        """
+        Tira a codificação dos ETags em If-None-Match/If-Match, para a view
+        comparar com o seu próprio ETag. Devolve o If-None-Match original.
+        """
+        validators = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        for header in ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MATCH'):
+            if request.META.get(header):
+                request.META[header] = ', '.join(
+                    CODED_ETAG.sub(r'\1"\2"', etag) for etag in parse_etags(request.META[header])
+                )
+        return validators
+
+    @staticmethod
+    def restore_etag_coding(response, validators):
+        """No 304, devolve o ETag com a codificação que o cliente tem em cache"""
+        etag = response.get('ETag')
+        for validator in validators:
+            match = CODED_ETAG.match(validator)
+            if match and etag == f'"{match.group(2)}"':
+                response.headers['ETag'] = f'"{match.group(2)}-{match.group(3)}"'
+                patch_vary_headers(response, ('Accept-Encoding',))
+                return
+
+    def process_response(self, request, response, validators=()):
+        if response.status_code == 304:
+            self.restore_etag_coding(response, validators)
+            return response
+        if response.has_header('Content-Encoding') or response.status_code == 204:
+            return response
+        if not COMPRESSIBLE_TYPES.match(response.get('Content-Type', '')):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        # Depende do Accept-Encoding mesmo quando não comprime (caches intermediários)
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''), self.encodings)
+        if encoding is None:
+            return response
+
+        _, compress, stream_class = ENCODINGS[encoding]
+        level = settings.COMPRESSION_LEVELS[encoding]
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.compress_async_stream(
+                    response.streaming_content, stream_class(level)
+                )
+            else:
+                response.streaming_content = self.compress_stream(
+                    response.streaming_content, stream_class(level)
+                )
+            del response.headers['Content-Length']
+        else:
+            compressed = compress(response.content, level)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # O corpo comprimido é outra sequência de bytes: outro ETag forte
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = f'{etag[:-1]}-{encoding}"'
+
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def compress_chunk(stream, chunk, pending):
+        """Comprime `chunk`; devolve (bytes prontos, bytes ainda no compressor)"""
+        data = stream.compress(chunk)
+        pending += len(chunk)
+        # Esvazia o compressor a cada STREAM_FLUSH_SIZE de entrada: o cliente
+        # recebe os dados aos poucos sem perder a compressão entre linhas
+        if pending >= STREAM_FLUSH_SIZE:
+            return data + stream.flush(), 0
+        return data, pending
+
+    def compress_stream(self, content, stream):
+        pending = 0
+        for chunk in content:
+            data, pending = self.compress_chunk(stream, chunk, pending)
+            if data:
+                yield data
+        yield stream.finish()
+
+    async def compress_async_stream(self, content, stream):
+        pending = 0
+        async for chunk in content:
+            data, pending = self.compress_chunk(stream, chunk, pending)
+            if data:
+                yield data
+        yield stream.finish()
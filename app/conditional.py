@@ -0,0 +1,47 @@
+import zlib
+
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+
+# Parâmetros que mudam o corpo do detalhe; entram no ETag
+REPRESENTATION_PARAMS = ('fields', 'omit', 'expand')
+
+
+def representation_variant(params):
+    """Resumo curto dos parâmetros de representação ('' sem nenhum)"""
+    parts = []
+    for name in REPRESENTATION_PARAMS:
+        values = sorted({value.strip() for value in params.get(name, '').split(',') if value.strip()})
+        if values:
+            parts.append(f"{name}={','.join(values)}")
+    if not parts:
+        return ''
+    return f"{zlib.crc32(';'.join(parts).encode()):08x}"
+
+
+def make_etag(pk, updated_at, variant=''):
+    etag = f'{pk}-{int(updated_at.timestamp())}{updated_at.microsecond:06d}'
+    return f'{etag}-{variant}' if variant else etag
+
+
+def version_etag(queryset):
+    """
+    Função de ETag para `condition` baseada no `updated_at` do registro.
+
+    Só a coluna `updated_at` é lida (pela chave primária); a linha completa
+    só é carregada e serializada quando o cliente não tem a versão atual.
+    Representações diferentes (`?fields=`, `?omit=`, `?expand=`) têm ETags
+    diferentes.
+    """
+    def etag_func(request, pk=None, *args, **kwargs):
+        updated_at = queryset.filter(pk=pk).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return None
+        return make_etag(pk, updated_at, representation_variant(request.GET))
+    return etag_func
+
+
+def conditional_retrieve(queryset):
+    """Decorator para `retrieve`: ETag forte e 304 para If-None-Match"""
+    return method_decorator(condition(etag_func=version_etag(queryset)))
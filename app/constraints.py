@@ -0,0 +1,21 @@
+def violates_constraint(exc, model, name):
+    """
+    Diz se o IntegrityError `exc` veio da constraint única `name` de `model`.
+
+    No PostgreSQL o driver informa o nome da constraint. O SQLite cita o
+    nome só nas constraints sobre expressões; nas demais, lista as colunas.
+    """
+    diag = getattr(exc.__cause__, 'diag', None)
+    if getattr(diag, 'constraint_name', None):
+        return diag.constraint_name == name
+
+    message = str(exc)
+    if f'"{name}"' in message or f"'{name}'" in message:
+        return True
+
+    constraint = next((c for c in model._meta.constraints if c.name == name), None)
+    if constraint is None or not getattr(constraint, 'fields', None):
+        return False
+    table = model._meta.db_table
+    columns = ', '.join(f'{table}.{model._meta.get_field(field).column}' for field in constraint.fields)
+    return message == f'UNIQUE constraint failed: {columns}'
@@ -0,0 +1,116 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+@lru_cache(maxsize=None)
+def serializer_field_names(serializer_class):
+    """Campos de um serializer, calculados uma vez por classe"""
+    return frozenset(serializer_class().fields)
+
+
+def _split(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def parse_fieldset(params, available):
+    """
+    `?fields=a,b` e/ou `?omit=c` -> frozenset com os campos da resposta, ou
+    None sem nenhum dos dois. Nomes desconhecidos são recusados antes de
+    qualquer consulta ao banco.
+    """
+    fields = _split(params.get('fields', ''))
+    omit = _split(params.get('omit', ''))
+    if not fields and not omit:
+        return None
+
+    errors = {}
+    for param, names in (('fields', fields), ('omit', omit)):
+        unknown = sorted(set(names) - available)
+        if unknown:
+            errors[param] = f"Campos inexistentes: {', '.join(unknown)}"
+    if errors:
+        raise ValidationError(errors)
+
+    return frozenset(fields or available) - frozenset(omit)
+
+
+def only_columns(model, names):
+    """
+    Nomes de campos do model para `.only()`, ou None se algum campo da
+    resposta não corresponder a uma coluna (aí nada é adiado).
+    """
+    columns = []
+    for name in names:
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete:
+            return None
+        columns.append(name)
+    return columns
+
+
+class SparseFieldsetMixin:
+    """
+    `?fields=` e `?omit=` para views de leitura: o serializer só gera os
+    campos pedidos (ver SparseFieldsetSerializerMixin) e o SELECT só traz as
+    colunas deles, além da chave de ordenação da paginação (usada no
+    cursor) e do `updated_at` (usado no ETag). Em escritas os parâmetros são
+    ignorados.
+    """
+
+    def get_fieldset(self):
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = None
+            if self.request.method in SAFE_METHODS:
+                self._fieldset = parse_fieldset(
+                    self.request.query_params, serializer_field_names(self.serializer_class)
+                )
+        return self._fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_fieldset()
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return queryset
+
+        model = queryset.model
+        columns = only_columns(model, fieldset)
+        if columns is None:
+            return queryset
+
+        pagination_class = getattr(self, 'pagination_class', None)
+        ordering = getattr(pagination_class, 'ordering', None) or ()
+        required = [name.lstrip('-') for name in ordering] + ['updated_at']
+        columns += [name for name in required if only_columns(model, [name])]
+
+        # Relação fora da resposta não pode ficar no select_related (o Django
+        # não aceita adiar e seguir a mesma FK)
+        select_related = queryset.query.select_related
+        if isinstance(select_related, dict):
+            kept = [name for name in select_related if name in columns]
+            queryset = queryset.select_related(None)
+            if kept:
+                queryset = queryset.select_related(*kept)
+
+        return queryset.only(*columns)
+
+
+class SparseFieldsetSerializerMixin:
+    """Mantém só os campos em `context['fields']`, quando presente"""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.context.get('fields')
+        if fieldset is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in fieldset}
@@ -0,0 +1,95 @@
+import atexit
+import copy
+import logging
+import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+
+
+# Handlers de fila criados pelo LOGGING; cada um tem seu listener
+_queue_handlers = []
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler que não formata na thread da requisição.
+
+    O QueueHandler padrão interpola a mensagem em `prepare`, antes de
+    enfileirar. Como as chamadas usam `%s` com valores simples (ids, nomes),
+    a interpolação pode ficar para a thread do listener; aqui só o traceback
+    é resolvido, porque o frame não sobrevive ao fim da requisição.
+    """
+    # Se a thread do listener está rodando (ver _start_listener)
+    listening = False
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Mantém só uma fração (`rate`) dos registros abaixo de WARNING"""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = float(rate)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+def queue_handler(handlers, respect_handler_level=True):
+    """
+    Factory usada no LOGGING ('()'): devolve um handler que só enfileira e
+    inicia a thread que repassa os registros para `handlers`.
+
+    `handlers` vem do dictConfig como lista de 'cfg://handlers.<nome>'; os
+    nomes precisam vir antes deste handler em ordem alfabética, que é a ordem
+    em que o dictConfig os cria.
+    """
+    # ConvertingList só resolve 'cfg://' no acesso por índice
+    targets = [handlers[index] for index in range(len(handlers))]
+
+    handler = DeferredQueueHandler(queue.SimpleQueue())
+    _start_listener(handler, targets, respect_handler_level)
+    _queue_handlers.append(handler)
+    return handler
+
+
+def _start_listener(handler, targets, respect_handler_level):
+    """Fila nova e thread nova para `handler`"""
+    handler.queue = queue.SimpleQueue()
+    handler.listener = QueueListener(
+        handler.queue, *targets, respect_handler_level=respect_handler_level
+    )
+    handler.listener.start()
+    handler.listening = True
+
+
+def stop_listeners():
+    """Escreve o que ainda está nas filas e encerra as threads de escrita"""
+    while _queue_handlers:
+        handler = _queue_handlers.pop()
+        if handler.listening:
+            handler.listening = False
+            handler.listener.stop()
+
+
+def _restart_listeners():
+    # Com `gunicorn --preload` o LOGGING é configurado no master; a thread do
+    # listener não existe no worker depois do fork, então cada worker cria a
+    # sua, com uma fila nova (os registros pendentes ficam com o master)
+    for handler in _queue_handlers:
+        if handler.listening:
+            listener = handler.listener
+            _start_listener(handler, listener.handlers, listener.respect_handler_level)
+
+
+os.register_at_fork(after_in_child=_restart_listeners)
+atexit.register(stop_listeners)
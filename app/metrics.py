@@ -0,0 +1,423 @@
+import contextlib
+import contextvars
+import fcntl
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# nome: (tipo, descrição, labels, buckets)
+METRICS = {
+    'http_requests_total': (
+        'counter', 'Requisições por rota, método e status.',
+        ('method', 'route', 'status'), None,
+    ),
+    'http_request_duration_seconds': (
+        'histogram', 'Latência das requisições em segundos.',
+        ('method', 'route'), DURATION_BUCKETS,
+    ),
+    'http_response_size_bytes': (
+        'histogram', 'Tamanho do corpo das respostas (em streaming, o total enviado).',
+        ('method', 'route'), SIZE_BUCKETS,
+    ),
+    'db_queries_per_request': (
+        'histogram', 'Queries SQL por requisição.',
+        ('method', 'route'), QUERY_BUCKETS,
+    ),
+    'db_query_duration_seconds_total': (
+        'counter', 'Tempo total gasto em queries SQL.',
+        ('method', 'route'), None,
+    ),
+}
+
+ARCHIVE_FILE = 'archived.json'
+LOCK_FILE = '.lock'
+
+logger = logging.getLogger('api')
+
+
+class RequestStats:
+    __slots__ = ('queries', 'query_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+
+
+# Estatísticas SQL da requisição atual; o contexto acompanha o sync_to_async,
+# então queries do ORM assíncrono também são contadas
+_current_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_time += time.perf_counter() - started
+
+
+def _install_wrapper(connection, **kwargs):
+    if _query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_wrapper)
+
+
+connection_created.connect(_install_wrapper)
+
+
+class Registry:
+    """
+    Métricas deste processo. Cada worker grava periodicamente um snapshot em
+    METRICS_DIR; o endpoint soma os snapshots de todos os processos.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        # Lock próprio da gravação: o snapshot não segura as requisições que
+        # só incrementam contadores
+        self.flush_lock = threading.Lock()
+        self.values = {name: {} for name in METRICS}
+        self.last_flush = time.monotonic()
+        self.file_name = f'{os.getpid()}-{uuid.uuid4().hex[:8]}.json'
+
+    def inc(self, name, labels, amount=1):
+        series = self.values[name]
+        series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][3]
+        series = self.values[name]
+        histogram = series.get(labels)
+        if histogram is None:
+            # Contagem por bucket (não acumulada), soma e total
+            histogram = series[labels] = [[0] * (len(buckets) + 1), 0, 0]
+        histogram[0][bisect_left(buckets, value)] += 1
+        histogram[1] += value
+        histogram[2] += 1
+
+    def record(self, method, route, status, duration, size, stats):
+        with self.lock:
+            self.inc('http_requests_total', (method, route, str(status)))
+            self.observe('http_request_duration_seconds', (method, route), duration)
+            if size is not None:
+                self.observe('http_response_size_bytes', (method, route), size)
+            self.observe('db_queries_per_request', (method, route), stats.queries)
+            self.inc('db_query_duration_seconds_total', (method, route), stats.query_time)
+
+        if time.monotonic() - self.last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush(settings.METRICS_FLUSH_INTERVAL)
+
+    def snapshot(self):
+        with self.lock:
+            return serialize(self.values)
+
+    def flush(self, interval=None):
+        """
+        Grava o snapshot do processo (troca atômica do arquivo).
+
+        Com `interval` (gravação periódica, vinda de uma requisição), não
+        espera outra thread que já esteja gravando e só grava se o intervalo
+        ainda tiver passado. Falha de disco é registrada no log, nunca
+        levantada: a requisição que pediu a gravação já foi atendida.
+        """
+        if not self.flush_lock.acquire(blocking=interval is None):
+            return
+        try:
+            if interval is not None and time.monotonic() - self.last_flush < interval:
+                return
+            self.last_flush = time.monotonic()
+            self._write_snapshot()
+        finally:
+            self.flush_lock.release()
+
+    def _write_snapshot(self):
+        temporary = None
+        try:
+            directory = metrics_dir()
+            temporary = directory / f'.{self.file_name}.{uuid.uuid4().hex[:8]}.tmp'
+            temporary.write_text(json.dumps(self.snapshot()))
+            os.replace(temporary, directory / self.file_name)
+        except OSError:
+            logger.exception("Falha ao gravar as métricas em %s", settings.METRICS_DIR)
+            if temporary is not None:
+                with contextlib.suppress(OSError):
+                    temporary.unlink()
+
+
+registry = Registry()
+os.register_at_fork(after_in_child=registry.reset)
+
+
+def metrics_dir():
+    directory = Path(settings.METRICS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def serialize(values):
+    """{nome: {labels: valor}} -> formato JSON dos snapshots"""
+    return {
+        name: [[list(labels), value] for labels, value in series.items()]
+        for name, series in values.items()
+    }
+
+
+def merge(total, snapshot):
+    for name, series in snapshot.items():
+        if name not in METRICS:
+            continue
+        target = total.setdefault(name, {})
+        for labels, value in series:
+            labels = tuple(labels)
+            current = target.get(labels)
+            if current is None:
+                target[labels] = value
+            elif isinstance(value, list):
+                current[0] = [a + b for a, b in zip(current[0], value[0])]
+                current[1] += value[1]
+                current[2] += value[2]
+            else:
+                target[labels] = current + value
+    return total
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect():
+    """
+    Soma os snapshots de todos os processos. Snapshots de processos que já
+    terminaram (ex.: workers reciclados pelo --max-requests) são incorporados
+    ao arquivo de arquivados, para os contadores nunca diminuírem.
+    """
+    registry.flush()
+    directory = metrics_dir()
+
+    with open(directory / LOCK_FILE, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        archive_path = directory / ARCHIVE_FILE
+        archived = {}
+        if archive_path.exists():
+            archived = merge({}, json.loads(archive_path.read_text()))
+
+        total = {}
+        dead = []
+        for path in directory.glob('*-*.json'):
+            try:
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+
+            if _process_alive(int(path.name.split('-', 1)[0])):
+                merge(total, snapshot)
+            else:
+                merge(archived, snapshot)
+                dead.append(path)
+
+        if dead:
+            temporary = directory / f'.{ARCHIVE_FILE}.tmp'
+            temporary.write_text(json.dumps(serialize(archived)))
+            os.replace(temporary, archive_path)
+            for path in dead:
+                path.unlink(missing_ok=True)
+
+    return merge(total, serialize(archived))
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def render(total):
+    """Formato texto do Prometheus (exposition format 0.0.4)"""
+    lines = []
+    for name, (kind, description, label_names, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(total.get(name, {}).items()):
+            if kind == 'counter':
+                lines.append(f'{name}{_labels(label_names, labels)} {value}')
+                continue
+
+            counts, value_sum, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f'{name}_bucket{_labels(label_names, labels, le)} {cumulative}')
+            le = 'le="+Inf"'
+            lines.append(f'{name}_bucket{_labels(label_names, labels, le)} {count}')
+            lines.append(f'{name}_sum{_labels(label_names, labels)} {value_sum}')
+            lines.append(f'{name}_count{_labels(label_names, labels)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def route_label(request):
+    # Padrão da rota, não o caminho, para não criar uma série por id
+    match = getattr(request, 'resolver_match', None)
+    if match is None or not match.route:
+        return 'unmatched'
+    return match.route
+
+
+class MetricsMiddleware:
+    """
+    Latência, status, tamanho da resposta e queries SQL por rota. Deve ser o
+    primeiro middleware, para medir a pilha inteira.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        stats, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        self.finish(request, response, stats, started)
+        return response
+
+    async def __acall__(self, request):
+        stats, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        self.finish(request, response, stats, started)
+        return response
+
+    def start(self):
+        # Conexões abertas antes deste módulo ser importado não passaram
+        # pelo connection_created
+        for connection in connections.all(initialized_only=True):
+            _install_wrapper(connection)
+        stats = RequestStats()
+        return stats, _current_stats.set(stats), time.perf_counter()
+
+    def finish(self, request, response, stats, started):
+        def record(size):
+            registry.record(
+                request.method, route_label(request), response.status_code,
+                time.perf_counter() - started, size, stats,
+            )
+
+        if not response.streaming:
+            record(len(response.content))
+            return
+
+        # O corpo é gerado depois daqui: latência, tamanho e queries só
+        # fecham quando o envio termina ou a resposta é fechada
+        meter = StreamMeter(stats, record)
+        if response.is_async:
+            response.streaming_content = meter.measure_async(response.streaming_content)
+        else:
+            response.streaming_content = meter.measure(response.streaming_content)
+        response._resource_closers.append(meter.close)
+
+
+class StreamMeter:
+    """Mede uma resposta em streaming enquanto ela é enviada"""
+
+    def __init__(self, stats, record):
+        self.stats = stats
+        self.record = record
+        self.size = 0
+        self.closed = False
+
+    def measure(self, content):
+        iterator = iter(content)
+        while True:
+            # As queries feitas para gerar cada bloco contam para a requisição
+            token = _current_stats.set(self.stats)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                _current_stats.reset(token)
+            self.size += len(chunk)
+            yield chunk
+        self.close()
+
+    async def measure_async(self, content):
+        iterator = aiter(content)
+        while True:
+            token = _current_stats.set(self.stats)
+            try:
+                chunk = await anext(iterator)
+            except StopAsyncIteration:
+                break
+            finally:
+                _current_stats.reset(token)
+            self.size += len(chunk)
+            yield chunk
+        self.close()
+
+    def close(self):
+        # Fim do envio ou conexão encerrada antes; registra uma vez só
+        if not self.closed:
+            self.closed = True
+            self.record(self.size)
+
+
+def metrics_view(request):
+    """Métricas agregadas de todos os workers; exige `Authorization: Bearer <METRICS_TOKEN>`"""
+    token = settings.METRICS_TOKEN
+    if not token:
+        return HttpResponse('Métricas desabilitadas (defina METRICS_TOKEN)', status=404, content_type='text/plain')
+
+    header = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+        response = HttpResponse('Não autorizado', status=401, content_type='text/plain')
+        response['WWW-Authenticate'] = 'Bearer realm="metrics"'
+        return response
+
+    return HttpResponse(render(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
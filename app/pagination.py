@@ -0,0 +1,214 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação por cursor (keyset) sobre uma ordenação composta.
+
+    Diferente do CursorPagination do DRF, que guarda só o primeiro campo da
+    ordenação e usa offset para desempatar, aqui o cursor carrega o valor de
+    todos os campos. Cada página vira uma busca por faixa no índice, com custo
+    constante independente da profundidade. O último campo da ordenação deve
+    ser único (normalmente 'id').
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    ordering = None
+    invalid_cursor_message = 'Cursor inválido'
+
+    def get_ordering(self, request, queryset, view):
+        assert self.ordering, 'KeysetPagination exige o atributo ordering.'
+        return tuple(self.ordering)
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Versão para views assíncronas, com o ORM assíncrono"""
+        queryset = self.get_page_queryset(queryset, request, view)
+        return self.set_page([obj async for obj in queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """Queryset (ainda não executado) da página pedida, com uma linha a mais"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.position, self.reverse = self.decode_cursor(request, queryset.model)
+        ordering = _reverse_ordering(self.ordering) if self.reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(_keyset_filter(ordering, self.position))
+
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        position = self._get_position_from_instance(self.page[-1])
+        return self.encode_cursor(position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        position = self._get_position_from_instance(self.page[0])
+        return self.encode_cursor(position, reverse=True)
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def decode_cursor(self, request, model=None):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            position = payload['p']
+            reverse = bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        # Cada valor passa pelo campo da ordenação: cursor adulterado vira 404,
+        # não um erro do banco
+        try:
+            position = [
+                self._to_python(model, order.lstrip('-'), value)
+                for order, value in zip(self.ordering, position)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, reverse
+
+    @staticmethod
+    def _to_python(model, field_name, value):
+        if value is None or isinstance(value, (list, dict)):
+            raise ValueError(field_name)
+        if model is None:
+            return value
+        try:
+            field = model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            return value
+        return field.to_python(value)
+
+    def encode_cursor(self, position, reverse):
+        return replace_query_param(
+            remove_query_param(self.base_url, self.cursor_query_param),
+            self.cursor_query_param,
+            encode_position(position, reverse)
+        )
+
+    def _get_position_from_instance(self, instance):
+        position = []
+        for order in self.ordering:
+            field_name = order.lstrip('-')
+            if isinstance(instance, dict):
+                value = instance[field_name]
+            else:
+                value = getattr(instance, field_name)
+
+            if isinstance(value, (datetime, date)):
+                value = value.isoformat()
+            position.append(value)
+        return position
+
+
+def encode_position(position, reverse=False):
+    """Valor do parâmetro `cursor` para uma posição (valores da ordenação)"""
+    payload = {'p': position}
+    if reverse:
+        payload['r'] = 1
+    return urlsafe_b64encode(
+        json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    ).decode('ascii')
+
+
+def _reverse_ordering(ordering):
+    return tuple(
+        order[1:] if order.startswith('-') else '-' + order
+        for order in ordering
+    )
+
+
+def _keyset_filter(ordering, position):
+    """
+    Monta `(a, b, c) > (x, y, z)` respeitando a direção de cada campo.
+
+    O primeiro campo também recebe uma condição não estrita (`a >= x`), que é o
+    que permite ao banco iniciar a leitura do índice direto na posição do
+    cursor em vez de filtrar desde o começo.
+    """
+    condition = Q()
+    equal = {}
+    for order, value in zip(ordering, position):
+        field_name = order.lstrip('-')
+        lookup = 'lt' if order.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{field_name}__{lookup}': value})
+        equal[field_name] = value
+
+    first = ordering[0]
+    lookup = 'lte' if first.startswith('-') else 'gte'
+    return Q(**{f'{first.lstrip("-")}__{lookup}': position[0]}) & condition
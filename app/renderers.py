@@ -0,0 +1,87 @@
+import math
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Mesmo tratamento do JSONRenderer do DRF: saída sempre subconjunto de JavaScript
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+SCALARS = frozenset({str, int, bool, type(None)})
+
+
+def has_nonfinite_float(data):
+    """
+    Diz se há NaN ou infinito em `data` (dicts, listas e tuplas aninhados).
+    Decimal também conta: o encoder do DRF o converte em float.
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            items = value.values()
+        elif isinstance(value, (list, tuple)):
+            items = value
+        elif isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+            continue
+        elif isinstance(value, Decimal):
+            if not value.is_finite():
+                return True
+            continue
+        else:
+            continue
+        # Contêiner só com str/int/bool/None (o caso comum) é pulado de uma vez
+        if not SCALARS.issuperset(map(type, items)):
+            stack.extend([item for item in items if type(item) not in SCALARS])
+    return False
+
+
+def orjson_dumps(data, encoder_class, option=0):
+    """
+    orjson com o `default` do encoder do DRF, para que Decimal, timedelta,
+    textos traduzíveis e datetimes saiam com os mesmos bytes do json da
+    biblioteca padrão.
+    """
+    ret = orjson.dumps(
+        data,
+        default=encoder_class().default,
+        option=option | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+    )
+    for raw, escaped in LINE_SEPARATORS:
+        if raw in ret:
+            ret = ret.replace(raw, escaped)
+    return ret
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer com orjson quando a saída é compacta e em UTF-8 (o padrão
+    da API); com indentação, ASCII ou sem o orjson instalado, usa o do DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson_dumps(data, self.encoder_class)
+        except orjson.JSONEncodeError:
+            # Inteiros acima de 64 bits etc.: o DRF decide
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # O orjson grava NaN e infinito como null; o DRF levanta erro (com
+        # STRICT_JSON) ou grava NaN. Sem null na saída não há o que conferir
+        if b'null' in ret and has_nonfinite_float(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret
@@ -0,0 +1,185 @@
+from functools import lru_cache
+from operator import itemgetter
+
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Campos cuja representação é o próprio valor vindo do banco
+PLAIN_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+)
+
+
+class RowEncoder:
+    """
+    Monta, a partir dos dicts de `.values(*columns)`, o mesmo JSON que o
+    serializer geraria para a instância. Cada chave vira uma função pronta
+    (itemgetter, conversão de data ou encoder embutido), resolvida uma vez
+    por combinação de serializer e campos, e não a cada linha.
+    """
+
+    def __init__(self, columns, getters):
+        self.columns = columns
+        # (chave, fábrica) -> a fábrica recebe o fuso da requisição e devolve o getter
+        self.getters = getters
+
+    def bind(self, tz):
+        return [(key, factory(tz)) for key, factory in self.getters]
+
+    def encode_many(self, rows):
+        # O fuso é resolvido uma vez por página (get_current_timezone não é barato)
+        getters = self.bind(timezone.get_current_timezone())
+        return [{key: getter(row) for key, getter in getters} for row in rows]
+
+
+def _plain(column):
+    getter = itemgetter(column)
+    return lambda tz: getter
+
+
+def _datetime(column, field):
+    get = itemgetter(column)
+
+    # Formato ou fuso próprios: usa o campo do DRF, só sem o serializer em volta
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601 or hasattr(field, 'timezone'):
+        return lambda tz: lambda row: field.to_representation(get(row))
+
+    def factory(tz):
+        # Datas se repetem muito numa página (horários, created_at de carga em lote)
+        formatted = {}
+
+        def getter(row):
+            value = get(row)
+            if not value or timezone.is_naive(value):
+                return field.to_representation(value)
+            try:
+                return formatted[value]
+            except KeyError:
+                pass
+            # Mesmo resultado de DateTimeField.to_representation para datas com fuso
+            text = value.astimezone(tz).isoformat()
+            if text.endswith('+00:00'):
+                text = text[:-6] + 'Z'
+            formatted[value] = text
+            return text
+
+        return getter
+
+    return factory
+
+
+def _nested(encoder, pk_column):
+    pk = itemgetter(pk_column)
+
+    def factory(tz):
+        getters = encoder.bind(tz)
+        return lambda row: None if pk(row) is None else {key: getter(row) for key, getter in getters}
+
+    return factory
+
+
+def _compile(serializer, prefix=''):
+    """Colunas e getters de um serializer, ou None se algum campo não for suportado"""
+    model = serializer.Meta.model
+    columns = []
+    getters = []
+
+    for key, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+
+        if isinstance(field, serializers.ModelSerializer):
+            if not model_field.many_to_one:
+                return None
+            nested = _compile(field, f'{prefix}{field.source}__')
+            if nested is None:
+                return None
+            columns += nested.columns
+            pk_column = f'{prefix}{field.source}__{field.Meta.model._meta.pk.name}'
+            if pk_column not in nested.columns:
+                columns.append(pk_column)
+            getters.append((key, _nested(nested, pk_column)))
+            continue
+
+        if not model_field.concrete:
+            return None
+        column = prefix + model_field.attname
+        columns.append(column)
+
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            if field.pk_field is not None:
+                return None
+            getters.append((key, _plain(column)))
+        elif isinstance(field, serializers.DateTimeField):
+            getters.append((key, _datetime(column, field)))
+        elif type(field) in PLAIN_FIELDS or isinstance(field, serializers.EmailField):
+            getters.append((key, _plain(column)))
+        else:
+            return None
+
+    return RowEncoder(list(dict.fromkeys(columns)), getters)
+
+
+@lru_cache(maxsize=128)
+def compile_row_encoder(serializer_class, fields=None, expand=frozenset()):
+    """
+    RowEncoder do serializer para o recorte `fields`/`expand` (mesmas chaves
+    do contexto das views), ou None quando o serializer tem campos que só
+    ele sabe representar.
+    """
+    serializer = serializer_class(context={'fields': fields, 'expand': expand})
+    return _compile(serializer)
+
+
+class ValuesListMixin:
+    """
+    Leitura rápida das listas: em vez de instâncias do model passando pelo
+    ModelSerializer, a página vem de `.values()` e é montada pelo RowEncoder,
+    com o mesmo JSON. Escritas continuam no serializer.
+
+    Com `use_row_encoder = False` (ou serializer sem encoder) a lista segue o
+    caminho do DRF.
+    """
+    use_row_encoder = True
+
+    def get_row_encoder(self):
+        if not self.use_row_encoder:
+            return None
+        context = self.get_serializer_context()
+        return compile_row_encoder(
+            self.serializer_class,
+            context.get('fields'),
+            frozenset(context.get('expand', ())),
+        )
+
+    def get_list_queryset(self, queryset, paginator):
+        self.row_encoder = self.get_row_encoder()
+        if self.row_encoder is None:
+            return queryset
+
+        # A paginação precisa dos valores da ordenação para montar o cursor
+        ordering = paginator.get_ordering(self.request, queryset, self) if paginator else ()
+        columns = self.row_encoder.columns + [name.lstrip('-') for name in ordering]
+        return queryset.values(*dict.fromkeys(columns))
+
+    def serialize_list(self, rows):
+        if self.row_encoder is None:
+            return self.get_serializer(rows, many=True).data
+        return self.row_encoder.encode_many(rows)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_list_queryset(self.filter_queryset(self.get_queryset()), self.paginator)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.serialize_list(page))
+        return Response(self.serialize_list(queryset))
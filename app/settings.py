@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -39,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'rest_framework',
     'rest_framework_simplejwt',
@@ -50,6 +52,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'app.metrics.MetricsMiddleware',
+    'app.compression.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -91,6 +95,9 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', ''),
         'HOST': os.environ.get('DB_HOST', 'lacrei-saude-db'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        # Testa a conexão reaproveitada antes de usá-la, em vez de falhar na
+        # primeira query depois de o banco derrubá-la
+        'CONN_HEALTH_CHECKS': True,
     },
     'dev': {
         'ENGINE': 'django.db.backends.sqlite3',
@@ -98,6 +105,81 @@ DATABASES = {
     }
 }
 
+# Processos e threads do gunicorn (os mesmos lidos por gunicorn.conf.py); cada
+# thread usa no máximo uma conexão por vez
+GUNICORN_WORKERS = int(os.environ.get('GUNICORN_WORKERS', 3))
+GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 2))
+
+# Com o psycopg 3 e o psycopg_pool instalados, cada processo mantém um pool de
+# até GUNICORN_THREADS conexões, então o total aberto no banco fica limitado a
+# GUNICORN_WORKERS * GUNICORN_THREADS. O Django não aceita pool junto com
+# CONN_MAX_AGE; sem o pool (DB_POOL=False ou psycopg2), as conexões são
+# persistentes por DB_CONN_MAX_AGE segundos.
+try:
+    import psycopg_pool  # noqa: F401
+    DB_POOL_AVAILABLE = True
+except ImportError:
+    DB_POOL_AVAILABLE = False
+
+if DB_POOL_AVAILABLE and os.environ.get('DB_POOL', 'True') == 'True':
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+            'max_size': GUNICORN_THREADS,
+            # Conexões ociosas além do min_size são fechadas depois disso (s)
+            'max_idle': int(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+            # Espera por uma conexão livre antes de falhar (s)
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Com REDIS_URL o cache é compartilhado entre os workers; sem ele, cada
+# processo tem o seu (LocMem)
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Agenda diária por profissional (medical_consultation.schedule)
+SCHEDULE_CACHE_TIMEOUT = int(os.environ.get('SCHEDULE_CACHE_TIMEOUT', 60 * 60))
+
+
+# Compressão das respostas (app/compression.py)
+# Codificações em ordem de preferência (zstd e brotli só se instalados) e
+# nível de cada uma: mais alto comprime mais e gasta mais CPU
+
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_ENCODINGS = os.environ.get('COMPRESSION_ENCODINGS', 'zstd,br,gzip').split(',')
+COMPRESSION_LEVELS = {
+    'gzip': int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6)),
+    'br': int(os.environ.get('COMPRESSION_BROTLI_LEVEL', 4)),
+    'zstd': int(os.environ.get('COMPRESSION_ZSTD_LEVEL', 3)),
+}
+
+
+# Métricas (app/metrics.py)
+# Cada worker grava um snapshot em METRICS_DIR a cada METRICS_FLUSH_INTERVAL
+# segundos; /metrics soma todos e só responde com METRICS_TOKEN definido
+
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'lacrei-saude-metrics'))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -144,16 +226,17 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson quando instalado; sem ele, os mesmos do DRF
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'app.renderers.ORJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'app.parsers.ORJSONParser',
     ],
 }
 
@@ -170,8 +253,20 @@ SIMPLE_JWT = {
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    # Refresh token usado na rotação é revogado (ver authentication.revocation)
+    'TOKEN_REFRESH_SERIALIZER': 'authentication.serializers.RevokingTokenRefreshSerializer',
+    'TOKEN_VERIFY_SERIALIZER': 'authentication.serializers.RevokingTokenVerifySerializer',
 }
 
+# Usuário do token em cache no processo (0 desliga e busca no banco a cada
+# requisição); alterações no usuário invalidam o cache do processo que as fez
+JWT_USER_CACHE_TTL = int(os.environ.get('JWT_USER_CACHE_TTL', 60))
+JWT_USER_CACHE_SIZE = int(os.environ.get('JWT_USER_CACHE_SIZE', 10000))
+
+# Intervalo (segundos) entre as limpezas automáticas dos tokens revogados já
+# expirados, na memória e na tabela; `manage.py purge_revoked_tokens` faz o mesmo
+REVOKED_TOKEN_PURGE_INTERVAL = int(os.environ.get('REVOKED_TOKEN_PURGE_INTERVAL', 60 * 60))
+
 # CORS CONFIGURADO
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # React/Frontend
@@ -213,6 +308,13 @@ X_FRAME_OPTIONS = 'DENY'
 SECURE_REFERRER_POLICY = 'strict-origin-when-cross-origin'
 
 # LOGS DE ACESSO E ERROS
+# Todos os processos do gunicorn escrevem nos mesmos arquivos, então quem
+# gira é o logrotate (logrotate.conf); o WatchedFileHandler reabre o arquivo
+# quando ele é movido. LOG_INFO_SAMPLE_RATE (0 a 1) grava só essa fração dos
+# INFO da API, mantendo avisos e erros
+
+LOG_INFO_SAMPLE_RATE = float(os.environ.get('LOG_INFO_SAMPLE_RATE', 1.0))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -226,16 +328,22 @@ LOGGING = {
             'style': '{',
         },
     },
+    'filters': {
+        'sample_info': {
+            '()': 'app.log_handlers.SamplingFilter',
+            'rate': LOG_INFO_SAMPLE_RATE,
+        },
+    },
     'handlers': {
         'file_error': {
             'level': 'ERROR',
-            'class': 'logging.FileHandler',
+            'class': 'logging.handlers.WatchedFileHandler',
             'filename': BASE_DIR / 'logs' / 'errors.log',
             'formatter': 'verbose',
         },
         'file_access': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'class': 'logging.handlers.WatchedFileHandler',
             'filename': BASE_DIR / 'logs' / 'access.log',
             'formatter': 'verbose',
         },
@@ -244,15 +352,26 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
         },
+        # A requisição só enfileira; uma thread por processo grava nos
+        # handlers acima (app/log_handlers.py)
+        'queue_api': {
+            '()': 'app.log_handlers.queue_handler',
+            'handlers': ['cfg://handlers.file_access', 'cfg://handlers.file_error', 'cfg://handlers.console'],
+            'filters': ['sample_info'],
+        },
+        'queue_django': {
+            '()': 'app.log_handlers.queue_handler',
+            'handlers': ['cfg://handlers.file_error', 'cfg://handlers.console'],
+        },
     },
     'loggers': {
         'django': {
-            'handlers': ['file_error', 'console'],
+            'handlers': ['queue_django'],
             'level': 'INFO',
             'propagate': True,
         },
         'api': {
-            'handlers': ['file_access', 'file_error', 'console'],
+            'handlers': ['queue_api'],
             'level': 'INFO',
             'propagate': False,
         },
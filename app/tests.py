@@ -0,0 +1,450 @@
+import gzip
+import json
+import logging
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from io import BytesIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.signals import request_finished
+from django.db import close_old_connections
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone as django_timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from healthcare_workers.models import HealthcareWorker
+from medical_consultation.models import MedicalConsultation
+from . import log_handlers
+from .benchmark import Benchmark, compare, run_benchmarks
+from .compression import brotli, choose_encoding, zstandard
+from .log_handlers import SamplingFilter, queue_handler
+from .metrics import ARCHIVE_FILE, MetricsMiddleware, collect, registry
+from .parsers import ORJSONParser
+from .renderers import ORJSONRenderer
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+
+
+class QueueLoggingTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.target = ListHandler()
+        self.handler = queue_handler([self.target])
+        self.logger = logging.getLogger('tests.queue_logging')
+        self.logger.propagate = False
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        if self.handler in log_handlers._queue_handlers:
+            log_handlers._queue_handlers.remove(self.handler)
+            self.handler.listener.stop()
+
+    def stop(self):
+        log_handlers._queue_handlers.remove(self.handler)
+        self.handler.listener.stop()
+
+    def test_records_are_written_by_listener(self):
+        """Testa que os registros enfileirados são gravados ao parar o listener"""
+        for index in range(100):
+            self.logger.warning('Consulta %s criada', index)
+
+        try:
+            raise ValueError('falha')
+        except ValueError:
+            self.logger.exception('Erro ao criar consulta %s', 7)
+
+        self.stop()
+        self.assertEqual(len(self.target.messages), 101)
+        self.assertEqual(self.target.messages[0], 'Consulta 0 criada')
+        self.assertIn('Erro ao criar consulta 7', self.target.messages[-1])
+        self.assertIn('ValueError: falha', self.target.messages[-1])
+
+    def test_listener_restarts_after_fork(self):
+        """Testa que o worker recriado após o fork grava pelo listener novo"""
+        first_listener = self.handler.listener
+        self.logger.warning('Antes do fork')
+
+        # O que o worker faz depois do fork (os.register_at_fork), só com
+        # este handler para não mexer nos do LOGGING
+        self.stop()
+        with mock.patch.object(log_handlers, '_queue_handlers', [self.handler]):
+            log_handlers._restart_listeners()
+            self.assertIsNot(self.handler.listener, first_listener)
+            self.assertIs(self.handler.listener.queue, self.handler.queue)
+            self.logger.warning('Depois do fork')
+
+            log_handlers.stop_listeners()
+            self.assertFalse(self.handler.listening)
+            log_handlers.stop_listeners()
+        self.assertEqual(self.target.messages, ['Antes do fork', 'Depois do fork'])
+
+    def test_sampling_keeps_warnings(self):
+        """Testa que a amostragem descarta INFO mas mantém avisos"""
+        self.handler.addFilter(SamplingFilter(rate=0))
+        self.logger.setLevel(logging.INFO)
+
+        self.logger.info('Usuário %s acessou lista', 1)
+        self.logger.warning('Busca muito longa rejeitada')
+
+        self.stop()
+        self.assertEqual(self.target.messages, ['Busca muito longa rejeitada'])
+
+
+class MetricsTestCase(APITestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.metrics_dir = Path(directory.name)
+
+        settings_override = override_settings(METRICS_DIR=directory.name, METRICS_TOKEN='segredo')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        registry.reset()
+
+        self.user = User.objects.create_user(username='akeenathon', password='djangomaster')
+        self.metrics_url = reverse('metrics')
+
+    def scrape(self):
+        response = self.client.get(self.metrics_url, HTTP_AUTHORIZATION='Bearer segredo')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_metrics_requires_token(self):
+        """Testa que /metrics exige o token configurado"""
+        self.assertEqual(self.client.get(self.metrics_url).status_code, 401)
+
+        response = self.client.get(self.metrics_url, HTTP_AUTHORIZATION='Bearer outro')
+        self.assertEqual(response.status_code, 401)
+
+        with override_settings(METRICS_TOKEN=''):
+            response = self.client.get(self.metrics_url, HTTP_AUTHORIZATION='Bearer segredo')
+        self.assertEqual(response.status_code, 404)
+
+    def test_records_route_status_and_queries(self):
+        """Testa latência, status e queries SQL por rota"""
+        self.client.force_authenticate(self.user)
+        self.client.get(reverse('healthcareworkers_list'))
+        self.client.get(reverse('healthcareworkers_detail', kwargs={'pk': 999}))
+        self.client.force_authenticate(None)
+
+        body = self.scrape()
+        self.assertIn(
+            'http_requests_total{method="GET",route="api/v1/healthcareworker/",status="200"} 1', body
+        )
+        # O id não vira label; a série é do padrão da rota
+        self.assertIn(
+            'http_requests_total{method="GET",route="api/v1/healthcareworker/<int:pk>/",status="404"} 1', body
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{method="GET",route="api/v1/healthcareworker/"} 1', body
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{method="GET",route="api/v1/healthcareworker/",le="+Inf"} 1', body
+        )
+
+        queries = next(
+            line for line in body.splitlines()
+            if line.startswith('db_queries_per_request_sum{method="GET",route="api/v1/healthcareworker/"}')
+        )
+        self.assertGreaterEqual(float(queries.split()[-1]), 1)
+
+    def test_records_streaming_response(self):
+        """Testa que a exportação em streaming é medida até o fim do envio"""
+        worker = HealthcareWorker.objects.create(
+            name='Dr. João Silva', profession='Clínico Geral', address='Rua A, 1', phone='33999190106'
+        )
+        for hour in range(3):
+            MedicalConsultation.objects.create(
+                patient_name='Maria Santos', age=30, healthcare_worker=worker,
+                consultation_date=django_timezone.now() + timedelta(days=1, hours=hour),
+            )
+        export_url = reverse('medicalconsultation_export')
+        route = 'route="api/v1/medicalconsultation/export/"'
+
+        # Autenticação sem banco: as queries medidas são as da geração do corpo
+        self.client.force_authenticate(self.user)
+        body = b''.join(self.client.get(export_url).streaming_content)
+        self.client.force_authenticate(None)
+
+        metrics = {
+            line.split()[0]: float(line.split()[-1]) for line in self.scrape().splitlines()
+            if route in line and not line.startswith('#')
+        }
+        self.assertEqual(metrics[f'http_request_duration_seconds_count{{method="GET",{route}}}'], 1)
+        self.assertEqual(metrics[f'http_response_size_bytes_sum{{method="GET",{route}}}'], len(body))
+        self.assertGreaterEqual(metrics[f'db_queries_per_request_sum{{method="GET",{route}}}'], 1)
+
+        # Conexão encerrada no meio do envio: registrada uma vez só, com o que saiu
+        middleware = MetricsMiddleware(lambda request: StreamingHttpResponse(iter([b'abc', b'de'])))
+        response = middleware(RequestFactory().get('/'))
+        self.assertEqual(next(iter(response.streaming_content)), b'abc')
+        request_finished.disconnect(close_old_connections)
+        try:
+            response.close()
+            response.close()
+        finally:
+            request_finished.connect(close_old_connections)
+        self.assertEqual(registry.values['http_response_size_bytes'][('GET', 'unmatched')][1:], [3, 1])
+
+    def test_aggregates_finished_processes(self):
+        """Testa que snapshots de processos encerrados são somados e arquivados"""
+        # pid acima do pid_max padrão do Linux: processo inexistente
+        snapshot = self.metrics_dir / '4194305-abcdef12.json'
+        snapshot.write_text(json.dumps({
+            'http_requests_total': [[['GET', 'api/v1/medicalconsultation/', '200'], 3]],
+        }))
+
+        for _ in range(2):
+            total = collect()
+            self.assertEqual(
+                total['http_requests_total'][('GET', 'api/v1/medicalconsultation/', '200')], 3
+            )
+
+        self.assertFalse(snapshot.exists())
+        self.assertTrue((self.metrics_dir / ARCHIVE_FILE).exists())
+
+    def test_concurrent_flushes(self):
+        """Testa que gravações simultâneas não colidem no arquivo temporário"""
+        errors = []
+
+        def flush():
+            try:
+                for _ in range(20):
+                    registry.flush()
+                    registry.flush(interval=0)
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=flush) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual([path.name for path in self.metrics_dir.iterdir()], [registry.file_name])
+
+    def test_unwritable_metrics_dir(self):
+        """Testa que falha ao gravar as métricas não derruba a requisição"""
+        blocker = self.metrics_dir / 'arquivo'
+        blocker.write_text('')
+        self.client.force_authenticate(self.user)
+        with override_settings(METRICS_DIR=str(blocker / 'metrics'), METRICS_FLUSH_INTERVAL=0):
+            with self.assertLogs('api', level='ERROR') as logs:
+                response = self.client.get(reverse('healthcareworkers_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Falha ao gravar as métricas', logs.output[-1])
+
+
+class BenchmarkTestCase(TestCase):
+
+    def test_run_benchmarks(self):
+        """Testa que os benchmarks dos apps rodam e geram o relatório"""
+        bench = Benchmark(sizes=(150,), repeat=1, min_time=0)
+        logging.disable(logging.INFO)
+        try:
+            report = run_benchmarks(bench)
+        finally:
+            logging.disable(logging.NOTSET)
+
+        self.assertEqual(report['meta']['sizes'], [150])
+        for name in (
+            'authentication.jwt.authenticate',
+            'healthcare_workers.serializer.validate',
+            'healthcare_workers.list.last_page[150]',
+            'medical_consultation.serializer.serialize',
+            'medical_consultation.detail[150]',
+        ):
+            self.assertGreater(report['results'][name]['seconds'], 0)
+
+    def test_compare_flags_regressions(self):
+        """Testa a comparação com o baseline e o limite de regressão"""
+        baseline = {'results': {
+            'a': {'seconds': 1.0},
+            'b': {'seconds': 1.0},
+        }}
+        current = {'results': {
+            'a': {'seconds': 1.1},
+            'b': {'seconds': 1.5},
+            'c': {'seconds': 2.0},
+        }}
+
+        rows, regressions = compare(current, baseline, threshold=0.2)
+        self.assertEqual(regressions, ['b'])
+        self.assertEqual([row[0] for row in rows], ['a', 'b', 'c'])
+        self.assertIsNone(rows[2][3])
+
+
+class ORJSONTestCase(SimpleTestCase):
+    data = {
+        'nome': 'João\u2028Silva',
+        1: [Decimal('1.10'), 0.1, None, True],
+        'data': datetime(2030, 1, 7, 8, 30, 0, 123456, tzinfo=timezone.utc),
+        'duracao': timedelta(minutes=30),
+        'grande': 2 ** 70,
+    }
+
+    def test_renderer_matches_drf(self):
+        """Testa que o renderer gera os mesmos bytes do JSONRenderer do DRF"""
+        for data in (self.data, [self.data], {}, 'texto'):
+            self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+        indented = 'application/json; indent=2'
+        self.assertEqual(
+            ORJSONRenderer().render(self.data, indented), JSONRenderer().render(self.data, indented)
+        )
+
+        # NaN e infinito: com STRICT_JSON o DRF recusa; sem ele, grava NaN/Infinity
+        non_finite = (
+            {'valor': float('nan')},
+            [{'itens': (1, float('inf'))}],
+            {'a': {'b': [float('-inf')]}, 'c': None},
+            {'preco': Decimal('NaN')},
+        )
+        for data in non_finite:
+            with self.assertRaises(ValueError):
+                JSONRenderer().render(data)
+            with self.assertRaises(ValueError):
+                ORJSONRenderer().render(data)
+            with mock.patch.object(JSONRenderer, 'strict', False):
+                self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_parser_matches_drf(self):
+        """Testa que o parser lê o mesmo que o JSONParser do DRF e recusa JSON inválido"""
+        body = '{"nome": "Jo\\u00e3o", "itens": [1, 2.5, null]}'.encode()
+        self.assertEqual(ORJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+
+        for body in (b'{', b'[NaN]', b''):
+            with self.assertRaises(ParseError):
+                ORJSONParser().parse(BytesIO(body))
+
+    def test_fallback_without_orjson(self):
+        """Testa que sem o orjson os mesmos resultados vêm das classes do DRF"""
+        with mock.patch('app.renderers.orjson', None), mock.patch('app.parsers.orjson', None):
+            self.assertEqual(ORJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+            self.assertEqual(ORJSONParser().parse(BytesIO(b'{"a": 1}')), {'a': 1})
+
+
+class CompressionTestCase(APITestCase):
+
+    def setUp(self):
+        user = User.objects.create_user(username='akeenathon', password='djangomaster')
+        self.client.force_authenticate(user)
+        worker = HealthcareWorker.objects.create(
+            name='Dr. João Silva', profession='Clínico Geral', address='Rua das Flores, 123', phone='33999190106'
+        )
+        HealthcareWorker.objects.bulk_create([
+            HealthcareWorker(name=f'Dra. Ana {index}', profession='Cardiologista', address='Rua A, 1', phone='33999190107')
+            for index in range(20)
+        ])
+        first_slot = django_timezone.now().replace(microsecond=0) + timedelta(days=1)
+        MedicalConsultation.objects.bulk_create([
+            MedicalConsultation(
+                patient_name='Maria Santos', age=30, healthcare_worker=worker,
+                consultation_date=first_slot + timedelta(hours=index)
+            )
+            for index in range(50)
+        ])
+        self.list_url = reverse('healthcareworkers_list')
+
+    def test_choose_encoding(self):
+        """Testa a negociação pelo Accept-Encoding (q, `*` e preferência do servidor)"""
+        encodings = ['zstd', 'br', 'gzip']
+        self.assertEqual(choose_encoding('gzip, deflate, br, zstd', encodings), 'zstd')
+        self.assertEqual(choose_encoding('gzip;q=1.0, br;q=0.5', encodings), 'gzip')
+        self.assertEqual(choose_encoding('*;q=0.1, zstd;q=0', encodings), 'br')
+        self.assertEqual(choose_encoding('gzip;q=0, identity', encodings), None)
+        self.assertEqual(choose_encoding('', encodings), None)
+        self.assertEqual(choose_encoding('br;q=abc, gzip', encodings), 'gzip')
+
+    def test_compressed_list_matches_plain(self):
+        """Testa que cada codificação instalada devolve o mesmo JSON, comprimido"""
+        plain = self.client.get(self.list_url)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        decompress = {'gzip': gzip.decompress}
+        if brotli is not None:
+            decompress['br'] = brotli.decompress
+        if zstandard is not None:
+            decompress['zstd'] = zstandard.ZstdDecompressor().decompress
+
+        for encoding, function in decompress.items():
+            response = self.client.get(self.list_url, HTTP_ACCEPT_ENCODING=encoding)
+            self.assertEqual(response['Content-Encoding'], encoding)
+            self.assertLess(len(response.content), len(plain.content))
+            self.assertEqual(int(response['Content-Length']), len(response.content))
+            self.assertEqual(function(response.content), plain.content)
+
+    @override_settings(COMPRESSION_MIN_SIZE=1024 * 1024)
+    def test_small_response_is_not_compressed(self):
+        """Testa que respostas abaixo do tamanho mínimo não são comprimidas"""
+        response = self.client.get(self.list_url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+    @override_settings(COMPRESSION_MIN_SIZE=0)
+    def test_html_is_not_compressed(self):
+        """Testa que páginas HTML com token CSRF (admin) não são comprimidas"""
+        response = self.client.get('/admin/login/', HTTP_ACCEPT_ENCODING='gzip, br, zstd')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'csrfmiddlewaretoken', response.content)
+        self.assertNotIn('Content-Encoding', response)
+
+        response = self.client.get(
+            reverse('medicalconsultation_export'), {'format': 'csv'}, HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_compressed_stream(self):
+        """Testa que a exportação em streaming sai comprimida e íntegra"""
+        plain = b''.join(self.client.get(reverse('medicalconsultation_export')).streaming_content)
+
+        with mock.patch('app.compression.STREAM_FLUSH_SIZE', 1024):
+            response = self.client.get(reverse('medicalconsultation_export'), HTTP_ACCEPT_ENCODING='gzip')
+            chunks = list(response.streaming_content)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertGreater(len(chunks), 2)
+        self.assertEqual(gzip.decompress(b''.join(chunks)), plain)
+
+    def test_compressed_etag_names_the_coding(self):
+        """Testa que o ETag comprimido continua forte e o 304 devolve o mesmo validador"""
+        worker = HealthcareWorker.objects.first()
+        sync_url = reverse('healthcareworkers_detail', kwargs={'pk': worker.pk})
+        async_url = reverse('healthcareworkers_async_detail', kwargs={'pk': worker.pk})
+
+        plain_etag = self.client.get(sync_url)['ETag']
+        with override_settings(COMPRESSION_MIN_SIZE=0):
+            for url in (sync_url, async_url):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+                self.assertEqual(response['ETag'], f'{plain_etag[:-1]}-gzip"')
+
+                not_modified = self.client.get(
+                    url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(not_modified.status_code, 304)
+                self.assertEqual(not_modified['ETag'], response['ETag'])
+                self.assertIn('Accept-Encoding', not_modified['Vary'])
+
+            # Sem compressão, o ETag e o 304 são os da view
+            not_modified = self.client.get(sync_url, HTTP_IF_NONE_MATCH=plain_etag)
+            self.assertEqual(not_modified.status_code, 304)
+            self.assertEqual(not_modified['ETag'], plain_etag)
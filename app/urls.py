@@ -3,9 +3,11 @@ from django.urls import path
 from django.urls import include
 from django.conf.urls.static import static
 from django.conf import settings
+from app.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
 
     path('api/v1/', include('authentication.urls')),
     path('api/v1/', include('healthcare_workers.urls')),
@@ -0,0 +1,116 @@
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class UserCache:
+    """
+    Usuários por id, em memória do processo, com validade (TTL) e limite de
+    tamanho (descarta o usado há mais tempo).
+
+    Cada worker do gunicorn tem o seu. Cada entrada guarda a versão do
+    usuário no cache compartilhado (ver `user_version`) lida quando ela foi
+    criada, para os outros workers perceberem a invalidação.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, user, version = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user, version
+
+    def set(self, user_id, user, version, ttl):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + ttl, user, version)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(settings.JWT_USER_CACHE_SIZE)
+
+
+def user_version_key(user_id):
+    return f'jwt_user_version:{user_id}'
+
+
+def user_version(user_id):
+    """Versão atual do usuário no cache compartilhado (None se nunca mudou)"""
+    return cache.get(user_version_key(user_id))
+
+
+def invalidate_user(user_id):
+    """
+    Tira o usuário do cache deste processo e muda a sua versão no cache
+    compartilhado, o que invalida as cópias dos outros workers. A versão só
+    precisa durar o TTL das entradas.
+    """
+    user_cache.invalidate(user_id)
+    cache.set(user_version_key(user_id), uuid.uuid4().hex, max(settings.JWT_USER_CACHE_TTL, 1))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que guarda o usuário do token por JWT_USER_CACHE_TTL
+    segundos, evitando a busca em auth_user a cada requisição.
+
+    Salvar ou remover o usuário (inclusive desativá-lo ou trocar a senha)
+    tira-o do cache em todos os workers que usam o mesmo CACHES; com
+    JWT_USER_CACHE_TTL = 0 o comportamento é o do JWTAuthentication.
+
+    O cache guarda uma cópia do usuário e cada requisição recebe outra cópia,
+    então alterações em `request.user` não passam para outras requisições.
+    """
+
+    def get_user(self, validated_token):
+        ttl = settings.JWT_USER_CACHE_TTL
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if ttl <= 0 or user_id is None:
+            return super().get_user(validated_token)
+
+        version = user_version(user_id)
+        entry = user_cache.get(user_id)
+        if entry is None or entry[1] != version:
+            # Usuário inexistente ou inativo levanta exceção e não entra no cache.
+            # A versão é lida antes da busca: uma alteração no meio muda a versão
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, copy.copy(user), version, ttl)
+            return user
+
+        user = copy.copy(entry[0])
+
+        # Token emitido antes da troca de senha não vale, mesmo com o usuário em cache
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed('A senha do usuário foi alterada.', code='password_changed')
+
+        return user
@@ -0,0 +1,44 @@
+from django.contrib.auth.models import User
+from django.test import RequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import CachedJWTAuthentication, user_cache
+from .models import RevokedToken
+from .revocation import revoke, revoked_tokens
+
+
+def bench_jwt(bench):
+    user, _ = User.objects.get_or_create(username='benchmark')
+    token = str(RefreshToken.for_user(user).access_token)
+    request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    # Custo de autenticar cada requisição: validar a assinatura e buscar o usuário
+    authentication = JWTAuthentication()
+    bench.measure(
+        'authentication.jwt.authenticate',
+        lambda: authentication.authenticate(request)
+    )
+
+    # Mesmo token com o usuário em cache (só a assinatura é validada)
+    user_cache.clear()
+    cached_authentication = CachedJWTAuthentication()
+    bench.measure(
+        'authentication.jwt.authenticate_cached',
+        lambda: cached_authentication.authenticate(request)
+    )
+
+
+def bench_revocation(bench):
+    user, _ = User.objects.get_or_create(username='benchmark')
+    refresh = RefreshToken.for_user(user)
+    jti, exp = refresh['jti'], refresh['exp']
+    revoked_tokens.clear()
+    revoke(jti, exp)
+
+    # Verificação de um refresh token: memória do processo x consulta à tabela
+    bench.measure('authentication.revocation.check_memory', lambda: jti in revoked_tokens)
+    bench.measure(
+        'authentication.revocation.check_db',
+        lambda: RevokedToken.objects.filter(jti=jti).exists()
+    )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from authentication.revocation import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Remove da tabela de tokens revogados os que já expiraram.'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} tokens revogados expirados removidos'))
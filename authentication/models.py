@@ -0,0 +1,12 @@
+from django.db import models
+
+
+class RevokedToken(models.Model):
+    # jti do refresh token já usado na rotação; único para que duas
+    # renovações simultâneas com o mesmo token não passem as duas
+    jti = models.CharField(max_length=255, unique=True)
+    # Depois disso o token já é rejeitado pela expiração e a linha pode sair
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,91 @@
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import RevokedToken
+
+
+class RevocationStore:
+    """
+    Tokens revogados: jti -> expiração (timestamp), em memória do processo.
+
+    Só guarda o que este processo revogou ou viu ser rejeitado; quem decide é
+    a tabela RevokedToken (ver revoke). Entradas saem sozinhas quando o token
+    expira, então o tamanho é limitado pelos tokens ainda válidos.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._next_cleanup = 0
+
+    def __contains__(self, jti):
+        expires_at = self._entries.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._entries[jti] = expires_at
+            now = time.time()
+            if now >= self._next_cleanup:
+                self._entries = {key: exp for key, exp in self._entries.items() if exp > now}
+                self._next_cleanup = now + settings.REVOKED_TOKEN_PURGE_INTERVAL
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+revoked_tokens = RevocationStore()
+
+_next_purge = 0
+
+
+def is_revoked(jti):
+    """Memória primeiro; a tabela só é consultada se o jti não estiver lá"""
+    if jti in revoked_tokens:
+        return True
+    return RevokedToken.objects.filter(jti=jti, expires_at__gt=timezone.now()).exists()
+
+
+def revoke(jti, exp):
+    """
+    Revoga o token; retorna False se ele já estava revogado.
+
+    O INSERT na coluna única é a verificação e a revogação ao mesmo tempo: um
+    token reutilizado (em qualquer processo) esbarra na constraint, sem uma
+    consulta antes.
+    """
+    if jti in revoked_tokens:
+        return False
+
+    expires_at = datetime.fromtimestamp(exp, tz=dt_timezone.utc)
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+        revoked = True
+    except IntegrityError:
+        revoked = False
+
+    revoked_tokens.add(jti, exp)
+    _purge_periodically()
+    return revoked
+
+
+def purge_expired():
+    """Remove da tabela os tokens já expirados; retorna quantos saíram"""
+    deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+def _purge_periodically():
+    global _next_purge
+    now = time.time()
+    if now < _next_purge:
+        return
+    _next_purge = now + settings.REVOKED_TOKEN_PURGE_INTERVAL
+    purge_expired()
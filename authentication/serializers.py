@@ -0,0 +1,21 @@
+from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer, TokenVerifySerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+
+from .revocation import is_revoked
+from .tokens import RevocableRefreshToken
+
+
+class RevokingTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RevocableRefreshToken
+
+
+class RevokingTokenVerifySerializer(TokenVerifySerializer):
+
+    def validate(self, attrs):
+        token = UntypedToken(attrs['token'])
+        jti = token.get(api_settings.JTI_CLAIM)
+        if jti and is_revoked(jti):
+            raise serializers.ValidationError('Token revogado.')
+        return {}
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
+
+from .authentication import invalidate_user
+
+
+def _invalidate(user_id):
+    invalidate_user(user_id)
+    # De novo após o commit, para não manter uma cópia lida no meio da transação
+    transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    _invalidate(getattr(instance, api_settings.USER_ID_FIELD))
@@ -0,0 +1,156 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import CachedJWTAuthentication, user_cache, user_version_key
+from .models import RevokedToken
+from .revocation import revoked_tokens
+
+
+class CachedJWTAuthenticationTestCase(APITestCase):
+
+    def setUp(self):
+        user_cache.clear()
+        cache.clear()
+        self.user = User.objects.create_user(username='akeenathon', password='djangomaster')
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.url = reverse('healthcareworkers_list')
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [query for query in queries if 'auth_user' in query['sql']]
+
+    def test_user_is_cached_between_requests(self):
+        """Testa que só a primeira requisição busca o usuário no banco"""
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.user_queries(), [])
+
+    def test_deactivated_user_is_rejected(self):
+        """Testa que desativar o usuário tira-o do cache"""
+        self.user_queries()
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_deactivated_in_other_worker_is_rejected(self):
+        """Testa que a invalidação feita em outro processo vale pelo cache compartilhado"""
+        self.user_queries()
+        # Outro worker desativou o usuário: o banco e a versão mudam, o cache
+        # deste processo continua com a cópia antiga
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        cache.set(user_version_key(self.user.pk), 'outro-worker')
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_each_request_gets_its_own_user(self):
+        """Testa que alterar o usuário de uma requisição não afeta as outras"""
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        authentication = CachedJWTAuthentication()
+
+        first, _ = authentication.authenticate(request)
+        first.first_name = 'Alterado'
+        first.last_login = timezone.now()
+        second, _ = authentication.authenticate(request)
+        third, _ = authentication.authenticate(request)
+
+        self.assertIsNot(second, third)
+        self.assertEqual(second.first_name, '')
+        self.assertIsNone(second.last_login)
+        second.first_name = 'Outro'
+        self.assertEqual(third.first_name, '')
+
+    def test_deleted_user_is_rejected(self):
+        """Testa que remover o usuário tira-o do cache"""
+        self.user_queries()
+        self.user.delete()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(JWT_USER_CACHE_TTL=0)
+    def test_cache_disabled(self):
+        """Testa que com TTL zero o usuário é buscado em toda requisição"""
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(len(self.user_queries()), 1)
+
+
+class TokenRevocationTestCase(APITestCase):
+
+    def setUp(self):
+        revoked_tokens.clear()
+        self.user = User.objects.create_user(username='akeenathon', password='djangomaster')
+        self.refresh = str(RefreshToken.for_user(self.user))
+        self.refresh_url = reverse('token_refresh')
+        self.verify_url = reverse('token_verify')
+
+    def refresh_token(self, token):
+        return self.client.post(self.refresh_url, {'refresh': token}, format='json')
+
+    def test_rotated_refresh_token_is_revoked(self):
+        """Testa que o refresh token só pode ser usado uma vez"""
+        response = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rotated = response.data['refresh']
+
+        response = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.refresh_token(rotated)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_revoked_token_without_memory(self):
+        """Testa que outro processo (sem o jti em memória) também rejeita o token"""
+        self.refresh_token(self.refresh)
+        revoked_tokens.clear()
+
+        response = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(RevokedToken.objects.count(), 1)
+
+    def test_revoked_token_rejected_without_queries(self):
+        """Testa que token revogado por este processo é rejeitado sem ir ao banco"""
+        self.refresh_token(self.refresh)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_verify_revoked_token(self):
+        """Testa que o verify recusa token revogado"""
+        response = self.client.post(self.verify_url, {'token': self.refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.refresh_token(self.refresh)
+        revoked_tokens.clear()
+        response = self.client.post(self.verify_url, {'token': self.refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_purge_revoked_tokens(self):
+        """Testa que o comando remove só os tokens já expirados"""
+        now = timezone.now()
+        RevokedToken.objects.create(jti='expirado', expires_at=now - timedelta(minutes=1))
+        RevokedToken.objects.create(jti='valido', expires_at=now + timedelta(minutes=1))
+
+        out = StringIO()
+        call_command('purge_revoked_tokens', stdout=out)
+
+        self.assertIn('1 tokens', out.getvalue())
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['valido'])
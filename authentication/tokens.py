@@ -0,0 +1,23 @@
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .revocation import revoke, revoked_tokens
+
+
+class RevocableRefreshToken(RefreshToken):
+    """Refresh token que, com BLACKLIST_AFTER_ROTATION, só pode ser renovado uma vez"""
+
+    def verify(self):
+        super().verify()
+        # Rejeição rápida, sem banco, de token que este processo já revogou
+        if self.payload.get(api_settings.JTI_CLAIM) in revoked_tokens:
+            raise TokenError('Token revogado.')
+
+    def blacklist(self):
+        if not revoke(self.payload[api_settings.JTI_CLAIM], self.payload['exp']):
+            raise TokenError('Token revogado.')
+
+    def outstand(self):
+        # Só os tokens revogados são guardados; não há lista de emitidos
+        return None
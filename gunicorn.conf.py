@@ -0,0 +1,22 @@
+# Lido automaticamente pelo gunicorn (diretório de trabalho do container)
+import os
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+# Os mesmos valores dimensionam o pool de conexões do banco (ver settings)
+workers = int(os.environ.get('GUNICORN_WORKERS', 3))
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+timeout = 120
+max_requests = 1000
+max_requests_jitter = 100
+preload_app = True
+
+
+def worker_exit(server, worker):
+    # O logging usa filas com escrita em background; antes do worker sair,
+    # o que ainda está na fila é gravado, assim como o último snapshot das
+    # métricas do processo
+    from app.log_handlers import stop_listeners
+    from app.metrics import registry
+    stop_listeners()
+    registry.flush()
@@ -0,0 +1,87 @@
+import re
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from medical_consultation.models import MedicalConsultation
+from medical_consultation.serializers import BUSINESS_HOURS_END, BUSINESS_HOURS_START
+
+
+SLOT_PATTERN = re.compile(r'^(?P<amount>\d+)(?P<unit>[mh]?)$')
+MIN_SLOT = timedelta(minutes=5)
+MAX_SLOT = timedelta(hours=4)
+
+
+def parse_slot(value):
+    """'30m', '1h' ou '45' (minutos) -> timedelta; None se inválido"""
+    match = SLOT_PATTERN.match(value.strip().lower())
+    if not match:
+        return None
+
+    amount = int(match.group('amount'))
+    if match.group('unit') == 'h':
+        slot = timedelta(hours=amount)
+    else:
+        slot = timedelta(minutes=amount)
+
+    if slot < MIN_SLOT or slot > MAX_SLOT:
+        return None
+    return slot
+
+
+def candidate_slots(start, end, slot):
+    """Inícios de horário dentro do expediente em [start, end), em ordem"""
+    now = timezone.now()
+    day = timezone.localtime(start).date()
+    last_day = timezone.localtime(end).date()
+
+    while day <= last_day:
+        opening = timezone.make_aware(datetime.combine(day, time(BUSINESS_HOURS_START)))
+        closing = timezone.make_aware(datetime.combine(day, time(BUSINESS_HOURS_END)))
+
+        current = opening
+        # Consultas podem começar até 18h em ponto
+        while current <= closing:
+            if start <= current < end and current >= now:
+                yield current
+            current += slot
+        day += timedelta(days=1)
+
+
+def free_slots(worker_ids, start, end, slot):
+    """
+    Horários livres por profissional: {worker_id: [datetime, ...]}.
+
+    Uma única query por faixa no índice (healthcare_worker, consultation_date)
+    traz as consultas de todos os profissionais já ordenadas; depois uma
+    varredura compara a grade de horários com as consultas de cada um. Um
+    horário está ocupado se alguma consulta começa dentro dele.
+    """
+    candidates = list(candidate_slots(start, end, slot))
+
+    booked = {worker_id: [] for worker_id in worker_ids}
+    rows = MedicalConsultation.objects.filter(
+        healthcare_worker_id__in=worker_ids,
+        consultation_date__gte=start,
+        consultation_date__lt=end + slot,
+    ).order_by('healthcare_worker_id', 'consultation_date').values_list(
+        'healthcare_worker_id', 'consultation_date'
+    )
+    for worker_id, consultation_date in rows:
+        booked[worker_id].append(consultation_date)
+
+    result = {}
+    for worker_id in worker_ids:
+        consultations = booked[worker_id]
+        position = 0
+        slots = []
+        for current in candidates:
+            # Descarta consultas que começam antes deste horário
+            while position < len(consultations) and consultations[position] < current:
+                position += 1
+            if position < len(consultations) and consultations[position] < current + slot:
+                continue
+            slots.append(current)
+        result[worker_id] = slots
+
+    return result
@@ -0,0 +1,144 @@
+import random
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, connection
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from app.pagination import encode_position
+from app.rows import compile_row_encoder
+from medical_consultation.seeding import WORKER_COLUMNS, insert_rows, worker_rows
+from .models import HealthcareWorker
+from .serializers import HealthcareWorkerSerializer
+from .views import HealthcareWorkersListCreateView, HealthcareWorkersRetrieveUpdateDestroyView
+
+
+WORKER_DATA = {
+    'name': 'dr. joão silva',
+    'profession': 'clínico geral',
+    'address': 'Rua das Flores, 123',
+    'phone': '(33) 99919-0106',
+}
+PAGE_SIZE = 100
+
+
+def seed_workers(count):
+    """Completa a tabela até `count` profissionais (os tamanhos vêm em ordem crescente)"""
+    existing = HealthcareWorker.objects.count()
+    rows = worker_rows(random.Random(existing), max(count - existing, 0), start=existing)
+    insert_rows(HealthcareWorker, WORKER_COLUMNS, rows, batch_size=10000)
+
+
+def bench_serializer(bench):
+    bench.measure(
+        'healthcare_workers.serializer.validate',
+        lambda: HealthcareWorkerSerializer(data=WORKER_DATA).is_valid(raise_exception=True)
+    )
+
+    instances = [HealthcareWorker(id=index, **WORKER_DATA) for index in range(1000)]
+    bench.measure(
+        'healthcare_workers.serializer.serialize',
+        lambda: HealthcareWorkerSerializer(instances, many=True).data,
+        ops=len(instances)
+    )
+
+    encoder = compile_row_encoder(HealthcareWorkerSerializer)
+    rows = [{column: getattr(instance, column) for column in encoder.columns} for instance in instances]
+    bench.measure(
+        'healthcare_workers.rows.encode',
+        lambda: encoder.encode_many(rows),
+        ops=len(rows)
+    )
+
+
+def bench_views(bench):
+    factory = APIRequestFactory()
+    user, _ = User.objects.get_or_create(username='benchmark')
+    list_view = HealthcareWorkersListCreateView.as_view()
+    serializer_list_view = HealthcareWorkersListCreateView.as_view(use_row_encoder=False)
+    detail_view = HealthcareWorkersRetrieveUpdateDestroyView.as_view()
+
+    def get(view, params=None, **kwargs):
+        request = factory.get('/api/v1/healthcareworker/', params)
+        force_authenticate(request, user=user)
+        response = view(request, **kwargs)
+        response.render()
+        assert response.status_code == 200, response.status_code
+
+    for size in bench.sizes:
+        seed_workers(size)
+
+        bench.measure(
+            f'healthcare_workers.list.first_page[{size}]',
+            lambda: get(list_view, {'page_size': PAGE_SIZE}),
+            ops=PAGE_SIZE
+        )
+        # Mesma página pelo ModelSerializer, para comparar com o caminho via .values()
+        bench.measure(
+            f'healthcare_workers.list.first_page_serializer[{size}]',
+            lambda: get(serializer_list_view, {'page_size': PAGE_SIZE}),
+            ops=PAGE_SIZE
+        )
+
+        # Última página: com keyset o custo não depende da profundidade
+        position = HealthcareWorker.objects.order_by('name', 'id').values_list(
+            'name', 'id'
+        )[max(size - PAGE_SIZE - 1, 0)]
+        cursor = encode_position(list(position))
+        bench.measure(
+            f'healthcare_workers.list.last_page[{size}]',
+            lambda: get(list_view, {'page_size': PAGE_SIZE, 'cursor': cursor})
+        )
+
+        pk = HealthcareWorker.objects.order_by('-id').values_list('id', flat=True)[size // 2]
+        bench.measure(
+            f'healthcare_workers.detail[{size}]',
+            lambda: get(detail_view, pk=pk)
+        )
+
+
+def bench_connections(bench):
+    """
+    Detalhe com o ciclo de conexão de uma requisição do Django
+    (close_old_connections no início e no fim): conexão nova a cada
+    requisição, conexão persistente e pool. Só faz sentido no PostgreSQL e
+    fora de uma transação (nos testes a conexão não pode ser fechada).
+    """
+    if connection.vendor != 'postgresql' or connection.in_atomic_block:
+        return
+
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+    factory = APIRequestFactory()
+    user, _ = User.objects.get_or_create(username='benchmark')
+    detail_view = HealthcareWorkersRetrieveUpdateDestroyView.as_view()
+    seed_workers(1)
+    pk = HealthcareWorker.objects.values_list('id', flat=True).first()
+
+    def request():
+        close_old_connections()
+        request = factory.get('/api/v1/healthcareworker/')
+        force_authenticate(request, user=user)
+        view_response = detail_view(request, pk=pk)
+        view_response.render()
+        close_old_connections()
+
+    settings_dict = connection.settings_dict
+    original = {'CONN_MAX_AGE': settings_dict['CONN_MAX_AGE'], 'OPTIONS': settings_dict['OPTIONS']}
+    options = {key: value for key, value in original['OPTIONS'].items() if key != 'pool'}
+    modes = [('per_request', 0, options), ('persistent', 60, options)]
+    if is_psycopg3 and settings.DB_POOL_AVAILABLE:
+        pool = {'min_size': 1, 'max_size': settings.GUNICORN_THREADS}
+        modes.append(('pool', 0, {**options, 'pool': pool}))
+
+    try:
+        for mode, conn_max_age, mode_options in modes:
+            connection.close()
+            connection.close_pool()
+            settings_dict['CONN_MAX_AGE'] = conn_max_age
+            settings_dict['OPTIONS'] = mode_options
+            bench.measure(f'healthcare_workers.detail_connection[{mode}]', request)
+    finally:
+        connection.close()
+        connection.close_pool()
+        settings_dict.update(original)
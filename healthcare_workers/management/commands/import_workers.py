@@ -0,0 +1,174 @@
+import csv
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+
+from app.constraints import violates_constraint
+from healthcare_workers.models import HealthcareWorker
+from healthcare_workers.serializers import EMAIL_CONSTRAINT, HealthcareWorkerSerializer
+
+
+FORMATS = ('csv', 'jsonl')
+MAX_ERRORS_SHOWN = 20
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa profissionais de saúde de um arquivo CSV ou JSONL, lendo em '
+        'fluxo e gravando em lotes com bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Arquivo .csv ou .jsonl')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Formato do arquivo (padrão: pela extensão)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Linhas validadas e gravadas por lote (padrão: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.is_file():
+            raise CommandError(f'Arquivo não encontrado: {path}')
+
+        file_format = options['format'] or self.detect_format(path)
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size deve ser maior que zero')
+
+        self.verbosity = options['verbosity']
+        self.stats = {'read': 0, 'imported': 0, 'invalid': 0, 'duplicated': 0}
+        started = time.perf_counter()
+
+        with path.open(newline='', encoding='utf-8') as source:
+            rows = self.read_rows(source, file_format)
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                self.import_batch(batch)
+
+        elapsed = time.perf_counter() - started
+        rate = self.stats['read'] / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{self.stats['imported']} profissionais importados de {self.stats['read']} linhas "
+            f"({self.stats['invalid']} inválidas, {self.stats['duplicated']} com email duplicado) "
+            f"em {elapsed:.2f}s — {rate:.0f} linhas/s"
+        ))
+
+    def detect_format(self, path):
+        suffix = path.suffix.lower()
+        if suffix == '.csv':
+            return 'csv'
+        if suffix in ('.jsonl', '.ndjson'):
+            return 'jsonl'
+        raise CommandError('Não foi possível detectar o formato; use --format')
+
+    def read_rows(self, source, file_format):
+        """Gera (número da linha, dados) sem carregar o arquivo inteiro"""
+        if file_format == 'csv':
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row
+            return
+
+        for line_number, line in enumerate(source, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, e
+
+    def import_batch(self, batch):
+        workers = []
+        for line_number, row in batch:
+            self.stats['read'] += 1
+
+            if isinstance(row, Exception):
+                self.report_invalid(line_number, 'JSON inválido')
+                continue
+            if not isinstance(row, dict):
+                self.report_invalid(line_number, 'Linha deve ser um objeto')
+                continue
+
+            # Células vazias do CSV viram campos ausentes
+            data = {key: value for key, value in row.items() if value not in ('', None)}
+
+            # Mesmas regras da API (title-case, telefone, tamanhos); a
+            # unicidade do email é resolvida abaixo para o lote inteiro
+            serializer = HealthcareWorkerSerializer(data=data)
+            if not serializer.is_valid():
+                self.report_invalid(line_number, serializer.errors)
+                continue
+
+            workers.append(HealthcareWorker(**serializer.validated_data))
+
+        existing = self.existing_emails({worker.email for worker in workers if worker.email})
+
+        to_create = []
+        for worker in workers:
+            if worker.email:
+                if worker.email in existing:
+                    self.stats['duplicated'] += 1
+                    continue
+                existing.add(worker.email)
+            to_create.append(worker)
+
+        self.create_workers(to_create)
+
+        if self.verbosity >= 2:
+            self.stdout.write(f"{self.stats['read']} linhas processadas")
+
+    def existing_emails(self, emails):
+        # Os emails já vêm minúsculos do serializer; a busca usa o índice de Lower(email)
+        if not emails:
+            return set()
+        return set(
+            HealthcareWorker.objects.annotate(email_lower=Lower('email'))
+            .filter(email_lower__in=emails)
+            .values_list('email_lower', flat=True)
+        )
+
+    def create_workers(self, workers):
+        try:
+            with transaction.atomic():
+                HealthcareWorker.objects.bulk_create(workers)
+            self.stats['imported'] += len(workers)
+            return
+        except IntegrityError as exc:
+            if not violates_constraint(exc, HealthcareWorker, EMAIL_CONSTRAINT):
+                raise
+
+        # Outro import ou a API gravou algum desses emails depois da checagem:
+        # confere de novo e grava um a um, contando os que colidirem
+        existing = self.existing_emails({worker.email for worker in workers if worker.email})
+        for worker in workers:
+            if worker.email in existing:
+                self.stats['duplicated'] += 1
+                continue
+            try:
+                with transaction.atomic():
+                    HealthcareWorker.objects.bulk_create([worker])
+            except IntegrityError as exc:
+                if not violates_constraint(exc, HealthcareWorker, EMAIL_CONSTRAINT):
+                    raise
+                self.stats['duplicated'] += 1
+                continue
+            self.stats['imported'] += 1
+
+    def report_invalid(self, line_number, errors):
+        self.stats['invalid'] += 1
+        if self.stats['invalid'] <= MAX_ERRORS_SHOWN:
+            self.stderr.write(f'Linha {line_number}: {errors}')
+        elif self.stats['invalid'] == MAX_ERRORS_SHOWN + 1:
+            self.stderr.write('Demais erros omitidos...')
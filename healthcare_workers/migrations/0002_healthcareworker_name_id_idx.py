@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('healthcare_workers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='healthcareworker',
+            index=models.Index(fields=['name', 'id'], name='healthcare_worker_name_id_idx'),
+        ),
+    ]
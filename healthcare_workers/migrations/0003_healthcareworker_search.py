@@ -0,0 +1,61 @@
+from django.db import migrations
+
+
+TABLE = 'healthcare_workers_healthcareworker'
+SEARCH_TABLE = 'healthcare_workers_healthcareworker_search'
+
+POSTGRESQL_FORWARD = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f'CREATE INDEX IF NOT EXISTS healthcare_worker_name_trgm_idx ON {TABLE} USING gin (UPPER(name) gin_trgm_ops)',
+    f'CREATE INDEX IF NOT EXISTS healthcare_worker_profession_trgm_idx ON {TABLE} USING gin (UPPER(profession) gin_trgm_ops)',
+]
+
+POSTGRESQL_BACKWARD = [
+    'DROP INDEX IF EXISTS healthcare_worker_name_trgm_idx',
+    'DROP INDEX IF EXISTS healthcare_worker_profession_trgm_idx',
+]
+
+SQLITE_FORWARD = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    f"name, profession, content='{TABLE}', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, name, profession) VALUES (new.id, new.name, new.profession); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, profession) "
+    f"VALUES ('delete', old.id, old.name, old.profession); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au AFTER UPDATE ON {TABLE} BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, profession) "
+    f"VALUES ('delete', old.id, old.name, old.profession); "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, name, profession) VALUES (new.id, new.name, new.profession); END",
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_au',
+    f'DROP TABLE IF EXISTS {SEARCH_TABLE}',
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('healthcare_workers', '0002_healthcareworker_name_id_idx'),
+    ]
+
+    # Índices de trigramas no PostgreSQL (pg_trgm) e tabela FTS5 com tokenizer
+    # trigram no SQLite; a operação depende do banco, por isso não fica no Meta
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRESQL_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRESQL_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:10
+
+from django.db import migrations, models
+
+
+TABLE = 'healthcare_workers_healthcareworker'
+SEARCH_TABLE = 'healthcare_workers_healthcareworker_search'
+
+# Triggers da busca como criadas na 0003, congeladas aqui
+SQLITE_SEARCH_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, name, profession) VALUES (new.id, new.name, new.profession); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, profession) "
+    f"VALUES ('delete', old.id, old.name, old.profession); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au AFTER UPDATE ON {TABLE} BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, profession) "
+    f"VALUES ('delete', old.id, old.name, old.profession); "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, name, profession) VALUES (new.id, new.name, new.profession); END",
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')",
+]
+
+
+def reinstall_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_SEARCH_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('healthcare_workers', '0003_healthcareworker_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='healthcareworker',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        # No SQLite o AddField recria a tabela e descarta as triggers da busca
+        migrations.RunPython(reinstall_search_triggers, migrations.RunPython.noop),
+    ]
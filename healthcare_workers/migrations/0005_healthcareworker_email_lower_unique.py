@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:17
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def normalize_emails(apps, schema_editor):
+    # Mesmo formato que o serializer grava: minúsculo, e vazio vira NULL
+    HealthcareWorker = apps.get_model('healthcare_workers', 'HealthcareWorker')
+    HealthcareWorker.objects.filter(email='').update(email=None)
+    HealthcareWorker.objects.exclude(email=None).update(email=django.db.models.functions.text.Lower('email'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('healthcare_workers', '0004_healthcareworker_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='healthcareworker',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), condition=models.Q(('email__isnull', False)), name='healthcare_worker_email_lower_unique'),
+        ),
+    ]
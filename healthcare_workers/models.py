@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 
 
 class HealthcareWorker(models.Model):
@@ -9,6 +10,21 @@ class HealthcareWorker(models.Model):
     phone = models.CharField(max_length=15)
     email = models.EmailField(max_length=100, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # Email único sem diferenciar maiúsculas; também atende o ?email=
+            models.UniqueConstraint(
+                Lower('email'),
+                name='healthcare_worker_email_lower_unique',
+                condition=models.Q(email__isnull=False),
+            ),
+        ]
+        indexes = [
+            # Suporta a paginação por cursor da listagem
+            models.Index(fields=['name', 'id'], name='healthcare_worker_name_id_idx'),
+        ]
 
     def __str__(self):
         if self.preferred_name:
@@ -0,0 +1,13 @@
+from app.pagination import KeysetPagination
+
+
+class HealthcareWorkerPagination(KeysetPagination):
+    ordering = ('name', 'id')
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+
+        # Resultados de busca vêm primeiro pelos mais parecidos
+        if 'search_rank' in queryset.query.annotations:
+            return ('-search_rank',) + ordering
+        return ordering
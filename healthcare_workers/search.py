@@ -0,0 +1,80 @@
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Greatest, Upper
+
+
+# Tabela FTS5 (tokenizer trigram) mantida por triggers no SQLite; ver a
+# migração 0003_healthcareworker_search
+SQLITE_SEARCH_TABLE = 'healthcare_workers_healthcareworker_search'
+
+# Trigramas só ajudam a partir de 3 caracteres; abaixo disso, busca simples
+MIN_TRIGRAM_LENGTH = 3
+
+
+def search_workers(queryset, term):
+    """
+    Filtra profissionais por nome ou profissão usando o índice de trigramas
+    do banco e anota `search_rank` (maior = mais parecido) para ordenação.
+    """
+    term = term.strip()
+    if len(term) < MIN_TRIGRAM_LENGTH:
+        return queryset.filter(
+            Q(name__icontains=term) |
+            Q(profession__icontains=term)
+        )
+
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        return _search_postgresql(queryset, term)
+    if vendor == 'sqlite':
+        return _search_sqlite(queryset, term)
+
+    return queryset.filter(
+        Q(name__icontains=term) |
+        Q(profession__icontains=term)
+    )
+
+
+def _search_postgresql(queryset, term):
+    # Os índices GIN (gin_trgm_ops) são sobre UPPER(coluna), a mesma expressão
+    # que o Django gera para icontains; assim substring e similaridade usam o
+    # mesmo índice
+    return queryset.alias(
+        name_upper=Upper('name'),
+        profession_upper=Upper('profession'),
+    ).filter(
+        Q(name__icontains=term) |
+        Q(profession__icontains=term) |
+        Q(name_upper__trigram_word_similar=term) |
+        Q(profession_upper__trigram_word_similar=term)
+    ).annotate(
+        search_rank=Cast(
+            Greatest(
+                TrigramWordSimilarity(term, 'name'),
+                TrigramWordSimilarity(term, 'profession'),
+            ),
+            FloatField()
+        )
+    )
+
+
+def _search_sqlite(queryset, term):
+    # Frase entre aspas: o tokenizer trigram faz busca por substring
+    match = '"{}"'.format(term.replace('"', '""'))
+    table = queryset.model._meta.db_table
+
+    return queryset.filter(
+        id__in=RawSQL(
+            f'SELECT rowid FROM {SQLITE_SEARCH_TABLE} WHERE {SQLITE_SEARCH_TABLE} MATCH %s',
+            (match,)
+        )
+    ).annotate(
+        search_rank=RawSQL(
+            f'SELECT -rank FROM {SQLITE_SEARCH_TABLE} '
+            f'WHERE {SQLITE_SEARCH_TABLE} MATCH %s AND rowid = "{table}"."id"',
+            (match,),
+            output_field=FloatField()
+        )
+    )
@@ -1,8 +1,24 @@
 from rest_framework import serializers
+from django.db import IntegrityError, transaction
+from app.constraints import violates_constraint
+from app.fieldsets import SparseFieldsetSerializerMixin
 from .models import HealthcareWorker
 
 
-class HealthcareWorkerSerializer(serializers.ModelSerializer):
+EMAIL_TAKEN_MESSAGE = 'Este email já está cadastrado.'
+EMAIL_CONSTRAINT = 'healthcare_worker_email_lower_unique'
+
+
+class HealthcareWorkerSummarySerializer(serializers.ModelSerializer):
+    """Representação compacta, usada embutida em outras respostas"""
+
+    class Meta:
+        model = HealthcareWorker
+        fields = ('id', 'name', 'preferred_name', 'profession')
+        read_only_fields = fields
+
+
+class HealthcareWorkerSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = HealthcareWorker
@@ -49,14 +65,19 @@ class HealthcareWorkerSerializer(serializers.ModelSerializer):
 
         return value
 
-    # Verificar se email já existe
+    # Email vai minúsculo e vazio vira NULL; a unicidade é garantida pelo
+    # índice healthcare_worker_email_lower_unique (ver save)
     def validate_email(self, value):
-        if value:
-            if HealthcareWorker.objects.filter(email=value).exclude(
-                id=getattr(self.instance, 'id', None)
-            ).exists():
-                raise serializers.ValidationError(
-                    "Este email já está cadastrado."
-                )
-
-        return value.lower() if value else value
+        return value.lower() if value else None
+
+    # Email repetido é barrado pela constraint, sem consulta prévia e sem
+    # janela para corrida entre requisições simultâneas. Outras violações
+    # seguem como erro.
+    def save(self, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError as exc:
+            if not violates_constraint(exc, HealthcareWorker, EMAIL_CONSTRAINT):
+                raise
+            raise serializers.ValidationError({'email': [EMAIL_TAKEN_MESSAGE]})
@@ -1,9 +1,26 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.models.functions import Lower
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import datetime, timedelta
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.throttling import BaseThrottle
 from rest_framework_simplejwt.tokens import RefreshToken
+from app.pagination import encode_position
+from medical_consultation.models import MedicalConsultation
+from .management.commands.import_workers import Command as ImportWorkersCommand
 from .models import HealthcareWorker
+from .serializers import EMAIL_TAKEN_MESSAGE, HealthcareWorkerSerializer
+from .views import HealthcareWorkersAsyncListView, HealthcareWorkersListCreateView
 
 
 class HealthcareWorkerAPITestCase(APITestCase):
@@ -78,7 +95,290 @@ class HealthcareWorkerAPITestCase(APITestCase):
         response = self.client.get(self.list_create_url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_list_healthcare_workers_cursor_pagination(self):
+        """Testa paginação por cursor da listagem de profissionais"""
+        for index in range(5):
+            HealthcareWorker.objects.create(
+                name='Dr. Silva',
+                profession='Clínico Geral',
+                address='Rua das Flores, 123',
+                phone=f'3399919010{index}'
+            )
+
+        self.authenticate()
+
+        seen = []
+        url = f'{self.list_create_url}?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+
+        # Nomes iguais: o desempate pelo id garante que nada se repete ou se perde
+        self.assertEqual(seen, sorted(HealthcareWorker.objects.values_list('id', flat=True)))
+
+        response = self.client.get(f'{self.list_create_url}?cursor=invalido')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_healthcare_workers_malformed_cursor_position(self):
+        """Testa que cursor com valores de posição inválidos dá 404, não 500"""
+        self.authenticate()
+        for url in (self.list_create_url, reverse('healthcareworkers_async_list')):
+            for position in (['x', 'abc'], [None, None], ['Ana'], [['Ana'], 1]):
+                response = self.client.get(url, {'cursor': encode_position(position)})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, (url, position))
+
+    def test_search_healthcare_workers(self):
+        """Testa busca por substring no nome e na profissão, ordenada por similaridade"""
+        silva = HealthcareWorker.objects.create(
+            name='Dr. João Silva',
+            profession='Clínico Geral',
+            address='Rua das Flores, 123',
+            phone='33999190106'
+        )
+        silveira = HealthcareWorker.objects.create(
+            name='Dra. Ana Silveira',
+            profession='Cardiologista',
+            address='Av. Principal, 456',
+            phone='33999290107'
+        )
+        HealthcareWorker.objects.create(
+            name='Dra. Maria Santos',
+            profession='Pediatra',
+            address='Av. Principal, 789',
+            phone='33999290108'
+        )
+
+        self.authenticate()
+
+        response = self.client.get(self.list_create_url, {'search': 'silv'})
+        self.assertEqual(
+            {item['id'] for item in response.data['results']},
+            {silva.id, silveira.id}
+        )
+
+        # O cursor acompanha a ordenação por similaridade
+        response = self.client.get(self.list_create_url, {'search': 'silv', 'page_size': 1})
+        first = response.data['results'][0]['id']
+        response = self.client.get(response.data['next'])
+        self.assertEqual({first, response.data['results'][0]['id']}, {silva.id, silveira.id})
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(self.list_create_url, {'search': 'cardio'})
+        self.assertEqual([item['id'] for item in response.data['results']], [silveira.id])
+
+        # Termo exato aparece antes de correspondências parciais
+        response = self.client.get(self.list_create_url, {'search': 'Silva'})
+        self.assertEqual(response.data['results'][0]['id'], silva.id)
+
+        # O índice acompanha atualizações
+        silva.name = 'Dr. João Pereira'
+        silva.save()
+        response = self.client.get(self.list_create_url, {'search': 'pereira'})
+        self.assertEqual([item['id'] for item in response.data['results']], [silva.id])
+
+        # Termos curtos caem na busca simples
+        response = self.client.get(self.list_create_url, {'search': 'Dr'})
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_availability(self):
+        """Testa horários livres de um e de vários profissionais"""
+        worker = HealthcareWorker.objects.create(
+            name='Dr. João Silva',
+            profession='Clínico Geral',
+            address='Rua das Flores, 123',
+            phone='33999190106'
+        )
+        other_worker = HealthcareWorker.objects.create(
+            name='Dra. Maria Santos',
+            profession='Cardiologista',
+            address='Av. Principal, 456',
+            phone='33999290107'
+        )
+
+        tomorrow = timezone.localdate() + timedelta(days=1)
+
+        def at(hour, minute=0):
+            return timezone.make_aware(
+                datetime.combine(tomorrow, datetime.min.time().replace(hour=hour, minute=minute))
+            )
+
+        for booked in (at(8), at(9, 15), at(18)):
+            MedicalConsultation.objects.create(
+                patient_name='João Silva',
+                age=30,
+                healthcare_worker=worker,
+                consultation_date=booked
+            )
+
+        self.authenticate()
+
+        url = reverse('healthcareworkers_availability_detail', kwargs={'pk': worker.id})
+        response = self.client.get(url, {'from': tomorrow.isoformat(), 'slot': '1h'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['slot_minutes'], 60)
+
+        # 8h e 18h ocupados; 9h ocupado pela consulta das 9h15
+        expected = [at(hour).isoformat() for hour in range(10, 18)]
+        self.assertEqual(response.data['slots'], expected)
+
+        response = self.client.get(reverse('healthcareworkers_availability'), {
+            'workers': f'{worker.id},{other_worker.id}',
+            'from': tomorrow.isoformat(),
+            'to': tomorrow.isoformat(),
+            'slot': '30m',
+        })
+        results = {item['healthcare_worker']: item['slots'] for item in response.data['results']}
+        self.assertEqual(len(results[other_worker.id]), 21)
+        self.assertEqual(len(results[worker.id]), 18)
+        self.assertNotIn(at(9).isoformat(), results[worker.id])
+        self.assertIn(at(9, 30).isoformat(), results[worker.id])
+
+        # `from` com horário e sem `to`: até o fim daquele dia
+        response = self.client.get(url, {'from': at(14).isoformat(), 'slot': '1h'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['slots'], [at(hour).isoformat() for hour in range(14, 18)])
+
+        response = self.client.get(url, {'slot': '3 dias'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse('healthcareworkers_availability_detail', kwargs={'pk': 999999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_async_list_and_detail_match_sync(self):
+        """Testa que as views assíncronas devolvem o mesmo JSON das síncronas"""
+        worker = HealthcareWorker.objects.create(
+            name='Dr. João Silva',
+            profession='Clínico Geral',
+            address='Rua das Flores, 123',
+            phone='33999190106'
+        )
+        self.authenticate()
+
+        for params in ({}, {'search': 'silva'}):
+            sync_response = self.client.get(self.list_create_url, params)
+            async_response = self.client.get(reverse('healthcareworkers_async_list'), params)
+            self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+            self.assertEqual(async_response.json(), sync_response.json())
+
+        sync_response = self.client.get(reverse('healthcareworkers_detail', kwargs={'pk': worker.id}))
+        async_response = self.client.get(reverse('healthcareworkers_async_detail', kwargs={'pk': worker.id}))
+        self.assertEqual(async_response.json(), sync_response.json())
+
+    def test_async_views_negotiate_and_throttle_like_sync(self):
+        """Testa que as views assíncronas passam pela negociação e pelo throttling do DRF"""
+        self.authenticate()
+        sync_url, async_url = self.list_create_url, reverse('healthcareworkers_async_list')
+
+        for params, headers in (({'format': 'xml'}, {}), ({}, {'HTTP_ACCEPT': 'text/html'})):
+            sync_response = self.client.get(sync_url, params, **headers)
+            async_response = self.client.get(async_url, params, **headers)
+            self.assertIn(sync_response.status_code, (status.HTTP_404_NOT_FOUND, status.HTTP_406_NOT_ACCEPTABLE))
+            self.assertEqual(async_response.status_code, sync_response.status_code)
+
+        response = self.client.get(async_url, {'format': 'json'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        class DenyThrottle(BaseThrottle):
+            def allow_request(self, request, view):
+                return False
+
+            def wait(self):
+                return 30
+
+        for view in (HealthcareWorkersListCreateView, HealthcareWorkersAsyncListView):
+            with mock.patch.object(view, 'throttle_classes', [DenyThrottle]):
+                response = self.client.get(sync_url if view is HealthcareWorkersListCreateView else async_url)
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(response['Retry-After'], '30')
+
+    def test_list_row_encoder_matches_serializer(self):
+        """Testa que a listagem via .values() gera o mesmo JSON do serializer"""
+        for name in ('Dr. João Silva', 'Dra. Ana Souza', 'Dr. Pedro Lima'):
+            HealthcareWorker.objects.create(
+                name=name,
+                profession='Clínico Geral',
+                address='Rua das Flores, 123',
+                phone='33999190106',
+                email=None if 'Ana' in name else f'{name.split()[-1].lower()}@exemplo.com'
+            )
+        self.authenticate()
+
+        for params in ({}, {'page_size': 2}, {'fields': 'name,email'}):
+            for url in (self.list_create_url, reverse('healthcareworkers_async_list')):
+                fast = self.client.get(url, params).json()
+                with mock.patch.object(HealthcareWorkersListCreateView, 'use_row_encoder', False), \
+                        mock.patch.object(HealthcareWorkersAsyncListView, 'use_row_encoder', False):
+                    self.assertEqual(self.client.get(url, params).json(), fast)
+
+    def test_sparse_fieldsets(self):
+        """Testa ?fields= e ?omit= na listagem e no detalhe, síncronos e assíncronos"""
+        worker = HealthcareWorker.objects.create(
+            name='Dr. João Silva',
+            profession='Clínico Geral',
+            address='Rua das Flores, 123',
+            phone='33999190106'
+        )
+        self.authenticate()
+        detail_url = reverse('healthcareworkers_detail', kwargs={'pk': worker.id})
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.list_create_url, {'fields': 'id,name'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'id': worker.id, 'name': 'Dr. João Silva'}])
+        select = next(q['sql'] for q in context if 'FROM "healthcare_workers_healthcareworker"' in q['sql'])
+        self.assertNotIn('"address"', select)
+
+        response = self.client.get(detail_url, {'omit': 'address,phone'})
+        self.assertNotIn('address', response.data)
+        self.assertNotIn('phone', response.data)
+        self.assertEqual(response.data['profession'], 'Clínico Geral')
+
+        for sync_url, url in (
+            (self.list_create_url, reverse('healthcareworkers_async_list')),
+            (detail_url, reverse('healthcareworkers_async_detail', kwargs={'pk': worker.id})),
+        ):
+            sync_response = self.client.get(sync_url, {'fields': 'name,phone'})
+            async_response = self.client.get(url, {'fields': 'name,phone'})
+            self.assertEqual(async_response.json(), sync_response.json())
+
+    def test_sparse_fieldsets_unknown_field(self):
+        """Testa que campo inexistente é recusado sem consultar o profissional"""
+        self.authenticate()
+        self.client.get(self.list_create_url)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.list_create_url, {'fields': 'name,salario'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('salario', response.data['fields'])
+        self.assertEqual(len(context.captured_queries), 0)
+
+        response = self.client.get(reverse('healthcareworkers_async_list'), {'omit': 'salario'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sparse_fieldsets_etag(self):
+        """Testa que o ETag do detalhe muda com o recorte de campos"""
+        worker = HealthcareWorker.objects.create(
+            name='Dr. João Silva',
+            profession='Clínico Geral',
+            address='Rua das Flores, 123',
+            phone='33999190106'
+        )
+        self.authenticate()
+        detail_url = reverse('healthcareworkers_detail', kwargs={'pk': worker.id})
+
+        etag = self.client.get(detail_url)['ETag']
+        sparse_etag = self.client.get(detail_url, {'fields': 'name'})['ETag']
+        self.assertNotEqual(etag, sparse_etag)
+
+        response = self.client.get(detail_url, {'fields': 'name'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(detail_url, {'fields': 'name'}, HTTP_IF_NONE_MATCH=sparse_etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
 
     def test_create_healthcare_worker_success(self):
         """Testa criação bem-sucedida de profissional"""
@@ -147,6 +447,25 @@ class HealthcareWorkerAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['name'], 'Dr. João Silva')
 
+    def test_retrieve_healthcare_worker_etag(self):
+        """Testa ETag e resposta 304 no detalhe do profissional"""
+        worker = HealthcareWorker.objects.create(
+            name='Dr. João Silva',
+            profession='Clínico Geral',
+            address='Rua das Flores, 123',
+            phone='33999190106'
+        )
+        self.authenticate()
+        detail_url = reverse('healthcareworkers_detail', kwargs={'pk': worker.id})
+
+        etag = self.client.get(detail_url)['ETag']
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(detail_url, {'profession': 'Cardiologista'}, format='json')
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_update_healthcare_worker(self):
         """Testa atualização de profissional"""
         worker = HealthcareWorker.objects.create(
@@ -171,6 +490,68 @@ class HealthcareWorkerAPITestCase(APITestCase):
         worker.refresh_from_db()
         self.assertEqual(worker.name, 'Dr. João Santos Silva')
 
+    def test_email_unique_ignoring_case(self):
+        """Testa que email repetido (em qualquer caixa) é recusado pela constraint"""
+        self.authenticate()
+        response = self.client.post(
+            self.list_create_url, {**self.valid_worker_data, 'email': 'Joao.Silva@Exemplo.com'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['email'], 'joao.silva@exemplo.com')
+
+        response = self.client.post(
+            self.list_create_url, {**self.valid_worker_data, 'email': 'JOAO.SILVA@exemplo.com'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(HealthcareWorker.objects.count(), 1)
+
+        # Validar não consulta o banco; o conflito aparece ao gravar, com a mesma mensagem
+        serializer = HealthcareWorkerSerializer(data={**self.valid_worker_data, 'email': 'joao.silva@EXEMPLO.com'})
+        with CaptureQueriesContext(connection) as context:
+            self.assertTrue(serializer.is_valid())
+        self.assertEqual(len(context.captured_queries), 0)
+        with self.assertRaises(ValidationError) as raised:
+            serializer.save()
+        self.assertEqual(raised.exception.detail, {'email': [EMAIL_TAKEN_MESSAGE]})
+
+        # Outras violações não viram "email já cadastrado"
+        serializer = HealthcareWorkerSerializer(data={**self.valid_worker_data, 'email': 'outro@exemplo.com'})
+        self.assertTrue(serializer.is_valid())
+        error = IntegrityError('NOT NULL constraint failed: healthcare_workers_healthcareworker.name')
+        with mock.patch.object(HealthcareWorker, 'save', side_effect=error):
+            with self.assertRaises(IntegrityError):
+                serializer.save()
+
+        # Emails vazios não conflitam entre si
+        for _ in range(2):
+            serializer = HealthcareWorkerSerializer(data={**self.valid_worker_data, 'email': ''})
+            self.assertTrue(serializer.is_valid())
+            self.assertIsNone(serializer.save().email)
+
+    def test_filter_by_email(self):
+        """Testa o ?email= exato, sem diferenciar maiúsculas, usando o índice de Lower(email)"""
+        worker = HealthcareWorker.objects.create(**{**self.valid_worker_data, 'email': 'joao.silva@exemplo.com'})
+        HealthcareWorker.objects.create(**{**self.valid_worker_data, 'email': 'ana@exemplo.com'})
+        HealthcareWorker.objects.create(**{**self.valid_worker_data, 'email': None})
+        self.authenticate()
+
+        for url in (self.list_create_url, reverse('healthcareworkers_async_list')):
+            response = self.client.get(url, {'email': ' Joao.Silva@exemplo.COM '})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual([item['id'] for item in response.json()['results']], [worker.id])
+
+        response = self.client.get(self.list_create_url, {'email': 'ninguem@exemplo.com'})
+        self.assertEqual(response.data['results'], [])
+
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Com poucas linhas o planejador preferiria ler a tabela toda
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        queryset = HealthcareWorker.objects.alias(email_lower=Lower('email')).filter(
+            email__isnull=False, email_lower='joao.silva@exemplo.com'
+        )
+        self.assertIn('healthcare_worker_email_lower_unique', queryset.explain())
+
     def test_delete_healthcare_worker(self):
         """Testa exclusão de profissional"""
         worker = HealthcareWorker.objects.create(
@@ -243,3 +624,83 @@ class HealthcareWorkerAPITestCase(APITestCase):
         )
 
         self.assertEqual(str(worker2), 'Dra. Maria Santos')
+
+    def test_import_workers_command(self):
+        """Testa importação em lote de CSV e JSONL com normalização e duplicados"""
+        HealthcareWorker.objects.create(
+            name='Dr. Existente',
+            profession='Clínico Geral',
+            address='Rua das Flores, 123',
+            phone='33999190106',
+            email='existente@exemplo.com'
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = Path(directory) / 'workers.csv'
+            csv_path.write_text(
+                'name,preferred_name,profession,address,phone,email\n'
+                '  dra. ana souza ,,cardiologista,Av. Principal 456,33999290107,ana@exemplo.com\n'
+                'Dr. Telefone Curto,,Pediatra,Av. Principal 789,123,curto@exemplo.com\n'
+                'Dr. Repetido,,Pediatra,Av. Principal 789,33999290108,existente@exemplo.com\n'
+                'Dr. Sem Email,,Pediatra,Av. Principal 789,33999290109,\n',
+                encoding='utf-8'
+            )
+            jsonl_path = Path(directory) / 'workers.jsonl'
+            jsonl_path.write_text(
+                '{"name": "Dr. Bruno Lima", "profession": "Ortopedista", '
+                '"address": "Rua Central 10", "phone": "(33) 99929-0110", "email": "bruno@exemplo.com"}\n'
+                '{"name": "Dr. Bruno Lima", "profession": "Ortopedista", '
+                '"address": "Rua Central 10", "phone": "33999290110", "email": "bruno@exemplo.com"}\n'
+                'nao e json\n',
+                encoding='utf-8'
+            )
+
+            stdout, stderr = StringIO(), StringIO()
+            call_command('import_workers', str(csv_path), batch_size=2, stdout=stdout, stderr=stderr)
+            call_command('import_workers', str(jsonl_path), stdout=stdout, stderr=stderr)
+
+        self.assertIn('2 profissionais importados de 4 linhas', stdout.getvalue())
+        self.assertIn('1 profissionais importados de 3 linhas', stdout.getvalue())
+        self.assertIn('Linha 3', stderr.getvalue())
+        self.assertEqual(HealthcareWorker.objects.count(), 4)
+
+        worker = HealthcareWorker.objects.get(email='ana@exemplo.com')
+        self.assertEqual(worker.name, 'Dra. Ana Souza')
+        self.assertEqual(worker.profession, 'Cardiologista')
+        self.assertIsNone(HealthcareWorker.objects.get(name='Dr. Sem Email').email)
+
+    def test_import_workers_concurrent_email(self):
+        """Testa que email gravado por outro processo durante o lote conta como duplicado"""
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = Path(directory) / 'workers.csv'
+            csv_path.write_text(
+                'name,profession,address,phone,email\n'
+                'Dra. Ana Souza,Cardiologista,Av. Principal 456,33999290107,ana@exemplo.com\n'
+                'Dr. Bruno Lima,Ortopedista,Rua Central 10,33999290110,bruno@exemplo.com\n'
+                'Dr. Carlos Melo,Pediatra,Rua Central 20,33999290111,carlos@exemplo.com\n',
+                encoding='utf-8'
+            )
+
+            existing_emails = ImportWorkersCommand.existing_emails
+
+            def checked_then_taken(command, emails):
+                # A API grava o email logo depois da checagem do lote
+                found = existing_emails(command, emails)
+                if not HealthcareWorker.objects.filter(email='bruno@exemplo.com').exists():
+                    HealthcareWorker.objects.create(
+                        name='Dr. Bruno API', profession='Ortopedista', address='Rua Central 10',
+                        phone='33999290112', email='bruno@exemplo.com'
+                    )
+                return found
+
+            stdout = StringIO()
+            with mock.patch.object(ImportWorkersCommand, 'existing_emails', checked_then_taken):
+                call_command('import_workers', str(csv_path), stdout=stdout, stderr=StringIO())
+
+        self.assertIn('2 profissionais importados de 3 linhas', stdout.getvalue())
+        self.assertIn('1 com email duplicado', stdout.getvalue())
+        self.assertEqual(
+            sorted(HealthcareWorker.objects.values_list('email', flat=True)),
+            ['ana@exemplo.com', 'bruno@exemplo.com', 'carlos@exemplo.com']
+        )
+        self.assertEqual(HealthcareWorker.objects.get(email='bruno@exemplo.com').name, 'Dr. Bruno API')
@@ -1,8 +1,24 @@
 from django.urls import path
-from .views import HealthcareWorkersListCreateView, HealthcareWorkersRetrieveUpdateDestroyView
+from .views import (
+    HealthcareWorkerAvailabilityView,
+    HealthcareWorkerScheduleView,
+    HealthcareWorkerStatsView,
+    HealthcareWorkersAsyncListView,
+    HealthcareWorkersAsyncRetrieveView,
+    HealthcareWorkersListCreateView,
+    HealthcareWorkersRetrieveUpdateDestroyView,
+)
 
 
 urlpatterns = [
     path('healthcareworker/', HealthcareWorkersListCreateView.as_view(), name='healthcareworkers_list'),
-    path('healthcareworker/<int:pk>/', HealthcareWorkersRetrieveUpdateDestroyView.as_view(), name='healthcareworkers_detail')
+    path('healthcareworker/availability/', HealthcareWorkerAvailabilityView.as_view(), name='healthcareworkers_availability'),
+    path('healthcareworker/<int:pk>/', HealthcareWorkersRetrieveUpdateDestroyView.as_view(), name='healthcareworkers_detail'),
+    path('healthcareworker/<int:pk>/availability/', HealthcareWorkerAvailabilityView.as_view(), name='healthcareworkers_availability_detail'),
+    path('healthcareworker/<int:pk>/schedule/', HealthcareWorkerScheduleView.as_view(), name='healthcareworkers_schedule'),
+    path('healthcareworker/<int:pk>/stats/', HealthcareWorkerStatsView.as_view(), name='healthcareworkers_stats'),
+
+    # Leitura assíncrona (ORM assíncrono), para servir via app/asgi.py
+    path('async/healthcareworker/', HealthcareWorkersAsyncListView.as_view(), name='healthcareworkers_async_list'),
+    path('async/healthcareworker/<int:pk>/', HealthcareWorkersAsyncRetrieveView.as_view(), name='healthcareworkers_async_detail'),
 ]
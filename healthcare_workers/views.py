@@ -1,8 +1,23 @@
+from datetime import datetime, timedelta
 from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import DateTimeField
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Q
+from django.shortcuts import get_object_or_404
+from django.db.models.functions import Lower
+from django.utils import timezone
+from app.async_views import AsyncListAPIView, AsyncRetrieveAPIView
+from app.conditional import conditional_retrieve
+from app.fieldsets import SparseFieldsetMixin
+from app.rows import ValuesListMixin
+from medical_consultation.filters import parse_date_param, start_of_day
+from medical_consultation.schedule import get_day_schedule
+from medical_consultation.stats import PERIODS, worker_stats
+from .availability import free_slots, parse_slot
 from .models import HealthcareWorker
+from .pagination import HealthcareWorkerPagination
+from .search import search_workers
 from .serializers import HealthcareWorkerSerializer
 import logging
 
@@ -10,29 +25,38 @@ import logging
 logger = logging.getLogger('api')
 
 
-class HealthcareWorkersListCreateView(generics.ListCreateAPIView):
-    permission_classes = [IsAuthenticated]
-    serializer_class = HealthcareWorkerSerializer
+class HealthcareWorkersQuerysetMixin:
+    """Lista ordenada por nome, com busca opcional (`?search=`) e filtro por `?email=`"""
 
     def get_queryset(self):
-        queryset = HealthcareWorker.objects.all().order_by('name')
+        queryset = HealthcareWorker.objects.all().order_by('name', 'id')
 
         # Log de acesso
-        logger.info(f"Usuário {self.request.user.username} acessou lista de profissionais")
+        logger.info("Usuário %s acessou lista de profissionais", self.request.user.username)
+
+        # Email exato, sem diferenciar maiúsculas (índice de Lower(email))
+        email = self.request.query_params.get('email')
+        if email:
+            queryset = queryset.alias(email_lower=Lower('email')).filter(
+                email__isnull=False, email_lower=email.strip().lower()
+            )
 
-        # Busca simples
+        # Busca por nome ou profissão, indexada e ordenada por similaridade
         search = self.request.query_params.get('search')
         if search:
-            logger.info(f"Busca por: {search}")
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(profession__icontains=search)
-            )
+            logger.info("Busca por: %s", search)
+            queryset = search_workers(queryset, search)
 
         return queryset
 
+
+class HealthcareWorkersListCreateView(ValuesListMixin, SparseFieldsetMixin, HealthcareWorkersQuerysetMixin, generics.ListCreateAPIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = HealthcareWorkerSerializer
+    pagination_class = HealthcareWorkerPagination
+
     def create(self, request, *args, **kwargs):
-        logger.info(f"Usuário {request.user.username} criando novo profissional")
+        logger.info("Usuário %s criando novo profissional", request.user.username)
 
         # Validação básica
         if not request.data:
@@ -57,36 +81,37 @@ class HealthcareWorkersListCreateView(generics.ListCreateAPIView):
 
         try:
             response = super().create(request, *args, **kwargs)
-            logger.info(f"Profissional criado com sucesso: {response.data.get('name')}")
+            logger.info("Profissional criado com sucesso: %s", response.data.get('name'))
             return response
         except Exception as e:
-            logger.error(f"Erro ao criar profissional: {str(e)}")
+            logger.error("Erro ao criar profissional: %s", e)
             return Response(
                 {'error': 'Erro ao criar profissional'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
 
-class HealthcareWorkersRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class HealthcareWorkersRetrieveUpdateDestroyView(SparseFieldsetMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
     queryset = HealthcareWorker.objects.all()
     serializer_class = HealthcareWorkerSerializer
 
+    @conditional_retrieve(HealthcareWorker.objects.all())
     def retrieve(self, request, *args, **kwargs):
         professional_id = kwargs.get('pk')
-        logger.info(f"Usuário {request.user.username} visualizou profissional ID: {professional_id}")
+        logger.info("Usuário %s visualizou profissional ID: %s", request.user.username, professional_id)
         return super().retrieve(request, *args, **kwargs)
 
     def update(self, request, *args, **kwargs):
         professional_id = kwargs.get('pk')
-        logger.info(f"Usuário {request.user.username} atualizando profissional ID: {professional_id}")
+        logger.info("Usuário %s atualizando profissional ID: %s", request.user.username, professional_id)
 
         try:
             response = super().update(request, *args, **kwargs)
-            logger.info(f"Profissional {professional_id} atualizado com sucesso")
+            logger.info("Profissional %s atualizado com sucesso", professional_id)
             return response
         except Exception as e:
-            logger.error(f"Erro ao atualizar profissional: {str(e)}")
+            logger.error("Erro ao atualizar profissional: %s", e)
             return Response(
                 {'error': 'Erro ao atualizar profissional'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -94,15 +119,182 @@ class HealthcareWorkersRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyA
 
     def destroy(self, request, *args, **kwargs):
         professional_id = kwargs.get('pk')
-        logger.info(f"Usuário {request.user.username} deletando profissional ID: {professional_id}")
+        logger.info("Usuário %s deletando profissional ID: %s", request.user.username, professional_id)
 
         try:
             response = super().destroy(request, *args, **kwargs)
-            logger.info(f"Profissional {professional_id} deletado com sucesso")
+            logger.info("Profissional %s deletado com sucesso", professional_id)
             return response
         except Exception as e:
-            logger.error(f"Erro ao deletar profissional: {str(e)}")
+            logger.error("Erro ao deletar profissional: %s", e)
             return Response(
                 {'error': 'Erro ao deletar profissional'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+
+class HealthcareWorkersAsyncListView(ValuesListMixin, SparseFieldsetMixin, HealthcareWorkersQuerysetMixin, AsyncListAPIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = HealthcareWorkerSerializer
+    pagination_class = HealthcareWorkerPagination
+
+
+class HealthcareWorkersAsyncRetrieveView(SparseFieldsetMixin, AsyncRetrieveAPIView):
+    permission_classes = [IsAuthenticated]
+    queryset = HealthcareWorker.objects.all()
+    serializer_class = HealthcareWorkerSerializer
+
+    async def get(self, request, pk, *args, **kwargs):
+        logger.info("Usuário %s visualizou profissional ID: %s", request.user.username, pk)
+        return await super().get(request, pk, *args, **kwargs)
+
+
+MAX_AVAILABILITY_DAYS = 31
+MAX_AVAILABILITY_WORKERS = 50
+
+
+class HealthcareWorkerAvailabilityView(generics.GenericAPIView):
+    """
+    Horários livres de um profissional (`healthcareworker/<id>/availability/`)
+    ou de vários de uma vez (`healthcareworker/availability/?workers=1,2,3`).
+
+    Parâmetros: `from` e `to` (data ou data e hora; padrão: hoje) e `slot`
+    (duração do horário, ex.: 30m, 1h; padrão: 30m).
+    """
+    permission_classes = [IsAuthenticated]
+    queryset = HealthcareWorker.objects.all()
+
+    def get(self, request, pk=None, *args, **kwargs):
+        params = request.query_params
+
+        if pk is not None:
+            worker_ids = [get_object_or_404(HealthcareWorker.objects.only('id'), pk=pk).id]
+        else:
+            try:
+                worker_ids = list(dict.fromkeys(
+                    int(value) for value in params.get('workers', '').split(',') if value.strip()
+                ))
+            except ValueError:
+                return Response(
+                    {'error': 'workers deve ser uma lista de ids separados por vírgula'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            if not worker_ids or len(worker_ids) > MAX_AVAILABILITY_WORKERS:
+                return Response(
+                    {'error': f'Informe de 1 a {MAX_AVAILABILITY_WORKERS} profissionais em workers'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            found = set(HealthcareWorker.objects.filter(id__in=worker_ids).values_list('id', flat=True))
+            missing = [worker_id for worker_id in worker_ids if worker_id not in found]
+            if missing:
+                return Response(
+                    {'error': f"Profissionais não encontrados: {', '.join(map(str, missing))}"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+        slot = parse_slot(params.get('slot', '30m'))
+        if slot is None:
+            return Response(
+                {'error': 'slot inválido. Use minutos ou horas, ex.: 30m, 1h (de 5m a 4h)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        start = parse_date_param(params, 'from') or timezone.localdate()
+        # Sem `to`, vai até o fim do dia (local) de `from`
+        end = parse_date_param(params, 'to')
+        if end is None:
+            end = timezone.localtime(start).date() if isinstance(start, datetime) else start
+        if not isinstance(start, datetime):
+            start = start_of_day(start)
+        if not isinstance(end, datetime):
+            end = start_of_day(end + timedelta(days=1))
+
+        if end <= start or end - start > timedelta(days=MAX_AVAILABILITY_DAYS):
+            return Response(
+                {'error': f'Intervalo inválido: to deve ser depois de from, com até {MAX_AVAILABILITY_DAYS} dias'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        logger.info("Usuário %s consultou disponibilidade de %s profissionais", request.user.username, len(worker_ids))
+
+        date_field = DateTimeField()
+        slots = free_slots(worker_ids, start, end, slot)
+        results = [
+            {
+                'healthcare_worker': worker_id,
+                'slots': [date_field.to_representation(value) for value in slots[worker_id]],
+            }
+            for worker_id in worker_ids
+        ]
+
+        slot_minutes = int(slot.total_seconds() // 60)
+        if pk is not None:
+            return Response({'slot_minutes': slot_minutes, **results[0]})
+        return Response({'slot_minutes': slot_minutes, 'results': results})
+
+
+class HealthcareWorkerScheduleView(generics.GenericAPIView):
+    """
+    Agenda de um profissional em um dia (`?date=AAAA-MM-DD`, padrão: hoje),
+    servida do cache enquanto nenhuma consulta daquele dia mudar.
+    """
+    permission_classes = [IsAuthenticated]
+    queryset = HealthcareWorker.objects.all()
+
+    def get(self, request, pk, *args, **kwargs):
+        day = parse_date_param(request.query_params, 'date') or timezone.localdate()
+        if isinstance(day, datetime):
+            day = timezone.localtime(day).date()
+
+        try:
+            schedule = get_day_schedule(pk, day)
+        except HealthcareWorker.DoesNotExist:
+            return Response(
+                {'error': 'Profissional não encontrado'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response({
+            'healthcare_worker': pk,
+            'date': day.isoformat(),
+            'consultations': schedule,
+        })
+
+
+class HealthcareWorkerStatsView(generics.GenericAPIView):
+    """
+    Painel de um profissional: consultas por dia, semana ou mês
+    (`?period=`, padrão: day) e distribuição de idades dos pacientes, entre
+    `?from=` e `?to=` (inclusivos). Lê só o resumo ConsultationStats, nunca
+    a tabela de consultas.
+    """
+    permission_classes = [IsAuthenticated]
+    queryset = HealthcareWorker.objects.all()
+
+    def get(self, request, pk, *args, **kwargs):
+        period = request.query_params.get('period', 'day')
+        if period not in PERIODS:
+            raise ValidationError({'period': f"Use {', '.join(PERIODS)}."})
+
+        start, end = (parse_date_param(request.query_params, name) for name in ('from', 'to'))
+        start, end = (
+            timezone.localtime(value).date() if isinstance(value, datetime) else value
+            for value in (start, end)
+        )
+
+        stats = worker_stats(pk, start, end, period)
+        if not stats['total'] and not HealthcareWorker.objects.filter(pk=pk).exists():
+            return Response(
+                {'error': 'Profissional não encontrado'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response({
+            'healthcare_worker': pk,
+            'period': period,
+            'from': start and start.isoformat(),
+            'to': end and end.isoformat(),
+            **stats,
+        })
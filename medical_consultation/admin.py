@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import MedicalConsultation
+from .models import ConsultationStats, MedicalConsultation
 
 
 @admin.register(MedicalConsultation)
@@ -17,3 +17,12 @@ class MedicalConsultationAdmin(admin.ModelAdmin):
     list_filter = ('healthcare_worker', 'consultation_date', 'created_at')
     ordering = ('-consultation_date',)
     list_per_page = 20
+
+
+@admin.register(ConsultationStats)
+class ConsultationStatsAdmin(admin.ModelAdmin):
+    list_display = ('healthcare_worker', 'day', 'age_bucket', 'count')
+    list_filter = ('age_bucket', 'day')
+    search_fields = ('healthcare_worker__name',)
+    ordering = ('-day',)
+    list_per_page = 20
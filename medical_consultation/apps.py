@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MedicalConsultationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'medical_consultation'
+
+    def ready(self):
+        from . import signals  # noqa: F401
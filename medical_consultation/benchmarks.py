@@ -0,0 +1,209 @@
+import random
+from datetime import datetime, time, timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from app.compression import ENCODINGS, available_encodings
+from app.pagination import encode_position
+from app.parsers import ORJSONParser
+from app.renderers import ORJSONRenderer
+from app.rows import compile_row_encoder
+from healthcare_workers.models import HealthcareWorker
+from .models import MedicalConsultation
+from .seeding import (
+    CONSULTATION_COLUMNS,
+    WORKER_COLUMNS,
+    consultation_rows,
+    insert_rows,
+    worker_rows,
+)
+from .serializers import MedicalConsultationSerializer
+from .views import MedicalConsultationListCreateView, MedicalConsultationRetrieveUpdateDestroyView
+
+
+WORKERS = 100
+PAGE_SIZE = 100
+
+
+def get_worker_ids():
+    worker_ids = list(HealthcareWorker.objects.order_by('id').values_list('id', flat=True)[:WORKERS])
+    if len(worker_ids) < WORKERS:
+        rows = worker_rows(random.Random(0), WORKERS - len(worker_ids), start=len(worker_ids))
+        insert_rows(HealthcareWorker, WORKER_COLUMNS, rows, batch_size=WORKERS)
+        worker_ids = list(HealthcareWorker.objects.order_by('id').values_list('id', flat=True)[:WORKERS])
+    return worker_ids
+
+
+def seed_consultations(count):
+    """Completa a tabela até `count` consultas, sem conflito de horário"""
+    existing = MedicalConsultation.objects.count()
+    rows = consultation_rows(
+        random.Random(existing), max(count - existing, 0), get_worker_ids(),
+        timezone.localdate() + timedelta(days=1), start=existing
+    )
+    insert_rows(MedicalConsultation, CONSULTATION_COLUMNS, rows, batch_size=10000)
+
+
+def as_row(instance, columns):
+    """Dict no formato de `.values(*columns)` a partir de uma instância"""
+    row = {}
+    for column in columns:
+        value = instance
+        for name in column.split('__'):
+            value = getattr(value, name)
+        row[column] = value
+    return row
+
+
+def bench_serializer(bench):
+    worker = HealthcareWorker.objects.get(id=get_worker_ids()[0])
+    consultation_date = timezone.make_aware(
+        datetime.combine(timezone.localdate() + timedelta(days=400), time(10))
+    )
+    data = {
+        'patient_name': 'joão silva',
+        'age': 30,
+        'healthcare_worker': worker.id,
+        'consultation_date': consultation_date.isoformat(),
+    }
+    bench.measure(
+        'medical_consultation.serializer.validate',
+        lambda: MedicalConsultationSerializer(data=data).is_valid(raise_exception=True)
+    )
+
+    instances = [
+        MedicalConsultation(
+            id=index,
+            patient_name='João Silva',
+            age=30,
+            healthcare_worker=worker,
+            consultation_date=consultation_date,
+            created_at=consultation_date,
+            updated_at=consultation_date,
+        )
+        for index in range(1000)
+    ]
+    bench.measure(
+        'medical_consultation.serializer.serialize',
+        lambda: MedicalConsultationSerializer(instances, many=True).data,
+        ops=len(instances)
+    )
+    bench.measure(
+        'medical_consultation.serializer.serialize_expanded',
+        lambda: MedicalConsultationSerializer(
+            instances, many=True, context={'expand': {'healthcare_worker'}}
+        ).data,
+        ops=len(instances)
+    )
+
+    # Mesmas linhas como dicts de .values(), montadas pelo RowEncoder das listas
+    for name, expand in (('encode', frozenset()), ('encode_expanded', frozenset({'healthcare_worker'}))):
+        encoder = compile_row_encoder(MedicalConsultationSerializer, None, expand)
+        rows = [as_row(instance, encoder.columns) for instance in instances]
+        bench.measure(
+            f'medical_consultation.rows.{name}',
+            lambda encoder=encoder, rows=rows: encoder.encode_many(rows),
+            ops=len(rows)
+        )
+
+    # Codificação de uma lista grande já serializada: json do DRF x orjson
+    page = {'next': None, 'previous': None, 'results': MedicalConsultationSerializer(
+        instances, many=True, context={'expand': {'healthcare_worker'}}
+    ).data}
+    for name, renderer in (('drf', JSONRenderer()), ('orjson', ORJSONRenderer())):
+        bench.measure(
+            f'medical_consultation.render.{name}',
+            lambda renderer=renderer: renderer.render(page),
+            ops=len(instances)
+        )
+    body = JSONRenderer().render(page)
+    for name, parser in (('drf', JSONParser()), ('orjson', ORJSONParser())):
+        bench.measure(
+            f'medical_consultation.parse.{name}',
+            lambda parser=parser: parser.parse(BytesIO(body)),
+            ops=len(instances)
+        )
+
+    # Compressão da mesma página em cada codificação instalada, no nível configurado
+    for encoding in available_encodings():
+        _, compress, _ = ENCODINGS[encoding]
+        level = settings.COMPRESSION_LEVELS[encoding]
+        bench.measure(
+            f'medical_consultation.compress.{encoding}',
+            lambda compress=compress, level=level: compress(body, level),
+            ops=len(instances)
+        )
+
+
+def bench_views(bench):
+    factory = APIRequestFactory()
+    user, _ = User.objects.get_or_create(username='benchmark')
+    list_view = MedicalConsultationListCreateView.as_view()
+    serializer_list_view = MedicalConsultationListCreateView.as_view(use_row_encoder=False)
+    detail_view = MedicalConsultationRetrieveUpdateDestroyView.as_view()
+
+    def get(view, params=None, **kwargs):
+        request = factory.get('/api/v1/medicalconsultation/', params)
+        force_authenticate(request, user=user)
+        response = view(request, **kwargs)
+        response.render()
+        assert response.status_code == 200, response.status_code
+
+    for size in bench.sizes:
+        seed_consultations(size)
+
+        bench.measure(
+            f'medical_consultation.list.first_page[{size}]',
+            lambda: get(list_view, {'page_size': PAGE_SIZE}),
+            ops=PAGE_SIZE
+        )
+        bench.measure(
+            f'medical_consultation.list.first_page_expanded[{size}]',
+            lambda: get(list_view, {'page_size': PAGE_SIZE, 'expand': 'healthcare_worker'}),
+            ops=PAGE_SIZE
+        )
+
+        # Mesma página pelo ModelSerializer, para comparar com o caminho via .values()
+        bench.measure(
+            f'medical_consultation.list.first_page_serializer[{size}]',
+            lambda: get(serializer_list_view, {'page_size': PAGE_SIZE}),
+            ops=PAGE_SIZE
+        )
+        bench.measure(
+            f'medical_consultation.list.first_page_expanded_serializer[{size}]',
+            lambda: get(serializer_list_view, {'page_size': PAGE_SIZE, 'expand': 'healthcare_worker'}),
+            ops=PAGE_SIZE
+        )
+
+        # Consulta mais comum: um profissional em um período (índice único worker + data)
+        first_day = timezone.localdate() + timedelta(days=1)
+        worker_range = {
+            'page_size': PAGE_SIZE,
+            'worker': get_worker_ids()[0],
+            'from': first_day.isoformat(),
+            'to': (first_day + timedelta(days=30)).isoformat(),
+        }
+        bench.measure(
+            f'medical_consultation.list.worker_range[{size}]',
+            lambda: get(list_view, worker_range)
+        )
+
+        consultation_date, pk = MedicalConsultation.objects.order_by(
+            '-consultation_date', 'id'
+        ).values_list('consultation_date', 'id')[max(size - PAGE_SIZE - 1, 0)]
+        cursor = encode_position([consultation_date.isoformat(), pk])
+        bench.measure(
+            f'medical_consultation.list.last_page[{size}]',
+            lambda: get(list_view, {'page_size': PAGE_SIZE, 'cursor': cursor})
+        )
+
+        bench.measure(
+            f'medical_consultation.detail[{size}]',
+            lambda: get(detail_view, pk=pk)
+        )
@@ -0,0 +1,79 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+def parse_date_param(params, name):
+    """
+    Lê da query string uma data (AAAA-MM-DD), retornada como `date`, ou uma
+    data e hora ISO 8601, retornada como `datetime` com fuso.
+    """
+    value = params.get(name)
+    if not value:
+        return None
+
+    try:
+        parsed = parse_date(value) or parse_datetime(value)
+    except ValueError:
+        parsed = None
+
+    if parsed is None:
+        raise ValidationError({name: 'Data inválida. Use AAAA-MM-DD ou data e hora ISO 8601.'})
+
+    if isinstance(parsed, datetime) and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def parse_int_param(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: 'Deve ser um número inteiro.'})
+
+
+def filter_consultations(queryset, params):
+    """
+    Aplica os filtros `worker`, `from`, `to`, `age_min` e `age_max` da query
+    string.
+
+    `to` com data e hora é inclusivo; só com a data, cobre o dia inteiro.
+    As idades são inclusivas. `worker` com período usa o índice único
+    (healthcare_worker, consultation_date); só o período, o índice
+    consultation_date_id_idx.
+    """
+    worker = parse_int_param(params, 'worker')
+    if worker is not None:
+        queryset = queryset.filter(healthcare_worker_id=worker)
+
+    date_from = parse_date_param(params, 'from')
+    if isinstance(date_from, datetime):
+        queryset = queryset.filter(consultation_date__gte=date_from)
+    elif date_from is not None:
+        queryset = queryset.filter(consultation_date__gte=start_of_day(date_from))
+
+    date_to = parse_date_param(params, 'to')
+    if isinstance(date_to, datetime):
+        queryset = queryset.filter(consultation_date__lte=date_to)
+    elif date_to is not None:
+        queryset = queryset.filter(consultation_date__lt=start_of_day(date_to + timedelta(days=1)))
+
+    age_min = parse_int_param(params, 'age_min')
+    if age_min is not None:
+        queryset = queryset.filter(age__gte=age_min)
+
+    age_max = parse_int_param(params, 'age_max')
+    if age_max is not None:
+        queryset = queryset.filter(age__lte=age_max)
+
+    return queryset
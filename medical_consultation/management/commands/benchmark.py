@@ -0,0 +1,93 @@
+import json
+import logging
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from app.benchmark import Benchmark, compare, load_report, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Roda os benchmarks (módulos benchmarks.py dos apps) em um banco de '
+        'teste, grava o resultado em JSON e compara com um baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('app_label', nargs='*', help='Apps a medir (padrão: todos)')
+        parser.add_argument(
+            '--sizes', default='1000,10000,100000',
+            help='Quantidades de linhas para as views, separadas por vírgula (padrão: 1000,10000,100000)'
+        )
+        parser.add_argument('-k', '--filter', dest='pattern', help='Só benchmarks cujo nome contém este texto')
+        parser.add_argument('--repeat', type=int, default=5, help='Rodadas por benchmark (padrão: 5)')
+        parser.add_argument('--min-time', type=float, default=0.2, help='Duração mínima de cada rodada em segundos')
+        parser.add_argument('--output', help='Arquivo JSON para gravar o resultado')
+        parser.add_argument('--baseline', help='Resultado anterior (JSON) para comparar')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Falha se algum benchmark ficar mais lento que isso em relação ao baseline (padrão: 0.2 = 20%%)'
+        )
+        parser.add_argument('--keepdb', action='store_true', help='Reaproveita o banco de teste (e os dados semeados)')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError('--sizes deve ser uma lista de inteiros')
+        if not sizes or min(sizes) < 1:
+            raise CommandError('--sizes deve ter valores positivos')
+
+        baseline = load_report(options['baseline']) if options['baseline'] else None
+
+        bench = Benchmark(
+            sizes=sizes,
+            repeat=options['repeat'],
+            min_time=options['min_time'],
+            pattern=options['pattern'],
+            stdout=self.stdout,
+        )
+
+        # Banco de teste (SQLite ou PostgreSQL, conforme DATABASES) e DEBUG
+        # desligado, como nos testes; os INFO de acesso das views ficam de fora
+        setup_test_environment(debug=False)
+        old_config = setup_databases(
+            verbosity=options['verbosity'], interactive=False, keepdb=options['keepdb']
+        )
+        logging.disable(logging.INFO)
+        try:
+            report = run_benchmarks(bench, options['app_label'])
+        finally:
+            logging.disable(logging.NOTSET)
+            teardown_databases(old_config, verbosity=options['verbosity'], keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+            self.stdout.write(f"Resultado gravado em {options['output']}")
+
+        if baseline is None:
+            return
+
+        rows, regressions = compare(report, baseline, options['threshold'])
+        self.stdout.write('')
+        for name, previous, current, change in rows:
+            if change is None:
+                self.stdout.write(f'{name}: {current * 1000:.3f} ms (novo)')
+                continue
+            line = f'{name}: {previous * 1000:.3f} ms -> {current * 1000:.3f} ms ({change:+.1%})'
+            if name in regressions:
+                line = self.style.ERROR(f'{line} REGRESSÃO')
+            self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(
+                f'{len(regressions)} benchmarks mais de {options["threshold"]:.0%} mais lentos que o baseline'
+            )
+        self.stdout.write(self.style.SUCCESS('Nenhuma regressão em relação ao baseline'))
@@ -0,0 +1,103 @@
+import http.client
+import json
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+TOKEN_PATH = '/api/v1/authentication/token/'
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera carga concorrente (GET) contra um servidor já rodando e mostra '
+        'vazão e latências. Usado para comparar o deploy WSGI com o ASGI.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='URL completa, ex.: http://127.0.0.1:8000/api/v1/medicalconsultation/')
+        parser.add_argument('--concurrency', type=int, default=50, help='Clientes simultâneos (padrão: 50)')
+        parser.add_argument('--duration', type=float, default=10, help='Duração em segundos (padrão: 10)')
+        parser.add_argument('--token', help='Access token JWT')
+        parser.add_argument('--username', help='Usuário para obter o token (se --token não for informado)')
+        parser.add_argument('--password', help='Senha do usuário')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('Use uma URL http:// completa')
+        if options['concurrency'] < 1 or options['duration'] <= 0:
+            raise CommandError('--concurrency e --duration devem ser positivos')
+
+        target = url.path + (f'?{url.query}' if url.query else '')
+        token = options['token'] or self.obtain_token(url, options['username'], options['password'])
+        headers = {'Authorization': f'Bearer {token}', 'Accept': 'application/json'}
+
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options['duration']
+
+        def client():
+            # Uma conexão keep-alive por cliente, como um navegador ou proxy
+            connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+            local_latencies = []
+            local_errors = 0
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    connection.request('GET', target, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    if response.status != 200:
+                        local_errors += 1
+                except (OSError, http.client.HTTPException):
+                    local_errors += 1
+                    connection.close()
+                    continue
+                local_latencies.append(time.perf_counter() - started)
+            connection.close()
+            with lock:
+                latencies.extend(local_latencies)
+                errors.append(local_errors)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client) for _ in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        if not latencies:
+            raise CommandError('Nenhuma requisição completou')
+
+        quantiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(latencies)} requisições em {elapsed:.1f}s com {options["concurrency"]} clientes — '
+            f'{len(latencies) / elapsed:.0f} req/s, {sum(errors)} erros'
+        ))
+        self.stdout.write(
+            f'latência p50 {quantiles[49] * 1000:.1f}ms, p95 {quantiles[94] * 1000:.1f}ms, '
+            f'p99 {quantiles[98] * 1000:.1f}ms'
+        )
+
+    def obtain_token(self, url, username, password):
+        if not username or not password:
+            raise CommandError('Informe --token ou --username e --password')
+
+        connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+        connection.request(
+            'POST', TOKEN_PATH,
+            body=json.dumps({'username': username, 'password': password}),
+            headers={'Content-Type': 'application/json'}
+        )
+        response = connection.getresponse()
+        body = response.read()
+        connection.close()
+        if response.status != 200:
+            raise CommandError(f'Falha ao obter token ({response.status})')
+        return json.loads(body)['access']
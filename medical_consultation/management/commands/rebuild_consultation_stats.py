@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from medical_consultation.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula o resumo de consultas por profissional (ConsultationStats) '
+        'a partir da tabela de consultas e corrige as linhas divergentes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--worker', type=int, help='Só o profissional com este id')
+
+    def handle(self, *args, **options):
+        fixed = rebuild_stats(options['worker'])
+        self.stdout.write(self.style.SUCCESS(f'{fixed} linhas do resumo corrigidas'))
@@ -0,0 +1,81 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from medical_consultation.seeding import seed
+from medical_consultation.stats import rebuild_stats
+
+
+METHODS = ('copy', 'insert', 'bulk')
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera profissionais e consultas sintéticos (nomes brasileiros, '
+        'telefones válidos, horários sem conflito no horário comercial). '
+        'A mesma semente e data inicial geram os mesmos dados.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1000, help='Profissionais a criar (padrão: 1000)')
+        parser.add_argument('--consultations', type=int, default=100000, help='Consultas a criar (padrão: 100000)')
+        parser.add_argument('--seed', type=int, default=0, help='Semente do gerador (padrão: 0)')
+        parser.add_argument('--start', help='Primeiro dia das consultas, AAAA-MM-DD (padrão: hoje)')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Linhas por lote (padrão: 10000)')
+        parser.add_argument(
+            '--method', choices=METHODS,
+            help='copy (COPY FROM STDIN, só PostgreSQL), insert (executemany) ou bulk (bulk_create). '
+                 'Padrão: copy no PostgreSQL, insert nos demais'
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 0 or options['consultations'] < 0:
+            raise CommandError('--workers e --consultations não podem ser negativos')
+        if options['consultations'] and not options['workers']:
+            raise CommandError('As consultas são distribuídas entre os profissionais criados; use --workers > 0')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size deve ser maior que zero')
+
+        method = options['method'] or ('copy' if connection.vendor == 'postgresql' else 'insert')
+        if method == 'copy' and connection.vendor != 'postgresql':
+            raise CommandError('--method copy só funciona no PostgreSQL')
+
+        start_date = None
+        if options['start']:
+            try:
+                start_date = date.fromisoformat(options['start'])
+            except ValueError:
+                raise CommandError('--start deve estar no formato AAAA-MM-DD')
+
+        self.verbosity = options['verbosity']
+        self.started = time.perf_counter()
+
+        with transaction.atomic():
+            workers, consultations = seed(
+                options['workers'],
+                options['consultations'],
+                random_seed=options['seed'],
+                start_date=start_date,
+                batch_size=options['batch_size'],
+                method=method,
+                progress=self.progress,
+            )
+            # COPY e executemany não passam pelos signals: o resumo é refeito aqui
+            if consultations:
+                rebuild_stats()
+
+        elapsed = time.perf_counter() - self.started
+        total = workers + consultations
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'{workers} profissionais e {consultations} consultas criados ({method}) '
+            f'em {elapsed:.1f}s — {rate:,.0f} linhas/s'
+        ))
+
+    def progress(self, label, written, total):
+        if self.verbosity < 1:
+            return
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(f'{label}: {written:,}/{total:,} ({elapsed:.1f}s)')
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('healthcare_workers', '0002_healthcareworker_name_id_idx'),
+        ('medical_consultation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='medicalconsultation',
+            index=models.Index(fields=['-consultation_date', 'id'], name='consultation_date_id_idx'),
+        ),
+    ]
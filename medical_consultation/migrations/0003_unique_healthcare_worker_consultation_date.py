@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('healthcare_workers', '0002_healthcareworker_name_id_idx'),
+        ('medical_consultation', '0002_medicalconsultation_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='medicalconsultation',
+            constraint=models.UniqueConstraint(fields=('healthcare_worker', 'consultation_date'), name='unique_healthcare_worker_consultation_date'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical_consultation', '0003_unique_healthcare_worker_consultation_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicalconsultation',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:23
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+AGE_BUCKETS = (0, 18, 30, 45, 60)
+
+
+def fill_stats(apps, schema_editor):
+    """Monta o resumo com as consultas que já existem"""
+    MedicalConsultation = apps.get_model('medical_consultation', 'MedicalConsultation')
+    ConsultationStats = apps.get_model('medical_consultation', 'ConsultationStats')
+
+    counts = Counter()
+    rows = MedicalConsultation.objects.values_list('healthcare_worker_id', 'consultation_date', 'age')
+    for worker_id, consultation_date, age in rows.iterator(chunk_size=10000):
+        bucket = max(lower for lower in AGE_BUCKETS if lower <= age)
+        counts[(worker_id, timezone.localtime(consultation_date).date(), bucket)] += 1
+
+    ConsultationStats.objects.bulk_create(
+        [
+            ConsultationStats(healthcare_worker_id=worker_id, day=day, age_bucket=bucket, count=count)
+            for (worker_id, day, bucket), count in counts.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('healthcare_workers', '0005_healthcareworker_email_lower_unique'),
+        ('medical_consultation', '0004_medicalconsultation_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsultationStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('age_bucket', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('healthcare_worker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consultation_stats', to='healthcare_workers.healthcareworker')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('healthcare_worker', 'day', 'age_bucket'), name='unique_consultation_stats_worker_day_age_bucket')],
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
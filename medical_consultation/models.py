@@ -9,9 +9,60 @@ class MedicalConsultation(models.Model):
     healthcare_worker = models.ForeignKey(HealthcareWorker, on_delete=models.PROTECT, related_name='medical_consultations')
     consultation_date = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # Um profissional não pode ter duas consultas no mesmo horário
+            models.UniqueConstraint(
+                fields=['healthcare_worker', 'consultation_date'],
+                name='unique_healthcare_worker_consultation_date'
+            ),
+        ]
+        indexes = [
+            # Suporta a paginação por cursor da listagem
+            models.Index(fields=['-consultation_date', 'id'], name='consultation_date_id_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Horário como está no banco, para invalidar o cache da agenda antiga
+        # quando a consulta muda de dia ou de profissional (ver signals)
+        instance._loaded_slot = (
+            instance.__dict__.get('healthcare_worker_id'),
+            instance.__dict__.get('consultation_date'),
+        )
+        # Idem para tirar a consulta da linha certa do resumo (ver stats)
+        instance._loaded_stats = instance._loaded_slot + (instance.__dict__.get('age'),)
+        return instance
 
     def __str__(self):
         if self.patient_preferred_name:
             return self.patient_preferred_name
         else:
             return self.patient_name
+
+
+class ConsultationStats(models.Model):
+    """
+    Resumo das consultas por profissional, dia (no fuso local) e faixa de
+    idade do paciente, mantido a cada consulta gravada ou removida (ver
+    signals) e recalculável com `manage.py rebuild_consultation_stats`.
+    """
+    healthcare_worker = models.ForeignKey(HealthcareWorker, on_delete=models.CASCADE, related_name='consultation_stats')
+    day = models.DateField()
+    # Menor idade da faixa (ver stats.AGE_BUCKETS)
+    age_bucket = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['healthcare_worker', 'day', 'age_bucket'],
+                name='unique_consultation_stats_worker_day_age_bucket'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.healthcare_worker_id} {self.day} {self.age_bucket}+: {self.count}'
@@ -0,0 +1,5 @@
+from app.pagination import KeysetPagination
+
+
+class MedicalConsultationPagination(KeysetPagination):
+    ordering = ('-consultation_date', 'id')
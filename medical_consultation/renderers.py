@@ -0,0 +1,53 @@
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from app.renderers import orjson, orjson_dumps
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Um objeto JSON por linha (usado pela exportação de consultas)"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(json_line(row) for row in rows).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        if not rows:
+            return b''
+
+        buffer = Echo()
+        writer = csv.writer(buffer)
+        header = list(rows[0])
+        lines = [writer.writerow(header)]
+        lines.extend(writer.writerow([row.get(key) for key in header]) for row in rows)
+        return ''.join(lines).encode(self.charset)
+
+
+class Echo:
+    """Objeto com `write` que só devolve a linha, para o csv.writer em streaming"""
+
+    def write(self, value):
+        return value
+
+
+def json_line(row):
+    if orjson is not None:
+        return orjson_dumps(row, JSONEncoder, orjson.OPT_APPEND_NEWLINE).decode()
+    return json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n'
@@ -0,0 +1,74 @@
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from healthcare_workers.models import HealthcareWorker
+from .filters import start_of_day
+from .models import MedicalConsultation
+from .serializers import MedicalConsultationSerializer
+
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def schedule_cache_key(worker_id, day):
+    return f'schedule:{worker_id}:{day.isoformat()}'
+
+
+def schedule_day(consultation_date):
+    """Dia da agenda (no fuso local) a que pertence uma consulta"""
+    return timezone.localtime(consultation_date).date()
+
+
+def get_day_schedule(worker_id, day):
+    """
+    Consultas de um profissional em um dia, já serializadas.
+
+    O resultado fica no cache até que alguma consulta daquele profissional e
+    daquele dia seja criada, alterada ou removida (ver signals). Levanta
+    HealthcareWorker.DoesNotExist se o profissional não existir.
+    """
+    key = schedule_cache_key(worker_id, day)
+    schedule = cache.get(key)
+    if schedule is not None:
+        _count('hits')
+        return schedule
+
+    _count('misses')
+    queryset = MedicalConsultation.objects.filter(
+        healthcare_worker_id=worker_id,
+        consultation_date__gte=start_of_day(day),
+        consultation_date__lt=start_of_day(day + timedelta(days=1)),
+    ).order_by('consultation_date')
+    schedule = MedicalConsultationSerializer(queryset, many=True).data
+
+    if not schedule and not HealthcareWorker.objects.filter(pk=worker_id).exists():
+        raise HealthcareWorker.DoesNotExist
+
+    cache.set(key, schedule, settings.SCHEDULE_CACHE_TIMEOUT)
+    return schedule
+
+
+def invalidate_day_schedules(slots):
+    """Remove do cache as agendas de uma lista de (worker_id, consultation_date)"""
+    keys = {
+        schedule_cache_key(worker_id, schedule_day(consultation_date))
+        for worker_id, consultation_date in slots
+        if worker_id is not None and consultation_date is not None
+    }
+    if keys:
+        cache.delete_many(keys)
+
+
+def schedule_cache_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
@@ -0,0 +1,226 @@
+"""
+Geração de dados sintéticos (profissionais e consultas) para testes de
+carga e benchmarks. Tudo sai de um `random.Random` com semente, então a
+mesma semente gera as mesmas linhas.
+"""
+import csv
+import io
+import random
+import unicodedata
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+
+from django.db import connection
+from django.utils import timezone
+
+from healthcare_workers.models import HealthcareWorker
+from .models import MedicalConsultation
+from .serializers import BUSINESS_HOURS_END, BUSINESS_HOURS_START
+
+
+FIRST_NAMES = (
+    'Ana', 'Antônio', 'Beatriz', 'Bruno', 'Camila', 'Carlos', 'Daniela', 'Diego',
+    'Eduarda', 'Eduardo', 'Fernanda', 'Francisco', 'Gabriela', 'Gustavo', 'Helena',
+    'Igor', 'Isabela', 'João', 'Juliana', 'Lucas', 'Luana', 'Luiz', 'Marcos', 'Maria',
+    'Mariana', 'Matheus', 'Natália', 'Paulo', 'Pedro', 'Rafael', 'Raquel', 'Renata',
+    'Ricardo', 'Rodrigo', 'Sabrina', 'Sérgio', 'Tatiane', 'Thiago', 'Vanessa', 'Vinícius',
+)
+SURNAMES = (
+    'Almeida', 'Alves', 'Araújo', 'Barbosa', 'Cardoso', 'Carvalho', 'Castro', 'Costa',
+    'Dias', 'Fernandes', 'Ferreira', 'Gomes', 'Lima', 'Lopes', 'Machado', 'Martins',
+    'Melo', 'Mendes', 'Moreira', 'Nascimento', 'Oliveira', 'Pereira', 'Ramos', 'Reis',
+    'Ribeiro', 'Rocha', 'Rodrigues', 'Santos', 'Silva', 'Souza', 'Teixeira', 'Vieira',
+)
+PREFERRED_NAMES = (
+    'Alex', 'Ariel', 'Cris', 'Dani', 'Gabi', 'Jô', 'Kim', 'Lu', 'Nic', 'Sam', 'Tati', 'Val',
+)
+PROFESSIONS = (
+    'Clínico Geral', 'Cardiologista', 'Dermatologista', 'Endocrinologista', 'Fisioterapeuta',
+    'Ginecologista', 'Infectologista', 'Nutricionista', 'Pediatra', 'Psicólogo',
+    'Psiquiatra', 'Urologista',
+)
+STREETS = (
+    'Rua das Flores', 'Avenida Paulista', 'Rua da Consolação', 'Avenida Brasil',
+    'Rua Augusta', 'Avenida Sete de Setembro', 'Rua XV de Novembro', 'Avenida Afonso Pena',
+    'Rua da Bahia', 'Avenida Boa Viagem',
+)
+CITIES = (
+    ('São Paulo', 'SP', 11), ('Rio de Janeiro', 'RJ', 21), ('Belo Horizonte', 'MG', 31),
+    ('Salvador', 'BA', 71), ('Recife', 'PE', 81), ('Porto Alegre', 'RS', 51),
+    ('Curitiba', 'PR', 41), ('Fortaleza', 'CE', 85), ('Belém', 'PA', 91), ('Goiânia', 'GO', 62),
+)
+
+WORKER_COLUMNS = (
+    'name', 'preferred_name', 'profession', 'address', 'phone', 'email', 'created_at', 'updated_at',
+)
+CONSULTATION_COLUMNS = (
+    'patient_name', 'patient_preferred_name', 'age', 'healthcare_worker_id',
+    'consultation_date', 'created_at', 'updated_at',
+)
+
+SLOT_MINUTES = 30
+# Horários de 8h até 18h em ponto (inclusive), de 30 em 30 minutos
+SLOTS_PER_DAY = (BUSINESS_HOURS_END - BUSINESS_HOURS_START) * 60 // SLOT_MINUTES + 1
+
+
+def person_name(rng):
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)} {rng.choice(SURNAMES)}'
+
+
+def worker_rows(rng, count, start=0):
+    """Tuplas na ordem de WORKER_COLUMNS; `start` mantém os emails únicos entre execuções"""
+    now = timezone.now()
+    for index in range(start, start + count):
+        name = person_name(rng)
+        title = rng.choice(('Dr.', 'Dra.'))
+        city, state, area_code = rng.choice(CITIES)
+        first, last = name.split()[0], name.split()[-1]
+        yield (
+            f'{title} {name}',
+            rng.choice(PREFERRED_NAMES) if rng.random() < 0.1 else None,
+            rng.choice(PROFESSIONS),
+            f'{rng.choice(STREETS)}, {rng.randint(1, 3000)} - {city}/{state}',
+            f'({area_code}) 9{rng.randint(1000, 9999)}-{rng.randint(0, 9999):04d}',
+            f'{_ascii(first)}.{_ascii(last)}.{index}@exemplo.com.br',
+            now,
+            now,
+        )
+
+
+def business_days(start):
+    day = start
+    while True:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+def consultation_rows(rng, count, worker_ids, start_date, start=0):
+    """
+    Tuplas na ordem de CONSULTATION_COLUMNS. A consulta `i` vai para o
+    profissional `i % len(worker_ids)`, no próximo horário livre dele (dias
+    úteis, de 30 em 30 minutos no horário comercial), então não há conflito.
+    Com `start`, continua a sequência de uma geração anterior.
+    """
+    now = timezone.now()
+    workers = len(worker_ids)
+    days = business_days(start_date)
+    day_starts = []
+    opening = time(BUSINESS_HOURS_START)
+
+    for index in range(start, start + count):
+        slot = index // workers
+        day_index, slot_in_day = divmod(slot, SLOTS_PER_DAY)
+        while len(day_starts) <= day_index:
+            day_starts.append(timezone.make_aware(datetime.combine(next(days), opening)))
+
+        yield (
+            person_name(rng),
+            rng.choice(PREFERRED_NAMES) if rng.random() < 0.05 else None,
+            rng.randint(0, 95),
+            worker_ids[index % workers],
+            day_starts[day_index] + timedelta(minutes=SLOT_MINUTES * slot_in_day),
+            now,
+            now,
+        )
+
+
+def _ascii(value):
+    return unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode().lower()
+
+
+def insert_rows(model, columns, rows, batch_size, method='insert', progress=None):
+    """
+    Grava as linhas em lotes. `progress(n)` é chamado a cada lote com o
+    total gravado até ali. Métodos:
+
+    - `copy`: COPY FROM STDIN (só PostgreSQL, psycopg2 ou psycopg 3)
+    - `insert`: executemany de INSERTs, sem instanciar modelos
+    - `bulk`: bulk_create, o mais lento
+    """
+    # Datas e horas se repetem muito (mesmo horário para vários
+    # profissionais, mesmo created_at); a conversão é feita uma vez por valor
+    adapt_datetime = lru_cache(maxsize=65536)(
+        connection.ops.adapt_datetimefield_value if method == 'insert' else datetime.isoformat
+    )
+
+    def adapt(row):
+        return tuple(adapt_datetime(value) if isinstance(value, datetime) else value for value in row)
+
+    written = 0
+    batch = []
+    for row in rows:
+        batch.append(row if method == 'bulk' else adapt(row))
+        if len(batch) >= batch_size:
+            written += _write_batch(model, columns, batch, method)
+            batch = []
+            if progress:
+                progress(written)
+    if batch:
+        written += _write_batch(model, columns, batch, method)
+        if progress:
+            progress(written)
+    return written
+
+
+def _write_batch(model, columns, batch, method):
+    if method == 'bulk':
+        model.objects.bulk_create([model(**dict(zip(columns, row))) for row in batch])
+        return len(batch)
+
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    column_list = ', '.join(quote(column) for column in columns)
+
+    with connection.cursor() as cursor:
+        if method == 'insert':
+            placeholders = ', '.join(['%s'] * len(columns))
+            cursor.executemany(f'INSERT INTO {table} ({column_list}) VALUES ({placeholders})', batch)
+            return len(batch)
+
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        sql = f'COPY {table} ({column_list}) FROM STDIN WITH (FORMAT csv)'
+        raw = cursor.cursor
+        if hasattr(raw, 'copy_expert'):
+            buffer.seek(0)
+            raw.copy_expert(sql, buffer)
+        else:
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+    return len(batch)
+
+
+def new_ids(model, after_id):
+    return list(model.objects.filter(id__gt=after_id).order_by('id').values_list('id', flat=True))
+
+
+def last_id(model):
+    return model.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def seed(workers, consultations, random_seed=0, start_date=None, batch_size=10000,
+         method='insert', progress=None):
+    """
+    Cria `workers` profissionais e distribui `consultations` consultas entre
+    eles. Retorna (profissionais, consultas) gravados.
+    """
+    worker_rng = random.Random(f'{random_seed}-workers')
+    consultation_rng = random.Random(f'{random_seed}-consultations')
+    start_date = start_date or timezone.localdate()
+
+    before = last_id(HealthcareWorker)
+    created_workers = insert_rows(
+        HealthcareWorker, WORKER_COLUMNS, worker_rows(worker_rng, workers, start=before),
+        batch_size, method, progress and (lambda n: progress('profissionais', n, workers))
+    )
+    worker_ids = new_ids(HealthcareWorker, before)
+
+    created_consultations = 0
+    if consultations:
+        created_consultations = insert_rows(
+            MedicalConsultation, CONSULTATION_COLUMNS,
+            consultation_rows(consultation_rng, consultations, worker_ids, start_date),
+            batch_size, method, progress and (lambda n: progress('consultas', n, consultations))
+        )
+    return created_workers, created_consultations
@@ -1,13 +1,72 @@
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from django.db import IntegrityError, transaction
 from django.utils import timezone
+from app.constraints import violates_constraint
+from app.fieldsets import SparseFieldsetSerializerMixin
+from healthcare_workers.models import HealthcareWorker
+from healthcare_workers.serializers import HealthcareWorkerSummarySerializer
 from .models import MedicalConsultation
 
 
-class MedicalConsultationSerializer(serializers.ModelSerializer):
+SLOT_CONFLICT_MESSAGE = 'Este profissional já tem uma consulta marcada neste horário!'
+SLOT_CONSTRAINT = 'unique_healthcare_worker_consultation_date'
+
+# Horário comercial: de 8h até 18h em ponto, no fuso local
+BUSINESS_HOURS_START = 8
+BUSINESS_HOURS_END = 18
+
+
+def is_business_hours(value):
+    hour = value.hour
+    minute = value.minute
+    return not (hour < BUSINESS_HOURS_START or (hour == BUSINESS_HOURS_END and minute > 0) or hour > BUSINESS_HOURS_END)
+
+
+class HealthcareWorkerField(serializers.PrimaryKeyRelatedField):
+    """
+    Quando o contexto traz `healthcare_workers` ({id: instância}, carregado
+    em uma única query), resolve o profissional sem ir ao banco por linha.
+    """
+
+    def to_internal_value(self, data):
+        healthcare_workers = self.context.get('healthcare_workers')
+        if healthcare_workers is None:
+            return super().to_internal_value(data)
+
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+        try:
+            return healthcare_workers[pk]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class MedicalConsultationSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    healthcare_worker = HealthcareWorkerField(queryset=HealthcareWorker.objects.all())
 
     class Meta:
         model = MedicalConsultation
-        fields = '__all__'
+        # Lista explícita para manter o profissional na posição de sempre
+        # (campo declarado iria para o começo com '__all__')
+        fields = (
+            'id', 'patient_name', 'patient_preferred_name', 'age',
+            'consultation_date', 'created_at', 'updated_at', 'healthcare_worker',
+        )
+        # Conflito de horário é garantido pela constraint do banco (ver save)
+        validators = []
+
+    # ?expand=healthcare_worker troca o id pelo profissional embutido
+    def get_fields(self):
+        fields = super().get_fields()
+        if 'healthcare_worker' in self.context.get('expand', ()) and 'healthcare_worker' in fields:
+            fields['healthcare_worker'] = HealthcareWorkerSummarySerializer(read_only=True)
+        return fields
 
     def validate_consultation_date(self, value):
         if value < timezone.now():
@@ -48,31 +107,30 @@ class MedicalConsultationSerializer(serializers.ModelSerializer):
         return value
 
     def validate(self, data):
-        healthcare_worker = data.get('healthcare_worker')
         consultation_date = data.get('consultation_date')
 
-        # Validar se não há consulta no mesmo horário para o mesmo médico
-        if healthcare_worker and consultation_date:
-            existing_consultation = MedicalConsultation.objects.filter(
-                healthcare_worker=healthcare_worker,
-                consultation_date=consultation_date
-            ).first()
-
-            if existing_consultation and existing_consultation.id != getattr(self.instance, 'id', None):
-                raise serializers.ValidationError(
-                    'Este profissional já tem uma consulta marcada neste horário!'
-                )
-
-        # Validar horário comercial (8h às 18h, até 17:59)
-        if consultation_date:
-            hour = consultation_date.hour
-            minute = consultation_date.minute
-            if hour < 8 or (hour == 18 and minute > 0) or hour > 18:
-                raise serializers.ValidationError(
-                    'Consultas só podem ser marcadas entre 8h e 18h.'
-                )
+        # Validar horário comercial (8h às 18h)
+        if consultation_date and not is_business_hours(consultation_date):
+            raise serializers.ValidationError(
+                'Consultas só podem ser marcadas entre 8h e 18h.'
+            )
 
         return data
 
+    # Consulta no mesmo horário para o mesmo médico é barrada pela constraint
+    # unique_healthcare_worker_consultation_date, sem consulta prévia e sem
+    # janela para corrida entre requisições simultâneas. Outras violações
+    # (FK, NOT NULL) seguem como erro.
+    def save(self, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError as exc:
+            if not violates_constraint(exc, MedicalConsultation, SLOT_CONSTRAINT):
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [SLOT_CONFLICT_MESSAGE]
+            })
+
     def update(self, instance, validated_data):
         return super().update(instance, validated_data)
@@ -0,0 +1,94 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .models import MedicalConsultation
+from .schedule import invalidate_day_schedules
+from .stats import apply_deltas, stats_key
+
+
+# Enviado após bulk_create, que não dispara post_save (argumento: consultations)
+consultations_bulk_created = Signal()
+
+
+def _invalidate(slots):
+    slots = list(slots)
+    invalidate_day_schedules(slots)
+    # De novo após o commit, para não manter o que outra requisição tenha lido
+    # antes da transação terminar
+    transaction.on_commit(lambda: invalidate_day_schedules(slots))
+
+
+def _current_slot(instance):
+    return (instance.healthcare_worker_id, instance.consultation_date)
+
+
+@receiver(post_save, sender=MedicalConsultation)
+def invalidate_schedule_on_save(sender, instance, **kwargs):
+    slots = [_current_slot(instance)]
+
+    # Consulta que mudou de dia ou de profissional sai da agenda antiga
+    loaded_slot = getattr(instance, '_loaded_slot', None)
+    if loaded_slot and loaded_slot != slots[0]:
+        slots.append(loaded_slot)
+
+    instance._loaded_slot = slots[0]
+    _invalidate(slots)
+
+
+@receiver(post_delete, sender=MedicalConsultation)
+def invalidate_schedule_on_delete(sender, instance, **kwargs):
+    slots = [_current_slot(instance)]
+    loaded_slot = getattr(instance, '_loaded_slot', None)
+    if loaded_slot:
+        slots.append(loaded_slot)
+    _invalidate(slots)
+
+
+@receiver(consultations_bulk_created)
+def invalidate_schedule_on_bulk_create(sender, consultations, **kwargs):
+    _invalidate(_current_slot(consultation) for consultation in consultations)
+
+
+def _stats_values(instance):
+    # Sem carregar campos adiados (a consulta pode já ter sido removida)
+    return tuple(instance.__dict__.get(name) for name in ('healthcare_worker_id', 'consultation_date', 'age'))
+
+
+def _loaded_stats_key(instance):
+    loaded_stats = getattr(instance, '_loaded_stats', None)
+    return stats_key(*loaded_stats) if loaded_stats else None
+
+
+# Resumo das consultas (ConsultationStats): atualizado na mesma transação da
+# gravação, para nunca contar uma consulta que acabou não sendo gravada
+
+@receiver(post_save, sender=MedicalConsultation)
+def update_stats_on_save(sender, instance, created, **kwargs):
+    values = _stats_values(instance)
+    key = stats_key(*values)
+    deltas = Counter()
+    if created:
+        deltas[key] += 1
+    else:
+        # Só muda algo se a consulta trocou de dia, profissional ou faixa de idade
+        loaded_key = _loaded_stats_key(instance)
+        if None not in (loaded_key, key) and loaded_key != key:
+            deltas[loaded_key] -= 1
+            deltas[key] += 1
+
+    instance._loaded_stats = values
+    apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=MedicalConsultation)
+def update_stats_on_delete(sender, instance, **kwargs):
+    key = _loaded_stats_key(instance) or stats_key(*_stats_values(instance))
+    apply_deltas(Counter({key: -1}))
+
+
+@receiver(consultations_bulk_created)
+def update_stats_on_bulk_create(sender, consultations, **kwargs):
+    apply_deltas(Counter(stats_key(*_stats_values(consultation)) for consultation in consultations))
@@ -0,0 +1,169 @@
+from collections import Counter
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, Count, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Greatest, TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import ConsultationStats, MedicalConsultation
+from .schedule import schedule_day
+
+
+# Faixas de idade do painel: menor idade de cada faixa, em ordem
+AGE_BUCKETS = (0, 18, 30, 45, 60)
+
+PERIODS = {
+    'day': F('day'),
+    'week': TruncWeek('day'),
+    'month': TruncMonth('day'),
+}
+
+
+def age_bucket(age):
+    """Faixa (menor idade) de uma idade"""
+    return max(lower for lower in AGE_BUCKETS if lower <= age)
+
+
+def age_bucket_label(bucket):
+    index = AGE_BUCKETS.index(bucket)
+    if index + 1 == len(AGE_BUCKETS):
+        return f'{bucket}+'
+    return f'{bucket}-{AGE_BUCKETS[index + 1] - 1}'
+
+
+def stats_key(worker_id, consultation_date, age):
+    """Linha do resumo de uma consulta, ou None se faltar algum valor"""
+    if worker_id is None or consultation_date is None or age is None:
+        return None
+    return (worker_id, schedule_day(consultation_date), age_bucket(age))
+
+
+def apply_deltas(deltas):
+    """
+    Soma a cada linha (worker_id, dia, faixa) o seu delta, criando as linhas
+    que faltam e removendo as que chegam a zero. Chaves None (consulta com
+    campos não carregados) são ignoradas; o rebuild acerta depois.
+
+    Cada linha muda com um UPDATE relativo (count = count + n), então duas
+    transações gravando consultas do mesmo dia não perdem contagens. As
+    linhas são sempre travadas na mesma ordem (a das chaves), para duas
+    transações com as mesmas linhas não se bloquearem mutuamente.
+    """
+    changes = sorted((key, delta) for key, delta in deltas.items() if key is not None and delta)
+    for (worker_id, day, bucket), delta in changes:
+        rows = ConsultationStats.objects.filter(healthcare_worker_id=worker_id, day=day, age_bucket=bucket)
+
+        if delta < 0:
+            # Nunca abaixo de zero, mesmo com o resumo defasado
+            rows.update(count=Greatest(F('count') + delta, Value(0)))
+            rows.filter(count=0).delete()
+            continue
+
+        if rows.update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                ConsultationStats.objects.create(
+                    healthcare_worker_id=worker_id, day=day, age_bucket=bucket, count=delta
+                )
+        except IntegrityError:
+            # Outra transação criou a linha entre o UPDATE e o INSERT
+            rows.update(count=F('count') + delta)
+
+
+def _age_bucket_expression():
+    return Case(
+        *[When(age__gte=lower, then=Value(lower)) for lower in reversed(AGE_BUCKETS[1:])],
+        default=Value(AGE_BUCKETS[0]),
+        output_field=IntegerField(),
+    )
+
+
+def expected_stats(worker_id=None):
+    """Contagens calculadas direto das consultas: {(worker_id, dia, faixa): n}"""
+    queryset = MedicalConsultation.objects.all()
+    if worker_id is not None:
+        queryset = queryset.filter(healthcare_worker_id=worker_id)
+
+    rows = queryset.annotate(
+        day=TruncDate('consultation_date', tzinfo=timezone.get_current_timezone()),
+        bucket=_age_bucket_expression(),
+    ).values('healthcare_worker_id', 'day', 'bucket').annotate(n=Count('id')).order_by()
+
+    return {(row['healthcare_worker_id'], row['day'], row['bucket']): row['n'] for row in rows}
+
+
+def rebuild_stats(worker_id=None):
+    """
+    Recalcula o resumo a partir das consultas (todas ou de um profissional)
+    e corrige só as linhas divergentes. Retorna quantas linhas foram
+    corrigidas.
+
+    No PostgreSQL a tabela de consultas fica travada para escrita durante o
+    recálculo, para nenhuma gravação se perder entre a leitura e a correção.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {MedicalConsultation._meta.db_table} IN SHARE MODE')
+
+        expected = expected_stats(worker_id)
+
+        current = ConsultationStats.objects.all()
+        if worker_id is not None:
+            current = current.filter(healthcare_worker_id=worker_id)
+        current = {
+            (row.healthcare_worker_id, row.day, row.age_bucket): row
+            for row in current.only('id', 'healthcare_worker_id', 'day', 'age_bucket', 'count')
+        }
+
+        stale = [row.id for key, row in current.items() if key not in expected]
+        changed = []
+        missing = []
+        for key, count in expected.items():
+            row = current.get(key)
+            if row is None:
+                worker, day, bucket = key
+                missing.append(ConsultationStats(
+                    healthcare_worker_id=worker, day=day, age_bucket=bucket, count=count
+                ))
+            elif row.count != count:
+                row.count = count
+                changed.append(row)
+
+        ConsultationStats.objects.filter(id__in=stale).delete()
+        ConsultationStats.objects.bulk_update(changed, ['count'], batch_size=1000)
+        ConsultationStats.objects.bulk_create(missing, batch_size=1000)
+
+    return len(stale) + len(changed) + len(missing)
+
+
+def worker_stats(worker_id, start=None, end=None, period='day'):
+    """
+    Consultas por dia, semana ou mês e distribuição de idades de um
+    profissional entre `start` e `end` (datas, inclusivas), lidas só do
+    resumo.
+    """
+    queryset = ConsultationStats.objects.filter(healthcare_worker_id=worker_id)
+    if start is not None:
+        queryset = queryset.filter(day__gte=start)
+    if end is not None:
+        queryset = queryset.filter(day__lte=end)
+
+    by_period = (
+        queryset.annotate(period=PERIODS[period]).values('period')
+        .annotate(total=Sum('count')).order_by('period')
+    )
+    by_age = Counter(dict(
+        queryset.values('age_bucket').annotate(total=Sum('count')).order_by().values_list('age_bucket', 'total')
+    ))
+
+    return {
+        'total': sum(by_age.values()),
+        'consultations': [
+            {'period': row['period'].isoformat(), 'count': row['total']} for row in by_period
+        ],
+        'ages': [
+            {'range': age_bucket_label(bucket), 'count': by_age[bucket]} for bucket in AGE_BUCKETS
+        ],
+    }
@@ -1,12 +1,39 @@
+import csv
+import json
+import threading
+from io import StringIO
+from unittest import mock
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.models import Sum
+from django.http import QueryDict
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.http import urlencode
 from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from app.pagination import encode_position
+from app.rows import compile_row_encoder
 from healthcare_workers.models import HealthcareWorker
-from .models import MedicalConsultation
+from .filters import filter_consultations
+from .models import ConsultationStats, MedicalConsultation
+from .schedule import schedule_cache_stats
+from .seeding import seed
+from .stats import apply_deltas, expected_stats, rebuild_stats
+from .serializers import (
+    BUSINESS_HOURS_END,
+    BUSINESS_HOURS_START,
+    HealthcareWorkerField,
+    MedicalConsultationSerializer,
+    SLOT_CONFLICT_MESSAGE,
+)
+from .views import MedicalConsultationAsyncListView, MedicalConsultationListCreateView
 
 
 class MedicalConsultationAPITestCase(APITestCase):
@@ -94,7 +121,221 @@ class MedicalConsultationAPITestCase(APITestCase):
         response = self.client.get(self.list_create_url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_list_medical_consultations_cursor_pagination(self):
+        """Testa paginação por cursor com busca, nos dois sentidos"""
+        other_worker = HealthcareWorker.objects.create(
+            name='Dra. Ana',
+            profession='Cardiologista',
+            address='Av. Principal, 456',
+            phone='33999290107'
+        )
+
+        # Mesmo horário para profissionais diferentes força o desempate por id
+        for hours in range(3):
+            for worker in (self.healthcare_worker, other_worker):
+                MedicalConsultation.objects.create(
+                    patient_name='João Silva',
+                    age=30,
+                    healthcare_worker=worker,
+                    consultation_date=self.future_date + timedelta(hours=hours)
+                )
+
+        self.authenticate()
+
+        response = self.client.get(self.list_create_url, {'page_size': 4})
+        first_page = [item['id'] for item in response.data['results']]
+        self.assertEqual(len(first_page), 4)
+        self.assertIsNone(response.data['previous'])
+
+        response = self.client.get(response.data['next'])
+        second_page = [item['id'] for item in response.data['results']]
+        self.assertEqual(len(second_page), 2)
+        self.assertIsNone(response.data['next'])
+
+        expected = list(
+            MedicalConsultation.objects.order_by('-consultation_date', 'id').values_list('id', flat=True)
+        )
+        self.assertEqual(first_page + second_page, expected)
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([item['id'] for item in response.data['results']], first_page)
+
+        response = self.client.get(self.list_create_url, {'search': 'Ana', 'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertTrue(all(item['healthcare_worker'] == other_worker.id for item in response.data['results']))
+
+    def test_list_medical_consultations_malformed_cursor_position(self):
+        """Testa que cursor com valores de posição inválidos dá 404, não 500"""
+        self.authenticate()
+        for url in (self.list_create_url, reverse('medicalconsultation_async_list')):
+            for position in (['x', 'abc'], [None, None], [1, 2], ['nodate', 1], [self.future_date.isoformat()]):
+                response = self.client.get(url, {'cursor': encode_position(position)})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, (url, position))
+
+    def test_list_medical_consultations_expand_healthcare_worker(self):
+        """Testa profissional embutido na listagem com número constante de queries"""
+        self.authenticate()
+
+        def list_queries(count):
+            MedicalConsultation.objects.all().delete()
+            for index in range(count):
+                worker = HealthcareWorker.objects.create(
+                    name=f'Dr. Profissional {index}',
+                    profession='Clínico Geral',
+                    address='Rua das Flores, 123',
+                    phone='33999190106'
+                )
+                MedicalConsultation.objects.create(
+                    patient_name='João Silva',
+                    age=30,
+                    healthcare_worker=worker,
+                    consultation_date=self.future_date + timedelta(hours=index % 8, days=index // 8)
+                )
+
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(self.list_create_url, {'expand': 'healthcare_worker'})
+            self.assertEqual(len(response.data['results']), count)
+            return response, len(context.captured_queries)
+
+        # Primeira requisição põe o usuário em cache; as medidas comparam só a listagem
+        self.client.get(self.list_create_url)
+        response, few_queries = list_queries(2)
+        worker_data = response.data['results'][0]['healthcare_worker']
+        self.assertEqual(set(worker_data), {'id', 'name', 'preferred_name', 'profession'})
+
+        _, many_queries = list_queries(20)
+        self.assertEqual(few_queries, many_queries)
+
+        # Sem expand, continua retornando apenas o id
+        response = self.client.get(self.list_create_url)
+        self.assertIsInstance(response.data['results'][0]['healthcare_worker'], int)
+
+        response = self.client.get(self.list_create_url, {'expand': 'patient'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sparse_fieldsets(self):
+        """Testa ?fields= e ?omit= na listagem paginada e no detalhe da consulta"""
+        for hour in range(3):
+            MedicalConsultation.objects.create(
+                patient_name='João Silva',
+                age=30,
+                healthcare_worker=self.healthcare_worker,
+                consultation_date=self.future_date + timedelta(hours=hour)
+            )
+        self.authenticate()
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.list_create_url, {'fields': 'patient_name', 'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'patient_name': 'João Silva'}] * 2)
+        select = next(q['sql'] for q in context if 'FROM "medical_consultation_medicalconsultation"' in q['sql'])
+        self.assertNotIn('"phone"', select)
+
+        # O cursor continua funcionando sem as colunas da ordenação na resposta
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+
+        response = self.client.get(
+            self.list_create_url, {'fields': 'id,healthcare_worker', 'expand': 'healthcare_worker'}
+        )
+        result = response.data['results'][0]
+        self.assertEqual(set(result), {'id', 'healthcare_worker'})
+        self.assertEqual(result['healthcare_worker']['name'], 'Dr. João')
+
+        consultation_id = result['id']
+        response = self.client.get(
+            reverse('medicalconsultation_detail', kwargs={'pk': consultation_id}), {'omit': 'phone,age'}
+        )
+        self.assertNotIn('phone', response.data)
+        self.assertNotIn('age', response.data)
+
+        response = self.client.get(self.list_create_url, {'omit': 'prontuario'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('prontuario', response.data['omit'])
+
+    def test_list_row_encoder_matches_serializer(self):
+        """Testa que a listagem via .values() gera o mesmo JSON do serializer"""
+        other_worker = HealthcareWorker.objects.create(
+            name='Dra. Ana',
+            profession='Cardiologista',
+            address='Rua das Flores, 123',
+            phone='33999190107'
+        )
+        for hour in range(3):
+            for worker in (self.healthcare_worker, other_worker):
+                MedicalConsultation.objects.create(
+                    patient_name='João Silva',
+                    patient_preferred_name=None if hour else 'João',
+                    age=30 + hour,
+                    healthcare_worker=worker,
+                    consultation_date=self.future_date + timedelta(hours=hour)
+                )
+        self.assertIsNotNone(compile_row_encoder(MedicalConsultationSerializer))
+        self.authenticate()
+
+        def pages(url, params):
+            bodies = []
+            response = self.client.get(url, params)
+            while True:
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                bodies.append(response.json())
+                if not bodies[-1]['next']:
+                    return bodies
+                response = self.client.get(bodies[-1]['next'])
+
+        for params in (
+            {'page_size': 4},
+            {'page_size': 4, 'expand': 'healthcare_worker'},
+            {'fields': 'id,consultation_date', 'expand': 'healthcare_worker'},
+            {'search': 'Ana'},
+        ):
+            for url in (self.list_create_url, reverse('medicalconsultation_async_list')):
+                fast = pages(url, params)
+                with mock.patch.object(MedicalConsultationListCreateView, 'use_row_encoder', False), \
+                        mock.patch.object(MedicalConsultationAsyncListView, 'use_row_encoder', False):
+                    self.assertEqual(pages(url, params), fast)
+
+    def test_async_list_and_detail_match_sync(self):
+        """Testa que as views assíncronas devolvem o mesmo JSON das síncronas"""
+        consultation = MedicalConsultation.objects.create(
+            patient_name='João Silva',
+            age=30,
+            healthcare_worker=self.healthcare_worker,
+            consultation_date=self.future_date
+        )
+        async_list_url = reverse('medicalconsultation_async_list')
+        async_detail_url = reverse('medicalconsultation_async_detail', kwargs={'pk': consultation.id})
+
+        response = self.client.get(async_list_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.authenticate()
+        for params in (
+            {},
+            {'expand': 'healthcare_worker'},
+            {'page_size': 1},
+            {'fields': 'id,healthcare_worker', 'expand': 'healthcare_worker'},
+            {'omit': 'healthcare_worker', 'expand': 'healthcare_worker'},
+        ):
+            sync_response = self.client.get(self.list_create_url, params)
+            async_response = self.client.get(async_list_url, params)
+            self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+            self.assertEqual(async_response.json(), sync_response.json())
+
+        sync_response = self.client.get(reverse('medicalconsultation_detail', kwargs={'pk': consultation.id}))
+        async_response = self.client.get(async_detail_url)
+        self.assertEqual(async_response.json(), sync_response.json())
+        self.assertEqual(async_response['ETag'], sync_response['ETag'])
+
+        response = self.client.get(async_detail_url, HTTP_IF_NONE_MATCH=async_response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(reverse('medicalconsultation_async_detail', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_create_medical_consultation_success(self):
         """Testa criação bem-sucedida de consulta médica"""
@@ -108,6 +349,283 @@ class MedicalConsultationAPITestCase(APITestCase):
         consultation = MedicalConsultation.objects.first()
         self.assertEqual(consultation.patient_name, 'Maria Santos')
 
+    def test_create_medical_consultation_other_integrity_error(self):
+        """Testa que só a constraint de horário vira erro de conflito"""
+        serializer = MedicalConsultationSerializer(data=self.valid_consultation_data)
+        self.assertTrue(serializer.is_valid())
+        error = IntegrityError('NOT NULL constraint failed: medical_consultation_medicalconsultation.age')
+        with mock.patch.object(MedicalConsultation, 'save', side_effect=error):
+            with self.assertRaises(IntegrityError):
+                serializer.save()
+
+    def test_create_medical_consultation_slot_conflict(self):
+        """Testa que o mesmo horário não pode ser reservado duas vezes"""
+        self.authenticate()
+
+        response = self.client.post(self.list_create_url, self.valid_consultation_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.post(self.list_create_url, self.valid_consultation_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['non_field_errors'], [SLOT_CONFLICT_MESSAGE])
+        self.assertEqual(MedicalConsultation.objects.count(), 1)
+
+        # Atualizar a própria consulta mantendo o horário continua permitido
+        consultation = MedicalConsultation.objects.get()
+        detail_url = reverse('medicalconsultation_detail', kwargs={'pk': consultation.id})
+        response = self.client.patch(detail_url, {
+            'age': 36,
+            'consultation_date': self.future_date.isoformat()
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def bulk_items(self, count):
+        return [
+            {
+                'patient_name': 'Paciente Lote',
+                'age': 40,
+                'healthcare_worker': self.healthcare_worker.id,
+                'consultation_date': (self.future_date + timedelta(minutes=30 * index)).isoformat(),
+            }
+            for index in range(count)
+        ]
+
+    def test_bulk_create_medical_consultations(self):
+        """Testa criação em lote com número de queries independente do tamanho"""
+        self.authenticate()
+        bulk_url = reverse('medicalconsultation_bulk')
+        # Põe o usuário em cache para as duas medidas serem comparáveis
+        self.client.get(self.list_create_url)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(bulk_url, self.bulk_items(2), format='json')
+        few_queries = len(context.captured_queries)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(
+            [result['id'] for result in response.data['results']],
+            list(MedicalConsultation.objects.order_by('id').values_list('id', flat=True))
+        )
+
+        MedicalConsultation.objects.all().delete()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(bulk_url, self.bulk_items(12), format='json')
+        self.assertEqual(response.data['created'], 12)
+        self.assertEqual(len(context.captured_queries), few_queries)
+
+    def test_bulk_create_atomic_rejects_whole_batch(self):
+        """Testa que no modo padrão um item inválido impede todo o lote"""
+        self.authenticate()
+        items = self.bulk_items(3)
+        items.append(dict(items[0]))
+
+        response = self.client.post(reverse('medicalconsultation_bulk'), items, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['created'], 0)
+        self.assertEqual(response.data['results'][3]['errors']['non_field_errors'], [SLOT_CONFLICT_MESSAGE])
+        self.assertEqual(MedicalConsultation.objects.count(), 0)
+
+    def test_bulk_create_partial_reports_each_item(self):
+        """Testa que no modo parcial os itens válidos são gravados e os demais reportados"""
+        MedicalConsultation.objects.create(
+            patient_name='João Silva',
+            age=30,
+            healthcare_worker=self.healthcare_worker,
+            consultation_date=self.future_date
+        )
+        self.authenticate()
+
+        items = self.bulk_items(3)
+        items[2]['patient_name'] = 'A'
+        items.append({**items[1], 'healthcare_worker': 999999})
+
+        response = self.client.post(
+            f"{reverse('medicalconsultation_bulk')}?mode=partial", items, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['error', 'created', 'error', 'error']
+        )
+        self.assertEqual(response.data['results'][0]['errors']['non_field_errors'], [SLOT_CONFLICT_MESSAGE])
+        self.assertIn('patient_name', response.data['results'][2]['errors'])
+        self.assertIn('healthcare_worker', response.data['results'][3]['errors'])
+        self.assertEqual(MedicalConsultation.objects.count(), 2)
+
+    def test_list_filters(self):
+        """Testa os filtros worker, from, to, age_min e age_max na listagem"""
+        other_worker = HealthcareWorker.objects.create(
+            name='Dra. Ana',
+            profession='Cardiologista',
+            address='Rua das Flores, 123',
+            phone='33999190107'
+        )
+        ids = {}
+        for day, worker, age in ((0, self.healthcare_worker, 20), (1, self.healthcare_worker, 40), (1, other_worker, 60)):
+            ids[day, worker.id] = MedicalConsultation.objects.create(
+                patient_name='João Silva',
+                age=age,
+                healthcare_worker=worker,
+                consultation_date=self.future_date + timedelta(days=day)
+            ).id
+        self.authenticate()
+        first_day = self.future_date.date()
+        second_day = first_day + timedelta(days=1)
+
+        def listed(params):
+            response = self.client.get(self.list_create_url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return {item['id'] for item in response.data['results']}
+
+        worker_id = self.healthcare_worker.id
+        self.assertEqual(listed({'worker': worker_id}), {ids[0, worker_id], ids[1, worker_id]})
+        self.assertEqual(
+            listed({'worker': worker_id, 'from': second_day.isoformat(), 'to': second_day.isoformat()}),
+            {ids[1, worker_id]}
+        )
+        self.assertEqual(listed({'to': first_day.isoformat()}), {ids[0, worker_id]})
+        self.assertEqual(listed({'age_min': 40}), {ids[1, worker_id], ids[1, other_worker.id]})
+        self.assertEqual(listed({'age_min': 30, 'age_max': 50}), {ids[1, worker_id]})
+
+        async_response = self.client.get(reverse('medicalconsultation_async_list'), {'worker': other_worker.id})
+        self.assertEqual([item['id'] for item in async_response.json()['results']], [ids[1, other_worker.id]])
+
+        for params in ({'worker': 'abc'}, {'from': '31/12/2030'}, {'age_max': 'trinta'}):
+            response = self.client.get(self.list_create_url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_filters_use_indexes(self):
+        """Testa pelo EXPLAIN que os filtros da listagem usam índice"""
+        # Volume e estatísticas suficientes para o planejador escolher sozinho
+        start = date(2030, 1, 7)
+        seed(20, 20000, start_date=start)
+        worker = HealthcareWorker.objects.order_by('-id').values_list('id', flat=True).first()
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {MedicalConsultation._meta.db_table}')
+
+        day = start.isoformat()
+        for params in (
+            {'worker': worker, 'from': day, 'to': day},
+            {'worker': worker, 'age_min': 30},
+            {'from': day, 'to': day, 'age_max': 40},
+        ):
+            queryset = filter_consultations(MedicalConsultation.objects.all(), QueryDict(urlencode(params)))
+            plan = queryset.order_by('-consultation_date', 'id')[:50].explain()
+            if connection.vendor == 'postgresql':
+                self.assertNotIn('Seq Scan', plan, params)
+                self.assertRegex(plan, r'Index Scan|Index Cond', params)
+            else:
+                self.assertRegex(
+                    plan, r'\bSEARCH medical_consultation_medicalconsultation USING (COVERING )?INDEX\b', params
+                )
+                self.assertNotRegex(plan, r'\bSCAN medical_consultation_medicalconsultation\b', params)
+
+    def test_export_medical_consultations(self):
+        """Testa exportação em streaming (NDJSON e CSV) com filtros"""
+        other_worker = HealthcareWorker.objects.create(
+            name='Dra. Ana',
+            profession='Cardiologista',
+            address='Av. Principal, 456',
+            phone='33999290107'
+        )
+        for days in range(3):
+            for worker in (self.healthcare_worker, other_worker):
+                MedicalConsultation.objects.create(
+                    patient_name='João Silva',
+                    age=30,
+                    healthcare_worker=worker,
+                    consultation_date=self.future_date + timedelta(days=days)
+                )
+
+        self.authenticate()
+        export_url = reverse('medicalconsultation_export')
+
+        response = self.client.get(export_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 6)
+
+        # Mesmo formato da API de detalhe
+        first = json.loads(lines[0])
+        detail = self.client.get(reverse('medicalconsultation_detail', kwargs={'pk': first['id']}))
+        self.assertEqual(first, detail.json())
+
+        day = (self.future_date + timedelta(days=1)).date().isoformat()
+        response = self.client.get(export_url, {
+            'format': 'csv',
+            'worker': other_worker.id,
+            'from': day,
+            'to': day,
+        })
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        rows = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['healthcare_worker'], str(other_worker.id))
+
+        response = self.client.get(export_url, {'from': 'ontem'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_schedule_cache_invalidation(self):
+        """Testa cache da agenda diária e invalidação ao criar, mover e remover consultas"""
+        cache.clear()
+        self.authenticate()
+        other_worker = HealthcareWorker.objects.create(
+            name='Dra. Ana',
+            profession='Cardiologista',
+            address='Av. Principal, 456',
+            phone='33999290107'
+        )
+        day = self.future_date.date().isoformat()
+        next_day = (self.future_date + timedelta(days=1)).date().isoformat()
+        schedule_url = reverse('healthcareworkers_schedule', kwargs={'pk': self.healthcare_worker.id})
+
+        def schedule_ids(worker_url=schedule_url, date=day):
+            response = self.client.get(worker_url, {'date': date})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [item['id'] for item in response.data['consultations']]
+
+        before = schedule_cache_stats()
+        self.assertEqual(schedule_ids(), [])
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(schedule_ids(), [])
+        after = schedule_cache_stats()
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 1)
+        # Usuário e agenda em cache: nenhuma query
+        self.assertEqual(len(context.captured_queries), 0)
+
+        response = self.client.post(self.list_create_url, self.valid_consultation_data, format='json')
+        consultation_id = response.data['id']
+        self.assertEqual(schedule_ids(), [consultation_id])
+        self.assertEqual(schedule_ids(date=next_day), [])
+
+        # Mudar de dia e de profissional atualiza as duas agendas
+        detail_url = reverse('medicalconsultation_detail', kwargs={'pk': consultation_id})
+        self.client.patch(detail_url, {
+            'healthcare_worker': other_worker.id,
+            'consultation_date': (self.future_date + timedelta(days=1)).isoformat(),
+        }, format='json')
+        other_url = reverse('healthcareworkers_schedule', kwargs={'pk': other_worker.id})
+        self.assertEqual(schedule_ids(), [])
+        self.assertEqual(schedule_ids(other_url, next_day), [consultation_id])
+
+        self.client.delete(detail_url)
+        self.assertEqual(schedule_ids(other_url, next_day), [])
+
+        self.client.post(reverse('medicalconsultation_bulk'), self.bulk_items(2), format='json')
+        self.assertEqual(len(schedule_ids()), 2)
+
+        response = self.client.get(reverse('medicalconsultation_schedule_stats'))
+        self.assertEqual(set(response.data), {'hits', 'misses'})
+
+        response = self.client.get(reverse('healthcareworkers_schedule', kwargs={'pk': 999999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_create_medical_consultation_invalid_data(self):
         """Testa criação com dados inválidos"""
         self.authenticate()
@@ -154,6 +672,34 @@ class MedicalConsultationAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['patient_name'], 'João Silva')
 
+    def test_retrieve_medical_consultation_etag(self):
+        """Testa ETag e resposta 304 no detalhe da consulta"""
+        consultation = MedicalConsultation.objects.create(
+            patient_name='João Silva',
+            age=30,
+            healthcare_worker=self.healthcare_worker,
+            consultation_date=self.future_date
+        )
+        self.authenticate()
+        detail_url = reverse('medicalconsultation_detail', kwargs={'pk': consultation.id})
+
+        response = self.client.get(detail_url)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        # Só a leitura do updated_at (o usuário já está em cache); sem carregar a consulta
+        self.assertEqual(len(context.captured_queries), 1)
+
+        self.client.patch(detail_url, {'age': 31}, format='json')
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['age'], 31)
+
     def test_update_medical_consultation(self):
         """Testa atualização de consulta médica"""
         consultation = MedicalConsultation.objects.create(
@@ -210,6 +756,15 @@ class MedicalConsultationAPITestCase(APITestCase):
         response = self.client.post(self.list_create_url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_serializer_field_order(self):
+        """Testa que o profissional continua no fim da resposta, com o campo em lote"""
+        fields = MedicalConsultationSerializer().fields
+        self.assertEqual(list(fields), [
+            'id', 'patient_name', 'patient_preferred_name', 'age',
+            'consultation_date', 'created_at', 'updated_at', 'healthcare_worker',
+        ])
+        self.assertIsInstance(fields['healthcare_worker'], HealthcareWorkerField)
+
     def test_str_representation(self):
         """Testa representação string do modelo"""
         consultation = MedicalConsultation.objects.create(
@@ -221,3 +776,310 @@ class MedicalConsultationAPITestCase(APITestCase):
         )
 
         self.assertEqual(str(consultation), 'João')
+
+
+class ConsultationStatsTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='akeenathon', password='djangomaster')
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}'
+        )
+        self.worker = HealthcareWorker.objects.create(
+            name='Dr. João', profession='Clínico Geral', address='Rua A, 1', phone='33999190106'
+        )
+        self.other_worker = HealthcareWorker.objects.create(
+            name='Dra. Ana', profession='Cardiologista', address='Rua B, 2', phone='33999290107'
+        )
+        # Segunda-feira, 10h no fuso local
+        self.monday = timezone.make_aware(datetime(2030, 1, 7, 10))
+        self.stats_url = reverse('healthcareworkers_stats', kwargs={'pk': self.worker.id})
+
+    def consultation(self, age=35, days=0, hours=0, worker=None):
+        return MedicalConsultation.objects.create(
+            patient_name='Maria Santos',
+            age=age,
+            healthcare_worker=worker or self.worker,
+            consultation_date=self.monday + timedelta(days=days, hours=hours),
+        )
+
+    def stored_stats(self):
+        return {
+            (row.healthcare_worker_id, row.day, row.age_bucket): row.count
+            for row in ConsultationStats.objects.all()
+        }
+
+    def assertStatsInSync(self):
+        self.assertEqual(self.stored_stats(), expected_stats())
+
+    def test_stats_follow_create_update_and_delete(self):
+        """Testa que o resumo acompanha cada consulta criada, alterada e removida"""
+        day = self.monday.date()
+        first = self.consultation(age=35)
+        self.consultation(age=36, hours=1)
+        self.consultation(age=10, hours=2)
+        self.assertEqual(self.stored_stats(), {
+            (self.worker.id, day, 30): 2,
+            (self.worker.id, day, 0): 1,
+        })
+
+        # Alteração que não muda a linha do resumo não grava nada nele
+        first.patient_name = 'Maria S.'
+        with CaptureQueriesContext(connection) as context:
+            first.save()
+        self.assertFalse([q for q in context.captured_queries if 'consultationstats' in q['sql']])
+
+        # Mudar de profissional, dia e faixa (também a partir de instância relida)
+        moved = MedicalConsultation.objects.get(pk=first.pk)
+        moved.healthcare_worker = self.other_worker
+        moved.consultation_date += timedelta(days=1)
+        moved.age = 70
+        moved.save()
+        self.assertEqual(self.stored_stats(), {
+            (self.worker.id, day, 30): 1,
+            (self.worker.id, day, 0): 1,
+            (self.other_worker.id, day + timedelta(days=1), 60): 1,
+        })
+
+        moved.delete()
+        MedicalConsultation.objects.filter(age=10).delete()
+        self.assertEqual(self.stored_stats(), {(self.worker.id, day, 30): 1})
+        self.assertStatsInSync()
+
+    def test_stats_use_local_day(self):
+        """Testa que a consulta conta no dia do fuso local, não no dia em UTC"""
+        # 22h em São Paulo já é o dia seguinte em UTC
+        self.consultation(hours=12)
+        self.assertEqual(self.stored_stats(), {(self.worker.id, self.monday.date(), 30): 1})
+        self.assertStatsInSync()
+
+    def test_stats_on_bulk_create(self):
+        """Testa que a criação em lote também atualiza o resumo"""
+        items = [
+            {
+                'patient_name': 'Paciente Lote',
+                'age': age,
+                'healthcare_worker': self.worker.id,
+                'consultation_date': (self.monday + timedelta(hours=index)).isoformat(),
+            }
+            for index, age in enumerate([5, 20, 25, 50])
+        ]
+        response = self.client.post(reverse('medicalconsultation_bulk'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        day = self.monday.date()
+        self.assertEqual(self.stored_stats(), {
+            (self.worker.id, day, 0): 1,
+            (self.worker.id, day, 18): 2,
+            (self.worker.id, day, 45): 1,
+        })
+
+    def test_apply_deltas_lock_order(self):
+        """Testa que as linhas do resumo são gravadas sempre na ordem das chaves"""
+        day = self.monday.date()
+        deltas = {
+            (self.other_worker.id, day, 30): 1,
+            None: 3,
+            (self.worker.id, day + timedelta(days=1), 0): 2,
+            (self.worker.id, day, 45): 0,
+            (self.worker.id, day, 18): -1,
+        }
+        manager = ConsultationStats.objects
+        with mock.patch.object(manager, 'filter', wraps=manager.filter) as filter_rows:
+            apply_deltas(deltas)
+
+        keys = [
+            (call.kwargs['healthcare_worker_id'], call.kwargs['day'], call.kwargs['age_bucket'])
+            for call in filter_rows.call_args_list
+        ]
+        self.assertEqual(keys, sorted(key for key, delta in deltas.items() if key is not None and delta))
+        self.assertEqual(self.stored_stats(), {
+            (self.worker.id, day + timedelta(days=1), 0): 2,
+            (self.other_worker.id, day, 30): 1,
+        })
+
+    def test_rebuild_fixes_drift(self):
+        """Testa que o comando de rebuild corrige linhas faltando, sobrando e erradas"""
+        self.consultation(age=35)
+        self.consultation(age=50, hours=1)
+        self.consultation(age=20, worker=self.other_worker)
+        # Gravações que não passam pelos signals
+        MedicalConsultation.objects.filter(age=35).update(age=65)
+        ConsultationStats.objects.filter(age_bucket=45).update(count=7)
+        ConsultationStats.objects.create(
+            healthcare_worker=self.worker, day=self.monday.date() - timedelta(days=3), age_bucket=0, count=2
+        )
+
+        out = StringIO()
+        call_command('rebuild_consultation_stats', stdout=out)
+        # 30 sobrando, 60 faltando, 45 errada e a linha inventada
+        self.assertIn('4 linhas', out.getvalue())
+        self.assertStatsInSync()
+
+        self.assertEqual(rebuild_stats(), 0)
+        self.assertEqual(rebuild_stats(self.other_worker.id), 0)
+
+    def test_stats_endpoint(self):
+        """Testa o painel por dia, semana e mês, lendo só o resumo"""
+        self.consultation(age=10)
+        self.consultation(age=35, hours=1)
+        self.consultation(age=40, days=1)
+        self.consultation(age=70, days=7)
+        self.consultation(age=70, days=30)
+        self.consultation(age=30, worker=self.other_worker)
+        # Usuário em cache
+        self.client.get(self.stats_url)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.stats_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([
+            q for q in context.captured_queries
+            if MedicalConsultation._meta.db_table + '"' in q['sql']
+        ])
+        self.assertEqual(response.data['period'], 'day')
+        self.assertEqual(response.data['total'], 5)
+        self.assertEqual(response.data['consultations'], [
+            {'period': '2030-01-07', 'count': 2},
+            {'period': '2030-01-08', 'count': 1},
+            {'period': '2030-01-14', 'count': 1},
+            {'period': '2030-02-06', 'count': 1},
+        ])
+        self.assertEqual(response.data['ages'], [
+            {'range': '0-17', 'count': 1},
+            {'range': '18-29', 'count': 0},
+            {'range': '30-44', 'count': 2},
+            {'range': '45-59', 'count': 0},
+            {'range': '60+', 'count': 2},
+        ])
+
+        response = self.client.get(self.stats_url, {'period': 'week', 'to': '2030-01-31'})
+        self.assertEqual(response.data['to'], '2030-01-31')
+        self.assertEqual(response.data['total'], 4)
+        self.assertEqual(response.data['consultations'], [
+            {'period': '2030-01-07', 'count': 3},
+            {'period': '2030-01-14', 'count': 1},
+        ])
+
+        response = self.client.get(self.stats_url, {'period': 'month', 'from': '2030-01-08'})
+        self.assertEqual(response.data['consultations'], [
+            {'period': '2030-01-01', 'count': 2},
+            {'period': '2030-02-01', 'count': 1},
+        ])
+
+    def test_stats_endpoint_errors(self):
+        """Testa período inválido, data inválida e profissional inexistente"""
+        response = self.client.get(self.stats_url, {'period': 'year'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('period', response.data)
+
+        response = self.client.get(self.stats_url, {'from': 'ontem'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Profissional sem consultas existe; inexistente é 404
+        response = self.client.get(self.stats_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 0)
+        response = self.client.get(reverse('healthcareworkers_stats', kwargs={'pk': 999999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SeedCommandTestCase(TestCase):
+
+    def seed(self):
+        call_command(
+            'seed', workers=4, consultations=60, seed=7, start='2030-01-04', stdout=StringIO()
+        )
+        workers = list(HealthcareWorker.objects.order_by('id').values_list('name', 'phone', 'email'))
+        consultations = list(MedicalConsultation.objects.order_by('id').values_list(
+            'patient_name', 'age', 'healthcare_worker__email', 'consultation_date'
+        ))
+        return workers, consultations
+
+    def test_seed_creates_valid_data(self):
+        """Testa que o seed cria consultas em dias úteis, no expediente e sem conflito"""
+        workers, consultations = self.seed()
+
+        self.assertEqual(len(workers), 4)
+        self.assertEqual(len(consultations), 60)
+        self.assertEqual(len({email for _, _, email in workers}), 4)
+        self.assertEqual(len({(email, date) for _, _, email, date in consultations}), 60)
+        for _, phone, _ in workers:
+            self.assertRegex(phone, r'^\(\d{2}\) 9\d{4}-\d{4}$')
+        for _, age, _, consultation_date in consultations:
+            local = timezone.localtime(consultation_date)
+            self.assertLess(local.weekday(), 5)
+            self.assertGreaterEqual(local.hour, BUSINESS_HOURS_START)
+            self.assertLessEqual(local.hour, BUSINESS_HOURS_END)
+            self.assertGreaterEqual(age, 0)
+        # O seed não passa pelos signals, mas deixa o resumo em dia
+        self.assertEqual(rebuild_stats(), 0)
+        self.assertEqual(ConsultationStats.objects.aggregate(total=Sum('count'))['total'], 60)
+
+    def test_seed_is_deterministic(self):
+        """Testa que a mesma semente gera os mesmos dados"""
+        first = self.seed()
+        MedicalConsultation.objects.all().delete()
+        HealthcareWorker.objects.all().delete()
+        self.assertEqual(self.seed(), first)
+
+
+class MedicalConsultationConcurrencyTestCase(TransactionTestCase):
+
+    def test_concurrent_bookings_same_slot(self):
+        """Testa que reservas simultâneas no mesmo horário resultam em uma única consulta"""
+        if connection.vendor == 'sqlite':
+            self.skipTest('SQLite trava a tabela em escritas concorrentes; teste roda no PostgreSQL.')
+
+        healthcare_worker = HealthcareWorker.objects.create(
+            name='Dr. João',
+            profession='Clínico Geral',
+            address='Rodolfo de abreu, 436',
+            phone='33999190106'
+        )
+        tomorrow = timezone.now().date() + timedelta(days=1)
+        consultation_date = timezone.make_aware(
+            datetime.combine(tomorrow, datetime.min.time().replace(hour=10, minute=0))
+        )
+
+        attempts = 8
+        barrier = threading.Barrier(attempts)
+
+        # Cada thread segura uma conexão até a barreira; com pool, ele precisa
+        # comportar todas ao mesmo tempo
+        pool_options = connection.settings_dict['OPTIONS'].get('pool')
+        if pool_options:
+            connection.close_pool()
+            connection.settings_dict['OPTIONS']['pool'] = {**pool_options, 'max_size': attempts}
+            self.addCleanup(connection.settings_dict['OPTIONS'].__setitem__, 'pool', pool_options)
+            self.addCleanup(connection.close_pool)
+        results = []
+
+        def book(index):
+            serializer = MedicalConsultationSerializer(data={
+                'patient_name': 'Paciente Teste',
+                'age': 30 + index,
+                'healthcare_worker': healthcare_worker.id,
+                'consultation_date': consultation_date.isoformat(),
+            })
+            try:
+                serializer.is_valid(raise_exception=True)
+                barrier.wait()
+                serializer.save()
+                results.append('created')
+            except Exception as e:
+                results.append(getattr(e, 'detail', e))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book, args=(index,)) for index in range(attempts)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count('created'), 1)
+        self.assertEqual(MedicalConsultation.objects.count(), 1)
+        for result in results:
+            if result != 'created':
+                self.assertEqual(result, {'non_field_errors': [SLOT_CONFLICT_MESSAGE]})
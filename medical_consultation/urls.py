@@ -1,8 +1,23 @@
 from django.urls import path
-from .views import MedicalConsultationListCreateView, MedicalConsultationRetrieveUpdateDestroyView
+from .views import (
+    MedicalConsultationAsyncListView,
+    MedicalConsultationAsyncRetrieveView,
+    MedicalConsultationBulkCreateView,
+    MedicalConsultationExportView,
+    MedicalConsultationListCreateView,
+    MedicalConsultationRetrieveUpdateDestroyView,
+    ScheduleCacheStatsView,
+)
 
 
 urlpatterns = [
     path('medicalconsultation/', MedicalConsultationListCreateView.as_view(), name='medicalconsultation_list'),
-    path('medicalconsultation/<int:pk>/', MedicalConsultationRetrieveUpdateDestroyView.as_view(), name='medicalconsultation_detail')
+    path('medicalconsultation/bulk/', MedicalConsultationBulkCreateView.as_view(), name='medicalconsultation_bulk'),
+    path('medicalconsultation/export/', MedicalConsultationExportView.as_view(), name='medicalconsultation_export'),
+    path('medicalconsultation/schedule/stats/', ScheduleCacheStatsView.as_view(), name='medicalconsultation_schedule_stats'),
+    path('medicalconsultation/<int:pk>/', MedicalConsultationRetrieveUpdateDestroyView.as_view(), name='medicalconsultation_detail'),
+
+    # Leitura assíncrona (ORM assíncrono), para servir via app/asgi.py
+    path('async/medicalconsultation/', MedicalConsultationAsyncListView.as_view(), name='medicalconsultation_async_list'),
+    path('async/medicalconsultation/<int:pk>/', MedicalConsultationAsyncRetrieveView.as_view(), name='medicalconsultation_async_detail'),
 ]
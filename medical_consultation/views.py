@@ -1,34 +1,83 @@
+import csv
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.fields import DateTimeField
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from django.db import IntegrityError, transaction
 from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.utils.html import escape
+from app.async_views import AsyncListAPIView, AsyncRetrieveAPIView
+from app.constraints import violates_constraint
+from app.conditional import conditional_retrieve
+from app.fieldsets import SparseFieldsetMixin
+from app.rows import ValuesListMixin
 from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from healthcare_workers.models import HealthcareWorker
+from .filters import filter_consultations
 from .models import MedicalConsultation
-from .serializers import MedicalConsultationSerializer
+from .pagination import MedicalConsultationPagination
+from .renderers import CSVRenderer, Echo, NDJSONRenderer, json_line
+from .schedule import schedule_cache_stats
+from .serializers import MedicalConsultationSerializer, SLOT_CONFLICT_MESSAGE, SLOT_CONSTRAINT
+from .signals import consultations_bulk_created
 import logging
 
 
 logger = logging.getLogger('api')
 
 
-class MedicalConsultationListCreateView(generics.ListCreateAPIView):
-    permission_classes = [IsAuthenticated]
-    serializer_class = MedicalConsultationSerializer
+EXPANDABLE_FIELDS = {'healthcare_worker'}
+
+
+class MedicalConsultationQuerysetMixin:
+    """
+    Lista por data, com `?search=`, `?expand=` e os filtros de
+    filter_consultations; usada também pela view assíncrona
+    """
+
+    def get_expand(self):
+        if self.request.method not in SAFE_METHODS:
+            return set()
+
+        expand = self.request.query_params.get('expand')
+        if not expand:
+            return set()
+
+        expand = {field.strip() for field in expand.split(',') if field.strip()}
+        invalid = expand - EXPANDABLE_FIELDS
+        if invalid:
+            raise ValidationError({
+                'expand': f"Campos não expansíveis: {', '.join(sorted(invalid))}"
+            })
+        return expand
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.get_expand()
+        return context
 
     def get_queryset(self):
-        queryset = MedicalConsultation.objects.all().order_by('-consultation_date')
+        queryset = MedicalConsultation.objects.all().order_by('-consultation_date', 'id')
+
+        # Profissional embutido vem no mesmo SELECT, sem uma consulta por linha
+        if 'healthcare_worker' in self.get_expand():
+            queryset = queryset.select_related('healthcare_worker')
 
-        logger.info(f"Usuário {self.request.user.id} ({self.request.user.username}) acessou lista de consultas")
+        logger.info("Usuário %s (%s) acessou lista de consultas", self.request.user.id, self.request.user.username)
+
+        queryset = filter_consultations(queryset, self.request.query_params)
 
         search = self.request.query_params.get('search')
         if search:
             search = escape(search.strip())
             if len(search) > 100:
-                logger.warning(f"Busca muito longa rejeitada: {search[:50]}...")
+                logger.warning("Busca muito longa rejeitada: %s...", search[:50])
                 return queryset.none()
 
-            logger.info(f"Busca realizada por usuário {self.request.user.id}: {search}")
+            logger.info("Busca realizada por usuário %s: %s", self.request.user.id, search)
 
             try:
                 doctor_id = int(search)
@@ -45,11 +94,17 @@ class MedicalConsultationListCreateView(generics.ListCreateAPIView):
 
         return queryset
 
+
+class MedicalConsultationListCreateView(ValuesListMixin, SparseFieldsetMixin, MedicalConsultationQuerysetMixin, generics.ListCreateAPIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = MedicalConsultationSerializer
+    pagination_class = MedicalConsultationPagination
+
     def create(self, request, *args, **kwargs):
-        logger.info(f"Usuário {request.user.id} ({request.user.username}) tentando criar nova consulta")
+        logger.info("Usuário %s (%s) tentando criar nova consulta", request.user.id, request.user.username)
 
         if not request.data:
-            logger.warning(f"Tentativa de criação sem dados por usuário {request.user.id}")
+            logger.warning("Tentativa de criação sem dados por usuário %s", request.user.id)
             return Response(
                 {'error': 'Dados não fornecidos'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -57,46 +112,47 @@ class MedicalConsultationListCreateView(generics.ListCreateAPIView):
 
         try:
             response = super().create(request, *args, **kwargs)
-            logger.info(f"Consulta criada com sucesso por usuário {request.user.id}: ID {response.data.get('id')}")
+            logger.info("Consulta criada com sucesso por usuário %s: ID %s", request.user.id, response.data.get('id'))
             return response
 
         except ValidationError as e:
-            logger.warning(f"Validação falhou ao criar consulta por usuário {request.user.id}: {e.detail}")
+            logger.warning("Validação falhou ao criar consulta por usuário %s: %s", request.user.id, e.detail)
             return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
 
         except Exception as e:
-            logger.error(f"Erro ao criar consulta para usuário {request.user.id}: {str(e)}")
+            logger.error("Erro ao criar consulta para usuário %s: %s", request.user.id, e)
             return Response(
                 {'error': 'Erro interno do servidor'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
 
-class MedicalConsultationRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class MedicalConsultationRetrieveUpdateDestroyView(SparseFieldsetMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
     queryset = MedicalConsultation.objects.all()
     serializer_class = MedicalConsultationSerializer
 
+    @conditional_retrieve(MedicalConsultation.objects.all())
     def retrieve(self, request, *args, **kwargs):
         consultation_id = kwargs.get('pk')
-        logger.info(f"Usuário {request.user.id} visualizou consulta ID: {consultation_id}")
+        logger.info("Usuário %s visualizou consulta ID: %s", request.user.id, consultation_id)
         return super().retrieve(request, *args, **kwargs)
 
     def update(self, request, *args, **kwargs):
         consultation_id = kwargs.get('pk')
-        logger.info(f"Usuário {request.user.id} atualizou consulta ID: {consultation_id}")
+        logger.info("Usuário %s atualizou consulta ID: %s", request.user.id, consultation_id)
 
         try:
             response = super().update(request, *args, **kwargs)
-            logger.info(f"Consulta {consultation_id} atualizada com sucesso")
+            logger.info("Consulta %s atualizada com sucesso", consultation_id)
             return response
 
         except ValidationError as e:
-            logger.warning(f"Validação falhou ao atualizar consulta {consultation_id} por usuário {request.user.id}: {e.detail}")
+            logger.warning("Validação falhou ao atualizar consulta %s por usuário %s: %s", consultation_id, request.user.id, e.detail)
             return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
 
         except Exception as e:
-            logger.error(f"Erro ao atualizar consulta {consultation_id}: {str(e)}")
+            logger.error("Erro ao atualizar consulta %s: %s", consultation_id, e)
             return Response(
                 {'error': 'Erro interno do servidor'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -104,16 +160,269 @@ class MedicalConsultationRetrieveUpdateDestroyView(generics.RetrieveUpdateDestro
 
     def destroy(self, request, *args, **kwargs):
         consultation_id = kwargs.get('pk')
-        logger.warning(f"Usuário {request.user.id} deletou consulta ID: {consultation_id}")
+        logger.warning("Usuário %s deletou consulta ID: %s", request.user.id, consultation_id)
 
         try:
             response = super().destroy(request, *args, **kwargs)
-            logger.info(f"Consulta {consultation_id} deletada com sucesso")
+            logger.info("Consulta %s deletada com sucesso", consultation_id)
             return response
 
         except Exception as e:
-            logger.error(f"Erro ao deletar consulta {consultation_id}: {str(e)}")
+            logger.error("Erro ao deletar consulta %s: %s", consultation_id, e)
             return Response(
                 {'error': 'Erro interno do servidor'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class MedicalConsultationAsyncListView(ValuesListMixin, SparseFieldsetMixin, MedicalConsultationQuerysetMixin, AsyncListAPIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = MedicalConsultationSerializer
+    pagination_class = MedicalConsultationPagination
+
+
+class MedicalConsultationAsyncRetrieveView(SparseFieldsetMixin, AsyncRetrieveAPIView):
+    permission_classes = [IsAuthenticated]
+    queryset = MedicalConsultation.objects.all()
+    serializer_class = MedicalConsultationSerializer
+
+    async def get(self, request, pk, *args, **kwargs):
+        logger.info("Usuário %s visualizou consulta ID: %s", request.user.id, pk)
+        return await super().get(request, pk, *args, **kwargs)
+
+
+MAX_BULK_SIZE = 500
+BULK_MODES = ('atomic', 'partial')
+
+
+class MedicalConsultationBulkCreateView(generics.GenericAPIView):
+    """
+    Cria várias consultas em uma requisição.
+
+    `?mode=atomic` (padrão) só grava se todos os itens forem válidos;
+    `?mode=partial` grava os válidos e reporta os erros dos demais.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = MedicalConsultationSerializer
+
+    def post(self, request, *args, **kwargs):
+        mode = request.query_params.get('mode', 'atomic')
+        if mode not in BULK_MODES:
+            return Response(
+                {'error': f"Modo inválido. Use: {', '.join(BULK_MODES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'Envie uma lista de consultas'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(items) > MAX_BULK_SIZE:
+            return Response(
+                {'error': f'Máximo de {MAX_BULK_SIZE} consultas por requisição'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        logger.info("Usuário %s criando %s consultas em lote (modo %s)", request.user.id, len(items), mode)
+
+        errors = {}
+        valid = self.validate_items(items, errors)
+        self.check_conflicts(valid, errors)
+
+        if mode == 'atomic' and errors:
+            logger.warning("Lote rejeitado para usuário %s: %s itens com erro", request.user.id, len(errors))
+            return Response(
+                self.build_response(items, {}, errors),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        valid = [(index, data) for index, data in valid if index not in errors]
+        created = self.create_items(valid, errors, mode)
+
+        logger.info("Lote do usuário %s: %s criadas, %s com erro", request.user.id, len(created), len(errors))
+
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+
+        return Response(self.build_response(items, created, errors), status=response_status)
+
+    def validate_items(self, items, errors):
+        # Todos os profissionais citados no lote em uma única query
+        worker_ids = set()
+        for item in items:
+            if isinstance(item, dict):
+                try:
+                    worker_ids.add(int(item.get('healthcare_worker')))
+                except (TypeError, ValueError):
+                    pass
+
+        context = self.get_serializer_context()
+        context['healthcare_workers'] = HealthcareWorker.objects.in_bulk(worker_ids)
+
+        valid = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors[index] = {api_settings.NON_FIELD_ERRORS_KEY: ['Item deve ser um objeto']}
+                continue
+
+            serializer = self.get_serializer(data=item, context=context)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors[index] = serializer.errors
+
+        return valid
+
+    def check_conflicts(self, valid, errors):
+        conflict = {api_settings.NON_FIELD_ERRORS_KEY: [SLOT_CONFLICT_MESSAGE]}
+
+        # Conflitos dentro do próprio lote
+        seen = set()
+        for index, data in valid:
+            key = (data['healthcare_worker'].id, data['consultation_date'])
+            if key in seen:
+                errors[index] = conflict
+            seen.add(key)
+
+        if not seen:
+            return
+
+        # Conflitos com o banco em uma única query
+        existing = set(
+            MedicalConsultation.objects.filter(
+                healthcare_worker_id__in={worker_id for worker_id, _ in seen},
+                consultation_date__in={date for _, date in seen},
+            ).values_list('healthcare_worker_id', 'consultation_date')
+        )
+        for index, data in valid:
+            if (data['healthcare_worker'].id, data['consultation_date']) in existing:
+                errors[index] = conflict
+
+    def create_items(self, valid, errors, mode):
+        if not valid:
+            return {}
+
+        objects = [MedicalConsultation(**data) for _, data in valid]
+        try:
+            with transaction.atomic():
+                MedicalConsultation.objects.bulk_create(objects)
+                # Dentro da transação: o resumo das consultas é gravado junto
+                consultations_bulk_created.send(sender=MedicalConsultation, consultations=objects)
+            return {index: obj.id for (index, _), obj in zip(valid, objects)}
+        except IntegrityError as exc:
+            if not violates_constraint(exc, MedicalConsultation, SLOT_CONSTRAINT):
+                raise
+            # Outra requisição ocupou algum horário entre a checagem e a gravação
+            logger.warning("Conflito de horário concorrente durante criação em lote")
+
+        conflict = {api_settings.NON_FIELD_ERRORS_KEY: [SLOT_CONFLICT_MESSAGE]}
+        if mode == 'atomic':
+            for index, _ in valid:
+                errors[index] = conflict
+            return {}
+
+        created = {}
+        for index, data in valid:
+            try:
+                with transaction.atomic():
+                    # create() dispara post_save, que já invalida o cache da agenda
+                    created[index] = MedicalConsultation.objects.create(**data).id
+            except IntegrityError as exc:
+                if not violates_constraint(exc, MedicalConsultation, SLOT_CONSTRAINT):
+                    raise
+                errors[index] = conflict
+        return created
+
+    def build_response(self, items, created, errors):
+        results = []
+        for index in range(len(items)):
+            if index in created:
+                results.append({'index': index, 'status': 'created', 'id': created[index]})
+            elif index in errors:
+                results.append({'index': index, 'status': 'error', 'errors': errors[index]})
+            else:
+                results.append({'index': index, 'status': 'skipped'})
+
+        return {
+            'created': len(created),
+            'errors': len(errors),
+            'results': results,
+        }
+
+
+class MedicalConsultationExportView(generics.GenericAPIView):
+    """
+    Exporta consultas em NDJSON (padrão) ou CSV (`?format=csv`) em streaming.
+
+    As linhas vêm do banco em blocos via cursor do servidor (`iterator`) e
+    são escritas conforme chegam; a memória não cresce com o volume.
+    Filtros: `worker`, `from` e `to`.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = MedicalConsultationSerializer
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        queryset = filter_consultations(MedicalConsultation.objects.all(), request.query_params)
+
+        # Mesmas chaves e ordem da API
+        fields = list(self.get_serializer().fields)
+        columns = [MedicalConsultation._meta.get_field(field).attname for field in fields]
+        rows = queryset.order_by('consultation_date', 'id').values_list(*columns).iterator(
+            chunk_size=self.chunk_size
+        )
+
+        renderer = request.accepted_renderer
+        logger.info("Usuário %s exportando consultas em %s", request.user.id, renderer.format)
+
+        if renderer.format == 'csv':
+            content = self.stream_csv(fields, rows)
+        else:
+            content = self.stream_ndjson(fields, rows)
+
+        response = StreamingHttpResponse(
+            content,
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = f'attachment; filename="consultas.{renderer.format}"'
+        return response
+
+    def format_rows(self, fields, rows):
+        date_field = DateTimeField()
+        datetime_indexes = [
+            index for index, field in enumerate(fields)
+            if MedicalConsultation._meta.get_field(field).get_internal_type() == 'DateTimeField'
+        ]
+
+        for row in rows:
+            row = list(row)
+            for index in datetime_indexes:
+                if row[index] is not None:
+                    row[index] = date_field.to_representation(row[index])
+            yield row
+
+    def stream_ndjson(self, fields, rows):
+        for row in self.format_rows(fields, rows):
+            yield json_line(dict(zip(fields, row)))
+
+    def stream_csv(self, fields, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields)
+        for row in self.format_rows(fields, rows):
+            yield writer.writerow(row)
+
+
+class ScheduleCacheStatsView(generics.GenericAPIView):
+    """Acertos e falhas do cache de agenda diária neste processo"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        return Response(schedule_cache_stats())